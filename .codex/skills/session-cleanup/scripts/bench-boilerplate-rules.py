@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import random
+import sys
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import boilerplate_rules  # noqa: E402
+import cleanup_sessions  # noqa: E402
+
+# The marker list classify_messages() checked one `in` at a time before the rules engine.
+LEGACY_MARKERS = [
+    "<environment_context>",
+    "</environment_context>",
+    "# AGENTS.md instructions",
+    "<INSTRUCTIONS>",
+    "Global Agent Instructions",
+    "project-doc",
+    "Skills",
+    "How to use skills",
+]
+
+WORDS = (
+    "the session watcher reads appended lines from the codex log and speaks final assistant messages while "
+    "the dedup state keeps players from repeating output checking rate limits configured by tool calls"
+).split()
+
+
+def legacy_is_boilerplate(text: str) -> bool:
+    if text is None:
+        return True
+    t = text.strip()
+    if t == "" or t == ".":
+        return True
+    for marker in LEGACY_MARKERS:
+        if marker in t:
+            return True
+    return False
+
+
+def legacy_classify(messages: List[Dict[str, Any]], max_user_messages: int) -> Tuple[int, bool, bool]:
+    user_count = 0
+    for msg in messages:
+        role = msg.get("role")
+        if role not in ("user", "assistant"):
+            continue
+        text = cleanup_sessions.message_text(msg)
+        if text is None or legacy_is_boilerplate(text):
+            continue
+        if len(text.strip()) >= 5:
+            if role == "user":
+                user_count += 1
+            return user_count, True, False
+        if role == "user":
+            user_count += 1
+            if user_count > max_user_messages:
+                return user_count, False, False
+    return user_count, False, True
+
+
+def prose(rng: random.Random, chars: int) -> str:
+    out: List[str] = []
+    size = 0
+    while size < chars:
+        word = rng.choice(WORDS)
+        out.append(word)
+        size += len(word) + 1
+    return " ".join(out)
+
+
+def agents_block(rng: random.Random, chars: int) -> str:
+    return (
+        "# AGENTS.md instructions for /repo\n\n<INSTRUCTIONS>\n## Global Agent Instructions\n"
+        + prose(rng, chars)
+        + "\n## Skills\nHow to use skills: read the project-doc first.\n</INSTRUCTIONS>"
+    )
+
+
+def environment_block(rng: random.Random) -> str:
+    return "<environment_context>\n  <cwd>/repo</cwd>\n  <shell>zsh</shell>\n</environment_context>"
+
+
+def make_sessions(count: int, agents_chars: int, seed: int) -> List[List[Dict[str, Any]]]:
+    """Codex-like sessions: injected AGENTS.md and environment blocks, then either nothing, a short
+    prompt, or a real exchange (long assistant answers included)."""
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(count):
+        messages = [
+            {"role": "user", "text": agents_block(rng, agents_chars)},
+            {"role": "user", "text": environment_block(rng)},
+        ]
+        kind = rng.random()
+        if kind < 0.4:
+            messages.append({"role": "user", "text": rng.choice(["", ".", "ok", "hi"])})
+        elif kind < 0.7:
+            # Resumed sessions: the injected blocks repeat before anything is said.
+            messages.extend(messages[:2] * rng.randint(1, 4))
+        else:
+            messages.append({"role": "user", "text": prose(rng, 200)})
+            messages.append({"role": "assistant", "text": prose(rng, rng.randint(2000, 20000))})
+        sessions.append(messages)
+    return sessions
+
+
+def reference_rule(rules: boilerplate_rules.RuleSet, text: str) -> Optional[str]:
+    """The rule a message is counted under, worked out one rule at a time from the precedence that
+    boilerplate_rules documents, to check RuleSet.match() against."""
+    if not text:
+        return boilerplate_rules.EMPTY
+    probe = boilerplate_rules.PROBE_CHARS
+    literal = [r for r in rules.rules if r["kind"] == "marker" and not r["ignore_case"]]
+
+    def find(rule: Dict[str, Any], start: int, end: Optional[int]) -> bool:
+        # Occurrences starting at or after `start` and ending by `end` (and by the rule's window).
+        window = rule["window"]
+        limit = len(text) if window is None else min(window, len(text))
+        limit = limit if end is None else min(limit, end)
+        return text.find(rule["pattern"], start, limit) >= 0
+
+    steps: List[List[Tuple[str, bool]]] = [
+        [
+            (r["name"], text.casefold() == r["pattern"].casefold() if r["ignore_case"] else text == r["pattern"])
+            for r in rules.rules
+            if r["kind"] == "exact"
+        ],
+        [
+            (r["name"], re.match(re.escape(r["pattern"]), text, re.I if r["ignore_case"] else 0) is not None)
+            for r in rules.rules
+            if r["kind"] == "prefix"
+        ],
+        [(r["name"], (r["window"] or len(text)) >= len(r["pattern"]) and text.startswith(r["pattern"])) for r in literal],
+        [(r["name"], find(r, 0, probe)) for r in literal],
+        [(r["name"], find(r, 0, None)) for r in literal],
+    ]
+    for step in steps:
+        for name, hit in step:
+            if hit:
+                return name
+    regexes = [r for r in rules.rules if r["kind"] == "regex" or (r["kind"] == "marker" and r["ignore_case"])]
+    for window in sorted({r["window"] for r in regexes}, key=lambda w: (w is None, w or 0)):
+        best: Optional[Tuple[int, int, str]] = None
+        for index, r in enumerate(regexes):
+            if r["window"] != window:
+                continue
+            pattern = r["pattern"] if r["kind"] == "regex" else re.escape(r["pattern"])
+            m = re.compile(pattern, re.I if r["ignore_case"] else 0).search(text, 0, len(text) if window is None else window)
+            if m and (best is None or (m.start(), index) < best[:2]):
+                best = (m.start(), index, r["name"])
+        if best is not None:
+            return best[2]
+    return None
+
+
+OVERLAP_RULES = [
+    {"name": "env", "marker": "<environment_context>"},
+    {"name": "skills", "marker": "Skills"},
+    {"name": "agents", "marker": "# AGENTS.md"},
+    {"name": "doc-early", "marker": "project-doc", "window": 64},
+    {"name": "dot-marker", "marker": "."},
+    {"name": "dot", "exact": "."},
+    {"name": "hi-any-case", "exact": "HI", "ignore_case": True},
+    {"name": "hi", "exact": "hi"},
+    {"name": "note", "prefix": "Note:"},
+    {"name": "todo", "regex": r"TODO\(\w+\)"},
+    {"name": "fixme", "marker": "fixme", "ignore_case": True},
+]
+
+
+def check_attribution(seed: int, count: int = 3000) -> List[str]:
+    """Messages matching several overlapping rules must be counted under the documented one."""
+    rules = boilerplate_rules.RuleSet(OVERLAP_RULES)
+    rng = random.Random(seed)
+    fixed = [
+        (".", "dot"),  # exact beats an earlier-listed marker
+        ("hi", "hi-any-case"),  # among exact rules, config order
+        ("Note: see <environment_context>", "note"),  # prefix beats markers
+        ("Skills, then <environment_context>", "skills"),  # a marker the message starts with wins
+        ("x" * 100 + "# AGENTS.md" + "x" * 3000 + "<environment_context>", "agents"),  # probe before the rest
+        ("<b>project-doc and Skills", "skills"),  # within the probe, config order
+        ("x" * 70 + "project-doc", None),  # outside its window
+        ("fixme, TODO(me)", "fixme"),  # among regexes, the earliest match
+        ("TODO(me) FIXME", "todo"),
+    ]
+    pieces = ["<environment_context>", "Skills", "# AGENTS.md", "project-doc", ".", "Note:", "TODO(x)", "FixMe", "hi"]
+    for _ in range(count):
+        parts = [rng.choice(pieces) if rng.random() < 0.3 else prose(rng, rng.choice([5, 50, 3000])) for _ in range(4)]
+        fixed.append(("".join(parts[: rng.randint(1, 4)]), ""))
+    failures = []
+    for text, expected in fixed:
+        got = rules.match(text)
+        want = reference_rule(rules, text)
+        if got != want or (expected != "" and got != expected):
+            failures.append(f"{text[:60]!r}: match()={got} reference={want} expected={expected or want}")
+    return failures
+
+
+def run(sessions: List[List[Dict[str, Any]]], classify: Callable[[List[Dict[str, Any]]], Any], repeat: int) -> Tuple[float, List[Any]]:
+    best = float("inf")
+    verdicts: List[Any] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        verdicts = [classify(messages) for messages in sessions]
+        best = min(best, time.perf_counter() - t0)
+    return best, verdicts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark the cleanup classifier's boilerplate matching.")
+    parser.add_argument("--sessions", type=int, default=2000, help="Synthetic sessions")
+    parser.add_argument(
+        "--agents-chars",
+        type=int,
+        nargs="+",
+        default=[2000, 20000, 100000],
+        help="Sizes of the injected AGENTS.md blocks, one run each (default: 2000 20000 100000)",
+    )
+    parser.add_argument("--max-user-messages", type=int, default=1)
+    parser.add_argument("--rules", default=boilerplate_rules.DEFAULT_RULES, help="Rules config to benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N timing")
+    args = parser.parse_args()
+
+    failures = check_attribution(args.seed)
+    for failure in failures:
+        print(f"attribution mismatch: {failure}")
+    print(f"attribution: {'ok' if not failures else f'{len(failures)} MISMATCHES'}")
+
+    rules = boilerplate_rules.load_rules(args.rules)
+    mismatches = 0
+    for agents_chars in args.agents_chars:
+        sessions = make_sessions(args.sessions, agents_chars, args.seed)
+        messages = sum(len(m) for m in sessions)
+        chars = sum(len(msg["text"]) for m in sessions for msg in m)
+        print(
+            f"sessions={len(sessions)} messages={messages} agents={agents_chars} chars "
+            f"text={chars / 1e6:.1f}M chars rules={len(rules.rules)}"
+        )
+        base_time, base_verdicts = run(sessions, lambda m: legacy_classify(m, args.max_user_messages), args.repeat)
+        print(f"  {'legacy markers (in per marker)':<32} {base_time * 1000:8.1f} ms  {messages / base_time:10.0f} msg/s")
+        elapsed, verdicts = run(
+            sessions, lambda m: cleanup_sessions.classify_messages(m, args.max_user_messages, rules), args.repeat
+        )
+        mismatched = sum(1 for a, b in zip(base_verdicts, verdicts) if a != b)
+        mismatches += mismatched
+        status = "" if not mismatched else f"  MISMATCH in {mismatched} sessions"
+        print(
+            f"  {'compiled rules':<32} {elapsed * 1000:8.1f} ms  {messages / elapsed:10.0f} msg/s  "
+            f"x{base_time / elapsed:.1f}{status}"
+        )
+    return 1 if mismatches or failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Boilerplate rules for the cleanup classifier, compiled from a JSON config into a few fast matchers.
+
+The config is {"rules": [...]}, each rule naming what it matches with exactly one of:
+
+    {"name": "...", "marker": "text"}     substring of the stripped message
+    {"name": "...", "prefix": "text"}     the stripped message starts with it
+    {"name": "...", "regex": "pattern"}   re.search() over the stripped message
+    {"name": "...", "exact": "text"}      the whole stripped message
+
+plus optional "ignore_case": true, and for markers and regexes "window": N to look only at the first N
+characters (as if the message ended there). Empty messages are always boilerplate. Regexes are combined
+into one pattern, so they take "ignore_case" rather than inline global flags like (?i), and cannot use
+numbered backreferences.
+
+Rules are compiled by kind rather than tried one by one: exact rules are one dict lookup, prefixes one
+anchored regex match, and regexes one combined regex per window size.
+
+Literal markers deliberately do not get a single-pass matcher (one alternation, or an Aho-Corasick
+automaton, over all of them). A combined regex of the markers measured about 20x slower than per-marker
+str.find() on ordinary prose, because re scans character by character in Python's matcher while find()
+is a C substring search; a pure-Python automaton is slower still, and no third-party one is a dependency.
+Instead each marker stays a find() call, bounded: one str.startswith() call tries them all at the start
+of the message, then each is looked for in the leading PROBE_CHARS, and only then in the rest. A huge
+injected AGENTS.md or environment block, which opens with (or soon reaches) a marker, is therefore settled
+without being read through; bench-boilerplate-rules.py compares this with the old unbounded `in` checks.
+
+Whether a message is boilerplate does not depend on rule order, but which rule it is counted under does.
+Since config order would mean searching every earlier-listed marker through the whole message (exactly
+the cost this module avoids), a message goes to the first rule that matches in this order of steps, and
+within a step in config order:
+
+    1. exact rules
+    2. prefix rules
+    3. literal markers the message starts with
+    4. literal markers within the first PROBE_CHARS (or their window, if shorter)
+    5. literal markers anywhere else within their window
+    6. regex rules and case-insensitive markers, smallest window first; within a window, the match that
+       starts first
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "boilerplate_rules.json")
+
+# Hit-counter name for empty messages, which need no rule.
+EMPTY = "(empty)"
+
+# Leading characters searched for every literal marker before any marker is searched in the rest.
+PROBE_CHARS = 2048
+
+_KINDS = ("marker", "prefix", "regex", "exact")
+
+
+def _combine(rules: Sequence[Tuple[str, str]], anchor: str = "") -> Tuple[Optional[Pattern[str]], Dict[str, str]]:
+    """One regex of named alternatives; returns it and the group-name -> rule-name map."""
+    if not rules:
+        return None, {}
+    groups = {f"r{i}": name for i, (name, _) in enumerate(rules)}
+    pattern = "|".join(f"(?P<r{i}>{anchor}(?:{body}))" for i, (_, body) in enumerate(rules))
+    try:
+        return re.compile(pattern), groups
+    except re.error as exc:
+        raise ValueError(f"rules do not combine into one regex (inline flags? use ignore_case): {exc}") from None
+
+
+class RuleSet:
+    """Compiled boilerplate rules with per-rule hit counters."""
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]) -> None:
+        self.rules: List[Dict[str, Any]] = []
+        exact: Dict[str, Tuple[int, str]] = {}
+        exact_folded: Dict[str, Tuple[int, str]] = {}
+        prefixes: List[Tuple[str, str]] = []
+        windowed: Dict[Optional[int], List[Tuple[str, str]]] = {}
+        literals: List[Tuple[str, str, Optional[int]]] = []
+
+        for index, raw in enumerate(rules):
+            rule = self._normalize(index, raw)
+            self.rules.append(rule)
+            name, kind, text = rule["name"], rule["kind"], rule["pattern"]
+            body = re.escape(text) if kind != "regex" else text
+            if rule["ignore_case"]:
+                body = f"(?i:{body})"
+            if kind == "exact":
+                if rule["ignore_case"]:
+                    exact_folded.setdefault(text.casefold(), (index, name))
+                else:
+                    exact.setdefault(text, (index, name))
+            elif kind == "prefix":
+                prefixes.append((name, body))
+            elif kind == "marker" and not rule["ignore_case"]:
+                literals.append((name, text, rule["window"]))
+            else:
+                windowed.setdefault(rule["window"], []).append((name, body))
+
+        self.exact = exact
+        self.exact_folded = exact_folded
+        self.prefix_rx, self.prefix_names = _combine(prefixes, anchor=r"\A")
+        # Smallest windows first; None (the whole message) last.
+        order = sorted(windowed, key=lambda window: (window is None, window or 0))
+        self.regexes = [(window, *_combine(windowed[window])) for window in order]
+        # (name, marker, end of the probe, end of the rest): find() bounds for the two passes.
+        self.literals = [
+            (name, marker, min(window or PROBE_CHARS, PROBE_CHARS), window) for name, marker, window in literals
+        ]
+        self.openers = [
+            (name, marker) for name, marker, _, window in self.literals if window is None or window >= len(marker)
+        ]
+        self.opener_prefixes = tuple(marker for _, marker in self.openers)
+        # Texts no longer than every probe and window are searched whole, with plain `in`.
+        self.short_limit = min([probe for _, _, probe, _ in self.literals], default=PROBE_CHARS)
+        self.short_literals = [(name, marker) for name, marker, _, _ in self.literals]
+
+        self.fingerprint = hashlib.sha256(json.dumps(self.rules, sort_keys=True).encode("utf-8")).hexdigest()
+        self.hits: Dict[str, List[int]] = {EMPTY: [0, 0]}
+        self.hits.update((rule["name"], [0, 0]) for rule in self.rules)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(index: int, raw: Any) -> Dict[str, Any]:
+        if not isinstance(raw, dict):
+            raise ValueError(f"rule {index}: expected an object, got {type(raw).__name__}")
+        kinds = [kind for kind in _KINDS if kind in raw]
+        if len(kinds) != 1:
+            raise ValueError(f"rule {index}: needs exactly one of {', '.join(_KINDS)}")
+        kind = kinds[0]
+        pattern = raw[kind]
+        if not isinstance(pattern, str) or (not pattern and kind != "exact"):
+            raise ValueError(f"rule {index}: {kind} must be a non-empty string")
+        window = raw.get("window")
+        if window is not None and (kind not in ("marker", "regex") or not isinstance(window, int) or window <= 0):
+            raise ValueError(f"rule {index}: window must be a positive integer on a marker or regex rule")
+        if kind == "regex":
+            try:
+                re.compile(pattern)
+            except re.error as exc:
+                raise ValueError(f"rule {index}: bad regex {pattern!r}: {exc}") from None
+        name = raw.get("name") or f"{kind}:{pattern}"
+        return {
+            "name": str(name),
+            "kind": kind,
+            "pattern": pattern,
+            "window": window,
+            "ignore_case": bool(raw.get("ignore_case", False)),
+        }
+
+    def match(self, text: str) -> Optional[str]:
+        """Name of the rule matching the stripped `text` first, in the order of steps in the module docstring
+        (EMPTY for an empty text), else None."""
+        if not text:
+            return EMPTY
+        exact = self.exact.get(text)
+        if self.exact_folded:
+            folded = self.exact_folded.get(text.casefold())
+            if folded is not None and (exact is None or folded < exact):
+                exact = folded
+        if exact is not None:
+            return exact[1]
+        if self.prefix_rx is not None:
+            m = self.prefix_rx.match(text)
+            if m:
+                return self.prefix_names[m.lastgroup]
+        if self.opener_prefixes and text.startswith(self.opener_prefixes):
+            for name, marker in self.openers:
+                if text.startswith(marker):
+                    return name
+        if len(text) <= self.short_limit:
+            for name, marker in self.short_literals:
+                if marker in text:
+                    return name
+        else:
+            for name, marker, probe, _ in self.literals:
+                if text.find(marker, 0, probe) >= 0:
+                    return name
+        if len(text) > PROBE_CHARS:
+            for name, marker, probe, end in self.literals:
+                # Occurrences ending inside the probe were ruled out above.
+                if (end is None or end > probe) and text.find(marker, max(probe - len(marker) + 1, 0), end) >= 0:
+                    return name
+        for window, rx, names in self.regexes:
+            m = rx.search(text, 0, window) if window is not None else rx.search(text)
+            if m:
+                return names[m.lastgroup]
+        return None
+
+    def record(self, hits: Dict[str, int], candidate: bool) -> None:
+        """Add one session's per-rule message hits; `candidate` when the session was judged low-signal."""
+        with self.lock:
+            for name, count in hits.items():
+                totals = self.hits[name]
+                totals[0] += count
+                if candidate:
+                    totals[1] += count
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        return {name: {"messages": messages, "candidates": candidates} for name, (messages, candidates) in self.hits.items()}
+
+    def index_markers(self) -> Optional[List[str]]:
+        """The markers for the session index, which only knows unwindowed markers plus "" and "."; None
+        when these rules mean something it cannot."""
+        markers = []
+        has_dot = False
+        for rule in self.rules:
+            if rule["kind"] == "exact" and rule["pattern"] in ("", "."):
+                has_dot = has_dot or rule["pattern"] == "."
+            elif rule["kind"] == "marker" and rule["window"] is None and not rule["ignore_case"]:
+                markers.append(rule["pattern"])
+            else:
+                return None
+        return markers if has_dot else None
+
+
+def load_rules(path: str = DEFAULT_RULES) -> RuleSet:
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as exc:
+            raise ValueError(f"{path}: {exc}") from None
+    rules = data.get("rules") if isinstance(data, dict) else None
+    if not isinstance(rules, list):
+        raise ValueError(f'{path}: expected {{"rules": [...]}}')
+    try:
+        return RuleSet(rules)
+    except ValueError as exc:
+        raise ValueError(f"{path}: {exc}") from None
@@ -1,20 +1,30 @@
 #!/usr/bin/env python3
 import argparse
+import collections
+import concurrent.futures
+import contextlib
+import cProfile
 import datetime
+import hashlib
 import json
+import os
 import subprocess
-from typing import Iterable, List, Dict, Any, Tuple
+import sys
+import threading
+import time
+from typing import Callable, Deque, Iterable, Iterator, List, Dict, Any, Optional, Tuple
 
-BOILERPLATE_MARKERS = [
-    "<environment_context>",
-    "</environment_context>",
-    "# AGENTS.md instructions",
-    "<INSTRUCTIONS>",
-    "Global Agent Instructions",
-    "project-doc",
-    "Skills",
-    "How to use skills",
-]
+import boilerplate_rules
+import session_reader
+
+# Bump when classify_messages() changes meaning, so cached verdicts from older runs are dropped.
+CLASSIFIER_VERSION = 1
+
+DEFAULT_CACHE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "session-harbor",
+    "cleanup-verdicts.json",
+)
 
 
 def parse_args() -> argparse.Namespace:
@@ -26,11 +36,176 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--max-total-messages", type=int, default=None, help="Max total messages (uses session messageCount)")
     parser.add_argument("--include-archived", action="store_true", help="Include already archived sessions")
     parser.add_argument("--apply", action="store_true", help="Actually archive sessions (default: dry-run)")
-    parser.add_argument("--limit", type=int, default=200, help="Page size for session-list")
+    parser.add_argument(
+        "--backend",
+        choices=("export", "native", "index", "paged"),
+        default="export",
+        help=(
+            "export: one streaming session-export; native: read session files in-process (no CLI); "
+            "index: query the SQLite session index; paged: session-list pages plus session-show per candidate"
+        ),
+    )
+    parser.add_argument(
+        "--index",
+        default=None,
+        help="Session index database for --backend index (default: <Session Harbor data dir>/session-index.sqlite)",
+    )
+    parser.add_argument(
+        "--index-max-age",
+        type=float,
+        default=600.0,
+        help="Skip refreshing the index if it was fully refreshed within this many seconds (default: 600)",
+    )
+    parser.add_argument(
+        "--archive-chunk-size",
+        type=int,
+        default=0,
+        help="Sessions per status-file update when archiving in bulk (default: 0, one write for all)",
+    )
+    parser.add_argument(
+        "--archive-each",
+        action="store_true",
+        help="Archive with one session-status call per session (CLI builds without session-status-bulk)",
+    )
+    parser.add_argument(
+        "--no-pushdown",
+        action="store_true",
+        help="Filter by cutoff and message count here, not in the listing (CLI builds without before/maxMessages)",
+    )
+    parser.add_argument(
+        "--verify-pushdown",
+        action="store_true",
+        help="Also list without pushdown and fail (archiving nothing) unless both give the same candidates",
+    )
+    parser.add_argument("--limit", type=int, default=200, help="Page size for session-list (paged backend)")
     parser.add_argument("--sample", type=int, default=10, help="How many IDs to print in dry-run")
+    parser.add_argument(
+        "--rules",
+        default=boilerplate_rules.DEFAULT_RULES,
+        help="Boilerplate rules config (default: boilerplate_rules.json next to this script)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=DEFAULT_CACHE,
+        help=f"Verdict cache, so unchanged sessions are not re-read on the next run (default: {DEFAULT_CACHE})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Classify every session from scratch")
+    parser.add_argument("--jobs", type=int, default=1, help="Sessions inspected concurrently (default: 1)")
+    parser.add_argument(
+        "--progress",
+        type=float,
+        nargs="?",
+        const=2.0,
+        default=None,
+        metavar="SECONDS",
+        help="Print progress and throughput to stderr every SECONDS (default: 2)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Add per-phase and slowest-session timings (wall time, calls, bytes) to the summary",
+    )
+    parser.add_argument("--profile-top", type=int, default=10, help="Slowest sessions listed with --profile (default: 10)")
+    parser.add_argument(
+        "--profile-dump",
+        default=None,
+        metavar="PATH",
+        help="Also write cProfile stats of the main thread to PATH (read with python3 -m pstats); implies --profile",
+    )
     return parser.parse_args()
 
 
+class Profile:
+    """Wall time, call counts and bytes per phase, and per session, for --profile.
+
+    Phases: list (session-list pages), export (waiting on session-export output), read (session files read
+    by --backend native), index (refresh and query of the session index), show (session-show), decode
+    (JSON decoding of CLI output), classify, cache (verdict cache load and save) and archive. Time spent
+    in a phase on behalf of a session is also added to that session. Disabled, every call is a no-op.
+    """
+
+    _NULL = contextlib.nullcontext()
+    # A session's "bytes" are what was read for it; decode re-counts the same bytes.
+    _READ_PHASES = ("list", "export", "read", "show")
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.started = time.perf_counter()
+
+    def add(self, phase: str, started: float, nbytes: int = 0, key: Optional[str] = None) -> None:
+        """Charge the time since `started` (a perf_counter() value) to `phase`; see charge()."""
+        if self.enabled:
+            self.charge(phase, time.perf_counter() - started, nbytes, key)
+
+    def charge(self, phase: str, elapsed: float, nbytes: int = 0, key: Optional[str] = None) -> None:
+        """Add one call to `phase`, also charged to session `key` or else the one inspected on this thread."""
+        if not self.enabled:
+            return
+        entry = self.sessions.get(key) if key is not None else getattr(self.local, "session", None)
+        with self.lock:
+            totals = self.phases.setdefault(phase, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += elapsed
+            totals[2] += nbytes
+            if entry is not None:
+                entry["seconds"] += elapsed
+                if phase in self._READ_PHASES:
+                    entry["bytes"] += nbytes
+                entry["phases"][phase] = entry["phases"].get(phase, 0.0) + elapsed
+
+    def listed(self, session: Dict[str, Any]) -> Optional[str]:
+        """Start the per-session entry for a listed session; returns its key for add()."""
+        if not self.enabled:
+            return None
+        key = str(session.get("relPath") or session.get("id"))
+        with self.lock:
+            self.sessions.setdefault(
+                key, {"id": session.get("id"), "relPath": session.get("relPath"), "seconds": 0.0, "bytes": 0, "phases": {}}
+            )
+        return key
+
+    def session(self, session: Dict[str, Any]) -> Any:
+        """Context in which add() calls on this thread are charged to `session`."""
+        if not self.enabled:
+            return self._NULL
+        return self._session(self.sessions[self.listed(session) or ""])
+
+    @contextlib.contextmanager
+    def _session(self, entry: Dict[str, Any]) -> Iterator[None]:
+        self.local.session = entry
+        try:
+            yield
+        finally:
+            self.local.session = None
+
+    def summary(self, top: int) -> Dict[str, Any]:
+        slowest = sorted(self.sessions.values(), key=lambda entry: entry["seconds"], reverse=True)[:top]
+        return {
+            "wall_seconds": round(time.perf_counter() - self.started, 3),
+            # Summed over threads, so with --jobs > 1 phases can add up to more than the wall time.
+            "phases": {
+                name: {"calls": int(calls), "seconds": round(seconds, 3), "bytes": int(nbytes)}
+                for name, (calls, seconds, nbytes) in sorted(self.phases.items(), key=lambda item: -item[1][1])
+            },
+            "sessions": len(self.sessions),
+            "slowest": [
+                dict(entry, seconds=round(entry["seconds"], 4), phases={k: round(v, 4) for k, v in entry["phases"].items()})
+                for entry in slowest
+            ],
+        }
+
+
+PROFILE = Profile()
+
+
 def to_utc(dt: datetime.datetime) -> datetime.datetime:
     if dt.tzinfo is None:
         return dt.replace(tzinfo=datetime.timezone.utc)
@@ -41,25 +216,16 @@ def parse_iso(ts: str) -> datetime.datetime:
     return datetime.datetime.fromisoformat(ts.replace("Z", "+00:00"))
 
 
-def is_boilerplate(text: str) -> bool:
-    if text is None:
-        return True
-    t = text.strip()
-    if t == "" or t == ".":
-        return True
-    for marker in BOILERPLATE_MARKERS:
-        if marker in t:
-            return True
-    return False
-
-
-def parse_messages(content: Any) -> List[Dict[str, Any]]:
+def iter_messages(content: Any) -> Iterator[Dict[str, Any]]:
+    """Yield message dicts from a parsed list or a JSONL string, decoding lines only as they are consumed."""
     if content is None:
-        return []
+        return
     if isinstance(content, list):
-        return [m for m in content if isinstance(m, dict)]
+        for m in content:
+            if isinstance(m, dict):
+                yield m
+        return
     if isinstance(content, str):
-        msgs = []
         for line in content.splitlines():
             line = line.strip()
             if not line:
@@ -69,46 +235,68 @@ def parse_messages(content: Any) -> List[Dict[str, Any]]:
             except json.JSONDecodeError:
                 continue
             if isinstance(obj, dict):
-                msgs.append(obj)
-        return msgs
-    return []
-
-
-def count_user_messages(messages: Iterable[Dict[str, Any]]) -> int:
-    count = 0
-    for msg in messages:
-        if msg.get("role") != "user":
-            continue
-        text = msg.get("text")
-        if text is None:
-            text = msg.get("content")
-        if text is None:
-            continue
-        if not is_boilerplate(text):
-            count += 1
-    return count
+                yield obj
 
 
-def has_meaningful_text(messages: Iterable[Dict[str, Any]]) -> bool:
+def message_text(msg: Dict[str, Any]) -> Optional[str]:
+    text = msg.get("text")
+    if text is None:
+        text = msg.get("content")
+    return text
+
+
+def classify_messages(
+    messages: Iterable[Dict[str, Any]],
+    max_user_messages: int,
+    rules: boilerplate_rules.RuleSet,
+    hits: Optional[Dict[str, int]] = None,
+) -> Tuple[int, bool, bool]:
+    """Return (user_count, meaningful, low_signal) from a single pass over `messages`.
+
+    Stops at the first meaningful user/assistant message or once user_count exceeds max_user_messages,
+    so user_count is only exact for low-signal sessions. Boilerplate messages are counted per rule in `hits`.
+    """
+    user_count = 0
     for msg in messages:
         role = msg.get("role")
         if role not in ("user", "assistant"):
             continue
-        text = msg.get("text")
-        if text is None:
-            text = msg.get("content")
-        if text is None:
+        text = message_text(msg)
+        t = text.strip() if text is not None else ""
+        rule = rules.match(t)
+        if rule is not None:
+            if hits is not None:
+                hits[rule] = hits.get(rule, 0) + 1
             continue
-        if not is_boilerplate(text) and len(text.strip()) >= 5:
-            return True
-    return False
-
-
-def list_sessions(limit: int, include_archived: bool, source: str) -> List[Dict[str, Any]]:
+        if len(t) >= 5:
+            if role == "user":
+                user_count += 1
+            return user_count, True, False
+        if role == "user":
+            user_count += 1
+            if user_count > max_user_messages:
+                return user_count, False, False
+    return user_count, False, True
+
+
+def pushdown_filters(args: argparse.Namespace, cutoff: datetime.datetime) -> Dict[str, Any]:
+    """session-list/session-export inputs that let the CLI drop too-new or too-long sessions itself."""
+    if args.no_pushdown:
+        return {}
+    filters: Dict[str, Any] = {"before": cutoff.isoformat()}
+    if args.max_total_messages is not None:
+        filters["maxMessages"] = args.max_total_messages
+    return filters
+
+
+def list_sessions(
+    limit: int, include_archived: bool, source: str, filters: Optional[Dict[str, Any]] = None
+) -> Iterator[Dict[str, Any]]:
+    # Pages are yielded as they arrive, so inspection starts with the first page rather than the last.
     offset = 0
-    sessions: List[Dict[str, Any]] = []
+    seen = 0
     total = None
-    while total is None or len(sessions) < total:
+    while total is None or seen < total:
         cmd = [
             "session-harbor",
             "session-list",
@@ -116,36 +304,499 @@ def list_sessions(limit: int, include_archived: bool, source: str) -> List[Dict[
             f"offset={offset}",
             f"includeArchived={'true' if include_archived else 'false'}",
             f"source={source}",
+            *(f"{key}={value}" for key, value in (filters or {}).items()),
         ]
+        started = time.perf_counter()
         raw = subprocess.check_output(cmd)
+        PROFILE.add("list", started, len(raw))
+        started = time.perf_counter()
         data = json.loads(raw)
-        total = data.get("total", len(data.get("sessions", [])))
-        sessions.extend(data.get("sessions", []))
+        PROFILE.add("decode", started, len(raw))
+        page = data.get("sessions", [])
+        total = data.get("total", len(page))
+        if not page:
+            break
+        seen += len(page)
+        yield from page
         offset += limit
-    return sessions
 
 
-def show_session(session_id: str) -> Dict[str, Any]:
+def show_session(session_id: str, source: str) -> Dict[str, Any]:
+    started = time.perf_counter()
     raw = subprocess.check_output([
         "session-harbor",
         "session-show",
         f"sessionId={session_id}",
         "includeMessages=true",
+        f"source={source}",
     ])
-    return json.loads(raw)
+    PROFILE.add("show", started, len(raw))
+    started = time.perf_counter()
+    data = json.loads(raw)
+    PROFILE.add("decode", started, len(raw))
+    return data
+
+
+def export_sessions(
+    include_archived: bool,
+    source: str,
+    filters: Optional[Dict[str, Any]] = None,
+    known: Optional[Dict[str, str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Records from one streaming session-export; sessions in `known` (relPath -> "size:mtime_ns") whose
+    file is unchanged come back as {"relPath", "unchanged": true} without the CLI reading them."""
+    # One CLI process reads every session once and streams {"session": ..., "messages": [...]} per line,
+    # so records are classified while later sessions are still being read.
+    payload: Dict[str, Any] = {"source": source, "includeArchived": include_archived, **(filters or {})}
+    if known:
+        payload["known"] = known
+    cmd = ["session-harbor", "session-export"]
+    # The known-session map can be large, so the input goes in as JSON on stdin.
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    assert proc.stdin is not None and proc.stdout is not None
+    try:
+        proc.stdin.write(json.dumps(payload).encode("utf-8"))
+    finally:
+        proc.stdin.close()
+    try:
+        while True:
+            started = time.perf_counter()
+            line = proc.stdout.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            waited = time.perf_counter() - started
+            started = time.perf_counter()
+            record = json.loads(line)
+            if PROFILE.enabled:
+                key = PROFILE.listed(record.get("session") or {"relPath": record.get("relPath")})
+                PROFILE.charge("export", waited, len(line), key=key)
+                PROFILE.add("decode", started, len(line), key=key)
+            yield record
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+
+Verdict = Tuple[int, bool, bool]
+
+
+class VerdictCache:
+    """classify_messages() results from earlier runs, keyed by `source:relPath` and valid for one size and mtime.
+
+    The whole cache is tied to the classifier parameters and boilerplate rules; changing either starts
+    over. Entries also keep the file-derived record fields, so the native backend can skip the file.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, path: str, max_user_messages: int, rules: boilerplate_rules.RuleSet, need_counts: bool = False
+    ) -> None:
+        self.path = path
+        # --backend native only counts a session's messages when --max-total-messages needs them; entries
+        # saved without a count cannot stand in for a read when it does.
+        self.need_counts = need_counts
+        self.fingerprint = hashlib.sha256(
+            json.dumps(
+                {
+                    "classifier": CLASSIFIER_VERSION,
+                    "max_user_messages": max_user_messages,
+                    "rules": rules.fingerprint,
+                },
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.seen: set = set()
+        self.hits = 0
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == self.VERSION and data.get("fingerprint") == self.fingerprint:
+            self.entries = data.get("entries") or {}
+
+    @staticmethod
+    def signature(source: str, rel_path: str, st: Optional[os.stat_result] = None) -> Optional[List[int]]:
+        if st is None:
+            try:
+                st = os.stat(os.path.join(session_reader.SOURCE_DIRS[source], rel_path))
+            except (OSError, KeyError):
+                return None
+        return VerdictCache.stat_signature(st)
+
+    @staticmethod
+    def stat_signature(st: os.stat_result) -> List[int]:
+        return [st.st_size, st.st_mtime_ns]
+
+    def lookup(self, source: str, rel_path: str, sig: Optional[List[int]]) -> Optional[Dict[str, Any]]:
+        key = f"{source}:{rel_path}"
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        if sig is None or entry is None or entry.get("sig") != sig:
+            return None
+        return entry
+
+    def verdict(self, source: str, rel_path: str, sig: Optional[List[int]]) -> Optional[Verdict]:
+        entry = self.lookup(source, rel_path, sig)
+        if entry is None or entry.get("verdict") is None:
+            return None
+        with self.lock:
+            self.hits += 1
+        user_count, meaningful, low_signal = entry["verdict"]
+        return user_count, meaningful, low_signal
+
+    def reusable(self, entry: Optional[Dict[str, Any]]) -> bool:
+        if entry is None or entry.get("verdict") is None:
+            return False
+        return not self.need_counts or (entry.get("fields") or {}).get("messageCount") is not None
+
+    def reuse(self, source: str, rel_path: str, st: os.stat_result) -> Optional[Dict[str, Any]]:
+        # session_reader hook: only sessions with a cached verdict can go without reading their file.
+        entry = self.lookup(source, rel_path, self.signature(source, rel_path, st))
+        return entry.get("fields") if entry is not None and self.reusable(entry) else None
+
+    def known(self, source: str) -> Dict[str, str]:
+        """relPath -> "size:mtime_ns" of every session with a verdict, for session-export's `known`."""
+        prefix = f"{source}:"
+        return {
+            key[len(prefix):]: f"{entry['sig'][0]}:{entry['sig'][1]}"
+            for key, entry in self.entries.items()
+            if key.startswith(prefix) and self.reusable(entry) and entry.get("sig")
+        }
+
+    def unchanged(self, source: str, rel_path: str) -> Tuple[Dict[str, Any], List[int]]:
+        """Saved record fields and signature of a session session-export reported as unchanged."""
+        entry = self.entries[f"{source}:{rel_path}"]
+        return entry.get("fields") or {}, entry["sig"]
+
+    def store(self, source: str, session: Dict[str, Any], sig: Optional[List[int]], verdict: Verdict) -> None:
+        if sig is None:
+            return
+        fields = {k: session[k] for k in ("id", "timestamp", "cwd", "project", "fileName", "messageCount") if k in session}
+        with self.lock:
+            self.entries[f"{source}:{session['relPath']}"] = {"sig": sig, "fields": fields, "verdict": list(verdict)}
+
+    def evict(self, source: str, rel_paths: Iterable[str]) -> None:
+        with self.lock:
+            for rel_path in rel_paths:
+                self.entries.pop(f"{source}:{rel_path}", None)
+
+    def save(self, source: str) -> None:
+        # Sessions of this source that were not listed this run were deleted or archived.
+        prefix = f"{source}:"
+        entries = {k: v for k, v in self.entries.items() if not k.startswith(prefix) or k in self.seen}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "fingerprint": self.fingerprint, "entries": entries}, f)
+        os.replace(tmp, self.path)
+
+
+def load_session_index() -> Any:
+    # session_index.py ships with the app in backend/scripts, not with this skill; look for it there.
+    scripts_dir = os.path.join(session_reader.resolve_app_root(), "backend", "scripts")
+    if scripts_dir not in sys.path and os.path.isfile(os.path.join(scripts_dir, "session_index.py")):
+        sys.path.append(scripts_dir)
+    import session_index
+
+    return session_index
+
+
+def index_sessions(
+    args: argparse.Namespace, cutoff: datetime.datetime, rules: boilerplate_rules.RuleSet
+) -> Iterator[Dict[str, Any]]:
+    """Low-signal sessions straight from the SQLite index, refreshed first unless it is recent."""
+    session_index = load_session_index()
+    path = args.index or os.path.join(session_reader.data_dir(), "session-index.sqlite")
+    started = time.perf_counter()
+    # main() has checked that the rules can be expressed as index markers.
+    db = session_index.SessionIndexDB(path, markers=rules.index_markers(), roots=session_reader.SOURCE_DIRS)
+    try:
+        refreshed = db.last_full_refresh(args.source)
+        if refreshed is None or time.time() - refreshed > args.index_max_age:
+            db.refresh(args.source)
+        rows = db.low_signal(args.source, cutoff.timestamp(), args.max_user_messages, args.max_total_messages)
+    finally:
+        db.close()
+        PROFILE.add("index", started)
+    state = session_reader.SessionState()
+    for row in rows:
+        if not args.include_archived and state.status(args.source, row["rel_path"]) == "archived":
+            continue
+        yield state.record(args.source, row["rel_path"], session_index.record_fields(row))
+
+
+Listed = Tuple[Dict[str, Any], Optional[Iterable[Dict[str, Any]]], Optional[List[int]]]
+
+
+def iter_sessions(
+    args: argparse.Namespace,
+    cutoff: datetime.datetime,
+    rules: boilerplate_rules.RuleSet,
+    cache: Optional[VerdictCache] = None,
+) -> Iterator[Listed]:
+    """Yield (session, messages, sig); messages is None when they still have to be fetched (or are cached),
+    and sig is the verdict-cache signature when the backend already took it (else inspect_session() does).
+
+    With the cache, unchanged sessions are not read at all by --backend export (the CLI gets their
+    signatures as `known`) or --backend native; --backend paged only saves their session-show.
+
+    The cutoff and --max-total-messages are pushed down to whichever backend lists the sessions, so
+    too-new sessions (and, for Codex, whole date directories) are never read. inspect_session() still
+    checks both, which keeps the result the same when a backend cannot filter.
+    """
+    if args.backend == "export":
+        known = cache.known(args.source) if cache is not None else None
+        state = session_reader.SessionState() if known else None
+        for record in export_sessions(args.include_archived, args.source, pushdown_filters(args, cutoff), known):
+            if record.get("unchanged") and cache is not None and state is not None:
+                fields, sig = cache.unchanged(args.source, record["relPath"])
+                yield state.record(args.source, record["relPath"], fields), None, sig
+                continue
+            yield record["session"], iter_messages(record.get("messages")), None
+        return
+    if args.backend == "native":
+        reuse = cache.reuse if cache is not None else None
+        records = session_reader.iter_sessions(
+            args.source,
+            include_archived=args.include_archived,
+            reuse=reuse,
+            before=None if args.no_pushdown else cutoff.timestamp(),
+            max_messages=None if args.no_pushdown else args.max_total_messages,
+            # Messages are only counted when --max-total-messages needs them; otherwise each file is decoded
+            # lazily and classify_messages() stops reading it once the verdict is decided.
+            count_messages=args.max_total_messages is not None,
+        )
+        while True:
+            started = time.perf_counter()
+            record = next(records, None)
+            if record is None:
+                break
+            if PROFILE.enabled:
+                # Reused (cached) sessions were only stat()ed, not read; lazily read ones are read (and charged
+                # to classify) as they are classified.
+                path = os.path.join(session_reader.SOURCE_DIRS[args.source], record["session"]["relPath"])
+                eager = record["messages"] is not None and record["session"]["messageCount"] is not None
+                nbytes = os.path.getsize(path) if eager else 0
+                PROFILE.add("read", started, nbytes, key=PROFILE.listed(record["session"]))
+            st = record.get("stat")
+            yield record["session"], record["messages"], VerdictCache.stat_signature(st) if st else None
+        return
+    if args.backend == "index":
+        # The index query already applied the message heuristics; only the metadata checks are left.
+        for session in index_sessions(args, cutoff, rules):
+            yield session, (), None
+        return
+    for session in list_sessions(args.limit, args.include_archived, args.source, pushdown_filters(args, cutoff)):
+        PROFILE.listed(session)
+        yield session, None, None
 
 
 def archive_session(session_id: str) -> None:
-    subprocess.check_output([
-        "session-harbor",
-        "session-status",
-        f"sessionId={session_id}",
-        "status=archived",
+    started = time.perf_counter()
+    try:
+        subprocess.check_output([
+            "session-harbor",
+            "session-status",
+            f"sessionId={session_id}",
+            "status=archived",
+        ])
+    finally:
+        PROFILE.add("archive", started)
+
+
+Candidate = Tuple[Dict[str, Any], int, bool]
+
+
+def inspect_session(
+    s: Dict[str, Any],
+    messages: Optional[Iterable[Dict[str, Any]]],
+    args: argparse.Namespace,
+    cutoff: datetime.datetime,
+    rules: boilerplate_rules.RuleSet,
+    cache: Optional[VerdictCache] = None,
+    sig: Optional[List[int]] = None,
+) -> Optional[Candidate]:
+    with PROFILE.session(s):
+        ts = parse_iso(s["timestamp"])
+        if ts >= cutoff:
+            return None
+        if args.max_total_messages is not None:
+            if s.get("messageCount", 0) > args.max_total_messages:
+                return None
+        if s.get("name") or s.get("tags") or s.get("notes"):
+            return None
+        verdict = None
+        if cache is not None:
+            # The signature is taken before reading (by the backend where it reads the file), so a session
+            # appended to mid-read is re-read next run, and a reused session is looked up under the stat
+            # it was reused for.
+            if sig is None:
+                sig = cache.signature(args.source, s["relPath"])
+            verdict = cache.verdict(args.source, s["relPath"], sig)
+        if verdict is None:
+            if messages is None:
+                data = show_session(s["id"], args.source)
+                # session-show returns parsed messages next to the raw JSONL `content`; only the parsed
+                # messages carry roles and text.
+                messages = iter_messages(data.get("messages", data.get("content")))
+            hits: Dict[str, int] = {}
+            started = time.perf_counter()
+            verdict = classify_messages(messages, args.max_user_messages, rules, hits)
+            PROFILE.add("classify", started)
+            rules.record(hits, verdict[2])
+            if cache is not None:
+                cache.store(args.source, s, sig, verdict)
+        user_count, meaningful, low_signal = verdict
+        if low_signal:
+            return s, user_count, meaningful
+        return None
+
+
+class Progress:
+    """Inspection counters, reported on stderr at most every `interval` seconds (never when None)."""
+
+    def __init__(self, interval: Optional[float]) -> None:
+        self.interval = interval
+        self.started = time.monotonic()
+        self.last = self.started
+        self.inspected = 0
+        self.candidates = 0
+        self.errors = 0
+
+    def update(self, candidate: bool = False, error: bool = False) -> None:
+        self.inspected += 1
+        self.candidates += int(candidate)
+        self.errors += int(error)
+        if self.interval is not None and time.monotonic() - self.last >= self.interval:
+            self.report()
+
+    def report(self) -> None:
+        self.last = time.monotonic()
+        elapsed = max(self.last - self.started, 1e-9)
+        print(
+            f"inspected {self.inspected} sessions in {elapsed:.1f}s ({self.inspected / elapsed:.1f}/s), "
+            f"{self.candidates} candidates, {self.errors} errors",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def inspect_sessions(
+    args: argparse.Namespace,
+    cutoff: datetime.datetime,
+    progress: Progress,
+    rules: boilerplate_rules.RuleSet,
+    cache: Optional[VerdictCache] = None,
+) -> Tuple[List[Candidate], List[Tuple[str, str]]]:
+    """Inspect every session, `args.jobs` at a time; candidates keep the order sessions were listed in."""
+    candidates: List[Candidate] = []
+    errors: List[Tuple[str, str]] = []
+
+    def collect(s: Dict[str, Any], result: Callable[[], Optional[Candidate]]) -> None:
+        # One failing session (bad timestamp, session-show error) is reported and skipped, not fatal.
+        try:
+            candidate = result()
+        except Exception as exc:
+            errors.append((str(s.get("id")), f"{type(exc).__name__}: {exc}"))
+            progress.update(error=True)
+            return
+        if candidate is not None:
+            candidates.append(candidate)
+        progress.update(candidate=candidate is not None)
+
+    if args.jobs <= 1:
+        for s, messages, sig in iter_sessions(args, cutoff, rules, cache):
+            collect(s, lambda: inspect_session(s, messages, args, cutoff, rules, cache, sig))
+        return candidates, errors
+
+    # Sessions are submitted as they stream in, with at most 2 * jobs in flight, and collected
+    # from the front of the queue so the output order does not depend on scheduling.
+    pending: Deque[Tuple[Dict[str, Any], concurrent.futures.Future]] = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for s, messages, sig in iter_sessions(args, cutoff, rules, cache):
+            pending.append((s, pool.submit(inspect_session, s, messages, args, cutoff, rules, cache, sig)))
+            while len(pending) >= 2 * args.jobs:
+                s, future = pending.popleft()
+                collect(s, future.result)
+        while pending:
+            s, future = pending.popleft()
+            collect(s, future.result)
+    return candidates, errors
+
+
+def verify_pushdown(
+    args: argparse.Namespace, cutoff: datetime.datetime, candidates: List[Candidate]
+) -> List[Tuple[str, str]]:
+    """Candidates that differ between this run and one filtering in the script, as (relPath, which side)."""
+    baseline = argparse.Namespace(**vars(args))
+    baseline.no_pushdown = True
+    # A second, uncached and unprofiled pass, so the comparison does not depend on either.
+    enabled, PROFILE.enabled = PROFILE.enabled, False
+    try:
+        expected, _ = inspect_sessions(baseline, cutoff, Progress(None), boilerplate_rules.load_rules(args.rules))
+    finally:
+        PROFILE.enabled = enabled
+    found = {s["relPath"] for s, _, _ in candidates}
+    wanted = {s["relPath"] for s, _, _ in expected}
+    return sorted([(rel_path, "only with pushdown") for rel_path in found - wanted] + [
+        (rel_path, "only without pushdown") for rel_path in wanted - found
     ])
 
 
+def archive_sessions(sessions: List[Dict[str, Any]], source: str, chunk_size: int) -> List[Dict[str, Any]]:
+    """Archive all `sessions` with one session-status-bulk call; returns its per-session outcomes.
+
+    If the call itself fails (no session-harbor on PATH, a non-zero exit, a reply without a "results"
+    list), every session is reported as failed rather than raising, so the caller still saves its cache
+    and reports what happened.
+    """
+    payload: Dict[str, Any] = {
+        "source": source,
+        "status": "archived",
+        "relPaths": [s["relPath"] for s in sessions],
+    }
+    if chunk_size > 0:
+        payload["chunkSize"] = chunk_size
+    # The ID list can be long, so it goes in as JSON on stdin rather than on the command line.
+    data = json.dumps(payload).encode("utf-8")
+    started = time.perf_counter()
+    error = None
+    results: Any = None
+    try:
+        proc = subprocess.run(
+            ["session-harbor", "session-status-bulk"],
+            input=data,
+            stdout=subprocess.PIPE,
+            check=True,
+        )
+        reply = json.loads(proc.stdout)
+        results = reply.get("results") if isinstance(reply, dict) else None
+        if not isinstance(results, list):
+            error = "session-status-bulk failed: reply has no results list"
+    except (OSError, subprocess.CalledProcessError, ValueError) as exc:
+        error = f"session-status-bulk failed: {exc}"
+    PROFILE.add("archive", started, len(data))
+    if error is not None:
+        return [{"relPath": s["relPath"], "ok": False, "error": error} for s in sessions]
+    return [outcome if isinstance(outcome, dict) else {"ok": False, "error": repr(outcome)} for outcome in results]
+
+
 def main() -> None:
     args = parse_args()
+    profiler = cProfile.Profile() if args.profile_dump else None
+    if args.profile or profiler is not None:
+        PROFILE.enable()
+    if profiler is not None:
+        profiler.enable()
     now = datetime.datetime.now(datetime.timezone.utc)
 
     if args.cutoff_date:
@@ -153,31 +804,61 @@ def main() -> None:
     else:
         cutoff = now - datetime.timedelta(days=args.min_age_days)
 
-    sessions = list_sessions(args.limit, args.include_archived, args.source)
-
-    candidates: List[Tuple[Dict[str, Any], int, bool]] = []
-
-    for s in sessions:
-        ts = parse_iso(s["timestamp"])
-        if ts >= cutoff:
-            continue
-        if args.max_total_messages is not None:
-            if s.get("messageCount", 0) > args.max_total_messages:
-                continue
-        data = show_session(s["id"])
-        messages = parse_messages(data.get("content"))
-        user_count = count_user_messages(messages)
-        meaningful = has_meaningful_text(messages)
-        has_meta = bool(s.get("name")) or bool(s.get("tags")) or bool(s.get("notes"))
-
-        if user_count <= args.max_user_messages and not meaningful and not has_meta:
-            candidates.append((s, user_count, meaningful))
+    try:
+        rules = boilerplate_rules.load_rules(args.rules)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"error: --rules: {exc}")
+    if args.backend == "index" and rules.index_markers() is None:
+        raise SystemExit('error: --backend index only supports unwindowed, case-sensitive markers and exact "."')
+
+    # The session index is itself incremental, so the verdict cache is only used for the other backends.
+    started = time.perf_counter()
+    cache = (
+        None if args.no_cache or args.backend == "index" else VerdictCache(
+            args.cache, args.max_user_messages, rules, need_counts=args.max_total_messages is not None
+        )
+    )
+    PROFILE.add("cache", started)
+    progress = Progress(args.progress)
+    candidates, errors = inspect_sessions(args, cutoff, progress, rules, cache)
+    if args.progress is not None:
+        progress.report()
+    for session_id, message in errors:
+        print(f"error: {session_id}: {message}", file=sys.stderr)
+    mismatches = verify_pushdown(args, cutoff, candidates) if args.verify_pushdown and not args.no_pushdown else []
+    for rel_path, side in mismatches:
+        print(f"pushdown mismatch: {rel_path}: {side}", file=sys.stderr)
+    if mismatches:
+        args.apply = False
 
     archived = 0
-    if args.apply:
+    archive_errors: List[Tuple[str, str]] = []
+    if args.apply and args.archive_each:
         for s, _, _ in candidates:
-            archive_session(s["id"])
+            try:
+                archive_session(s["id"])
+            except (OSError, subprocess.CalledProcessError) as exc:
+                archive_errors.append((s["id"], str(exc)))
+                continue
             archived += 1
+    elif args.apply and candidates:
+        for outcome in archive_sessions([s for s, _, _ in candidates], args.source, args.archive_chunk_size):
+            if outcome.get("ok"):
+                archived += 1
+            else:
+                archive_errors.append((outcome.get("relPath") or str(outcome.get("sessionId")), outcome.get("error", "")))
+    for session_id, message in archive_errors:
+        print(f"archive error: {session_id}: {message}", file=sys.stderr)
+    if cache is not None:
+        if args.apply:
+            failed = {session_id for session_id, _ in archive_errors}
+            cache.evict(
+                args.source,
+                (s["relPath"] for s, _, _ in candidates if s["relPath"] not in failed and s["id"] not in failed),
+            )
+        started = time.perf_counter()
+        cache.save(args.source)
+        PROFILE.add("cache", started)
 
     kept = len(candidates) - archived if args.apply else 0
 
@@ -186,13 +867,27 @@ def main() -> None:
         "candidates": len(candidates),
         "archived": archived,
         "kept": kept,
+        "errors": len(errors),
+        "archive_errors": len(archive_errors),
+        "cached": cache.hits if cache is not None else 0,
         "dry_run": not args.apply,
+        # The index stores counts only, not which rule matched.
+        "rule_hits": None if args.backend == "index" else rules.summary(),
     }
+    if args.verify_pushdown:
+        result["pushdown_mismatches"] = len(mismatches)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile_dump)
+    if PROFILE.enabled:
+        result["profile"] = PROFILE.summary(args.profile_top)
     print(json.dumps(result, indent=2))
 
     if not args.apply and candidates:
         sample_ids = [s["id"] for s, _, _ in candidates[: args.sample]]
         print("SAMPLE_IDS=" + ",".join(sample_ids))
+    if mismatches:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,609 @@
+#!/usr/bin/env python3
+"""Read Session Harbor sessions straight from disk, without the Node CLI.
+
+Mirrors clis/session-harbor/src/services/sessions.ts: the same Codex, Claude and Copilot layouts, the same
+session records (with names, tags, notes and status from the Session Harbor data directory) and the same
+message parsing, so records match `session-harbor session-export` line for line.
+"""
+import datetime
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson  # type: ignore
+
+    _loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:  # pragma: no cover - optional speedup
+    _loads = json.loads
+
+SESSION_EXT = ".jsonl"
+SOURCES = ("codex", "claude", "copilot")
+
+
+def source_dirs() -> Dict[str, str]:
+    """Session roots per source, from the same variables Session Harbor's TTS watcher reads (CODEX_HOME,
+    CLAUDE_CONFIG_DIR, CODEX_TTS_CLAUDE_DIR, CODEX_TTS_COPILOT_DIR), so this reader and the session index
+    the watcher feeds look at the same trees."""
+    codex_home = os.environ.get("CODEX_HOME", os.path.join(os.path.expanduser("~"), ".codex"))
+    claude_home = os.environ.get("CLAUDE_CONFIG_DIR") or os.path.join(os.path.expanduser("~"), ".claude")
+    return {
+        "codex": os.path.join(codex_home, "sessions"),
+        "claude": os.environ.get("CODEX_TTS_CLAUDE_DIR") or os.path.join(claude_home, "projects"),
+        "copilot": os.environ.get("CODEX_TTS_COPILOT_DIR")
+        or os.path.join(os.path.expanduser("~"), ".copilot", "session-state"),
+    }
+
+
+SOURCE_DIRS = source_dirs()
+
+# Lines that can hold a message (or count towards messageCount) carry one of these; everything else
+# (tool calls and outputs, reasoning, token counts) is skipped without being parsed.
+_MESSAGE_MARKERS = {
+    "codex": (b'"message"', b"user_message", b"assistant_message"),
+    "claude": (b'"user"', b'"assistant"', b'"summary"'),
+    "copilot": (b"user.message", b"assistant.message"),
+}
+
+# getClaudeProjectInfo() looks for the session cwd in this many leading lines.
+_CLAUDE_META_LINES = 120
+
+_WORKSPACE_LINE = re.compile(r"^\s*([a-z_]+)\s*:\s*(.+)\s*$", re.I)
+
+# Furthest a local date can run ahead of UTC (UTC+14); used when pruning Codex date directories.
+_MAX_UTC_OFFSET = 14 * 60 * 60
+
+
+def _js_falsy(value: Any) -> bool:
+    # JavaScript truthiness: empty objects and arrays are truthy, unlike in Python.
+    if value is None or value is False:
+        return True
+    if isinstance(value, str):
+        return value == ""
+    if isinstance(value, (int, float)):
+        return value == 0 or value != value
+    return False
+
+
+def _or(*values: Any) -> Any:
+    for value in values:
+        if not _js_falsy(value):
+            return value
+    return values[-1]
+
+
+def _js_stringify(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _iso_from_mtime(mtime: float) -> str:
+    dt = datetime.datetime.fromtimestamp(mtime, tz=datetime.timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def resolve_app_root() -> str:
+    if os.environ.get("SESSION_HARBOR_APP_ROOT"):
+        return os.environ["SESSION_HARBOR_APP_ROOT"]
+    cwd = os.getcwd()
+    current = cwd
+    for _ in range(6):
+        candidate = os.path.join(current, "package.json")
+        if os.path.exists(candidate):
+            try:
+                with open(candidate, "r", encoding="utf-8") as f:
+                    if json.load(f).get("name") == "session-harbor":
+                        return current
+            except Exception:
+                pass
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    return cwd
+
+
+def data_dir() -> str:
+    return os.environ.get("SESSION_HARBOR_DATA_DIR") or os.path.join(resolve_app_root(), "data")
+
+
+def _load_json_object(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "rb") as f:
+            parsed = json.loads(f.read())
+    except Exception:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def normalize_status(value: Any) -> str:
+    value = value.lower() if isinstance(value, str) else ""
+    return value if value in ("complete", "archived") else "active"
+
+
+class SessionState:
+    """Names, tags/notes and statuses from the Session Harbor data directory, keyed `source:relPath`."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        directory = directory or data_dir()
+        self.names = _load_json_object(os.path.join(directory, "session-names.json"))
+        self.statuses = _load_json_object(os.path.join(directory, "session-status.json"))
+        self.meta = _load_json_object(os.path.join(directory, "session-meta.json"))
+
+    def status(self, source: str, rel_path: str) -> str:
+        entry = self.statuses.get(f"{source}:{rel_path}")
+        return normalize_status(entry.get("status") if isinstance(entry, dict) else None)
+
+    def record(self, source: str, rel_path: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        key = f"{source}:{rel_path}"
+        meta = self.meta.get(key)
+        meta = meta if isinstance(meta, dict) else {}
+        record = dict(fields)
+        record.update(
+            {
+                "relPath": rel_path,
+                "name": self.names.get(key) or "",
+                "status": self.status(source, rel_path),
+                "tags": meta["tags"] if isinstance(meta.get("tags"), list) else [],
+                "notes": meta["notes"] if isinstance(meta.get("notes"), str) else "",
+            }
+        )
+        return record
+
+
+def list_session_files(root: str, skip_dir: Optional[Callable[[str], bool]] = None) -> Iterator[str]:
+    """Yield session files depth-first, in directory order, as they are found."""
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    if entry.name.lower() == "archive" or (skip_dir is not None and skip_dir(entry.path)):
+                        continue
+                    yield from list_session_files(entry.path, skip_dir)
+                elif entry.is_file() and entry.name.endswith(SESSION_EXT):
+                    yield entry.path
+            except OSError:
+                continue
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """Epoch seconds for an ISO timestamp, or None when there is none to parse (like a NaN Date.parse)."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        # fromisoformat() only accepts a "Z" suffix from Python 3.11 on.
+        dt = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+
+def starts_before(timestamp: Any, before: Optional[float]) -> bool:
+    # With a cutoff, sessions without a usable timestamp are never old enough.
+    if before is None:
+        return True
+    time = parse_time(timestamp)
+    return time is not None and time < before
+
+
+def codex_dir_after(root: str, path: str, before: float) -> bool:
+    """Whether every session under a Codex YYYY[/MM[/DD]] directory started at or after `before`.
+
+    The directories are named by local start date, so a day only counts as after the cutoff when its
+    midnight in the furthest-ahead time zone already is.
+    """
+    parts = os.path.relpath(path, root).split(os.sep)
+    if len(parts) > 3 or not all(part.isdigit() for part in parts):
+        return False
+    year, month, day = (int(part) for part in parts + ["1"] * (3 - len(parts)))
+    try:
+        start = datetime.datetime(year, month, day, tzinfo=datetime.timezone.utc).timestamp()
+    except ValueError:
+        return False
+    return start - _MAX_UTC_OFFSET >= before
+
+
+def list_copilot_event_files(root: str) -> List[str]:
+    files: List[str] = []
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return files
+    with it:
+        for entry in it:
+            if entry.name.lower() == "archive" or not entry.is_dir():
+                continue
+            events = os.path.join(entry.path, "events.jsonl")
+            if os.path.isfile(events):
+                files.append(events)
+    return files
+
+
+def _parse(raw: bytes) -> Any:
+    try:
+        return _loads(raw)
+    except Exception:
+        return None
+
+
+def normalize_message_content(content: Any) -> str:
+    if _js_falsy(content):
+        return ""
+    if isinstance(content, str):
+        return content
+    if not isinstance(content, list):
+        return _js_stringify(content)
+    parts: List[str] = []
+    for item in content:
+        if _js_falsy(item):
+            continue
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, dict) and isinstance(item.get("text"), str):
+            parts.append(item["text"])
+        else:
+            parts.append(_js_stringify(item))
+    return "\n".join(parts)
+
+
+def _message(role: Any, entry: Dict[str, Any], text: str) -> Dict[str, Any]:
+    return {"role": role, "timestamp": _or(entry.get("timestamp"), None), "text": text}
+
+
+def codex_entry_to_message(entry: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(entry, dict):
+        return None
+    payload = entry.get("payload")
+    if entry.get("type") == "event_msg":
+        payload = payload if isinstance(payload, dict) else {}
+        kind = payload.get("type")
+        if kind not in ("user_message", "assistant_message"):
+            return None
+        text = str(_or(payload.get("message"), "")).strip()
+        return _message("assistant" if kind == "assistant_message" else "user", entry, text) if text else None
+    if entry.get("type") != "response_item" or not isinstance(payload, dict) or payload.get("type") != "message":
+        return None
+    text = normalize_message_content(payload.get("content")).strip()
+    return _message(_or(payload.get("role"), "unknown"), entry, text) if text else None
+
+
+def claude_entry_to_message(entry: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(entry, dict) or _js_falsy(entry.get("type")):
+        return None
+    kind = entry.get("type")
+    if kind == "summary" and not _js_falsy(entry.get("summary")):
+        summary = entry["summary"]
+        return _message("summary", entry, summary if isinstance(summary, str) else _js_stringify(summary))
+    if kind not in ("user", "assistant"):
+        return None
+    message = entry.get("message")
+    message = message if isinstance(message, dict) else {}
+    text = normalize_message_content(message.get("content")).strip()
+    return _message(_or(message.get("role"), kind, "unknown"), entry, text) if text else None
+
+
+def copilot_entry_to_message(entry: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(entry, dict) or entry.get("type") not in ("user.message", "assistant.message"):
+        return None
+    data = entry.get("data")
+    data = data if isinstance(data, dict) else {}
+    text = str(_or(data.get("content"), data.get("transformedContent"), "")).strip()
+    role = "user" if entry["type"] == "user.message" else "assistant"
+    return _message(role, entry, text) if text else None
+
+
+def is_codex_message_entry(entry: Any) -> bool:
+    if not isinstance(entry, dict):
+        return False
+    payload = entry.get("payload")
+    kind = payload.get("type") if isinstance(payload, dict) else None
+    if entry.get("type") == "response_item":
+        return kind == "message"
+    return entry.get("type") == "event_msg" and kind in ("user_message", "assistant_message")
+
+
+def is_claude_message_entry(entry: Any) -> bool:
+    return isinstance(entry, dict) and entry.get("type") in ("user", "assistant")
+
+
+def is_copilot_message_entry(entry: Any) -> bool:
+    return isinstance(entry, dict) and entry.get("type") in ("user.message", "assistant.message")
+
+
+_ENTRY_HANDLERS = {
+    "codex": (is_codex_message_entry, codex_entry_to_message),
+    "claude": (is_claude_message_entry, claude_entry_to_message),
+    "copilot": (is_copilot_message_entry, copilot_entry_to_message),
+}
+
+
+def _scan_messages(
+    source: str, lines: Iterator[bytes], include_messages: bool
+) -> Tuple[int, List[Dict[str, Any]]]:
+    is_message, to_message = _ENTRY_HANDLERS[source]
+    markers = _MESSAGE_MARKERS[source]
+    count = 0
+    messages: List[Dict[str, Any]] = []
+    for raw in lines:
+        if not any(marker in raw for marker in markers):
+            continue
+        entry = _parse(raw)
+        if entry is None:
+            continue
+        if is_message(entry):
+            count += 1
+        if include_messages:
+            message = to_message(entry)
+            if message is not None:
+                messages.append(message)
+    return count, messages
+
+
+def _lazy_messages(source: str, path: str, offset: int) -> Iterator[Dict[str, Any]]:
+    """Messages of `path` from byte `offset` on, each line decoded only when the next message is wanted."""
+    to_message = _ENTRY_HANDLERS[source][1]
+    markers = _MESSAGE_MARKERS[source]
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not any(marker in raw for marker in markers):
+                continue
+            message = to_message(_parse(raw))
+            if message is not None:
+                yield message
+
+
+def _read_messages(
+    source: str, path: str, f: Any, offset: int, include_messages: bool, count_messages: bool, lines: Any = None
+) -> Tuple[Optional[int], Any]:
+    """(messageCount, messages) for an open session file positioned at `offset`. Without `count_messages`,
+    the count is None and the messages (if wanted) are a lazy iterator that reopens the file, so a caller
+    that stops early never decodes the rest."""
+    if count_messages:
+        return _scan_messages(source, f if lines is None else lines, include_messages)
+    return None, _lazy_messages(source, path, offset) if include_messages else []
+
+
+def read_codex_session(
+    path: str,
+    state: SessionState,
+    include_messages: bool = True,
+    before: Optional[float] = None,
+    count_messages: bool = True,
+) -> Optional[Dict[str, Any]]:
+    root = SOURCE_DIRS["codex"]
+    with open(path, "rb") as f:
+        header = None
+        offset = 0
+        for raw in f:
+            offset += len(raw)
+            if raw.strip():
+                header = _parse(raw)
+                break
+        if (
+            not isinstance(header, dict)
+            or header.get("type") != "session_meta"
+            or _js_falsy(header.get("payload"))
+            or not isinstance(header["payload"], dict)
+        ):
+            return None
+        # The header alone decides the cutoff, so newer sessions are dropped after their first line.
+        if not starts_before(_or(header["payload"].get("timestamp"), header.get("timestamp")), before):
+            return None
+        count, messages = _read_messages("codex", path, f, offset, include_messages, count_messages)
+    payload = header["payload"]
+    rel_path = os.path.relpath(path, root)
+    session = state.record(
+        "codex",
+        rel_path,
+        {
+            "id": _or(payload.get("id"), None),
+            "timestamp": _or(payload.get("timestamp"), header.get("timestamp"), None),
+            "cwd": _or(payload.get("cwd"), None),
+            "fileName": os.path.basename(path),
+            "messageCount": count,
+        },
+    )
+    return {"source": "codex", "session": session, "messages": messages}
+
+
+def read_claude_session(
+    path: str,
+    state: SessionState,
+    include_messages: bool = True,
+    before: Optional[float] = None,
+    count_messages: bool = True,
+) -> Optional[Dict[str, Any]]:
+    root = SOURCE_DIRS["claude"]
+    st = os.stat(path)
+    if before is not None and st.st_mtime >= before:
+        return None
+    rel_path = os.path.relpath(path, root)
+    cwd = None
+    head: List[bytes] = []
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.strip():
+                continue
+            head.append(raw)
+            if cwd is None:
+                entry = _parse(raw)
+                if isinstance(entry, dict) and not _js_falsy(entry.get("cwd")):
+                    cwd = entry["cwd"]
+            if len(head) >= _CLAUDE_META_LINES:
+                break
+        count, messages = _read_messages("claude", path, f, 0, include_messages, count_messages, _chain(head, f))
+    session = state.record(
+        "claude",
+        rel_path,
+        {
+            "id": os.path.basename(path)[: -len(SESSION_EXT)],
+            "timestamp": _iso_from_mtime(st.st_mtime),
+            "project": cwd or rel_path.split(os.sep)[0] or "Unknown",
+            "fileName": os.path.basename(path),
+            "messageCount": count,
+        },
+    )
+    return {"source": "claude", "session": session, "messages": messages}
+
+
+def _chain(head: List[bytes], rest: Any) -> Iterator[bytes]:
+    yield from head
+    yield from rest
+
+
+def read_copilot_workspace(path: str) -> Dict[str, str]:
+    meta: Dict[str, str] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f.read().splitlines():
+                match = _WORKSPACE_LINE.match(line)
+                if match:
+                    meta[match.group(1)] = match.group(2)
+    except Exception:
+        return {}
+    return meta
+
+
+def read_copilot_session(
+    path: str,
+    state: SessionState,
+    include_messages: bool = True,
+    before: Optional[float] = None,
+    count_messages: bool = True,
+) -> Optional[Dict[str, Any]]:
+    root = SOURCE_DIRS["copilot"]
+    st = os.stat(path)
+    session_dir = os.path.dirname(path)
+    workspace = read_copilot_workspace(os.path.join(session_dir, "workspace.yaml"))
+    timestamp = workspace.get("updated_at") or workspace.get("created_at") or _iso_from_mtime(st.st_mtime)
+    if not starts_before(timestamp, before):
+        return None
+    with open(path, "rb") as f:
+        count, messages = _read_messages("copilot", path, f, 0, include_messages, count_messages)
+    rel_path = os.path.relpath(path, root)
+    session = state.record(
+        "copilot",
+        rel_path,
+        {
+            "id": workspace.get("id") or os.path.basename(session_dir),
+            "timestamp": timestamp,
+            "cwd": workspace.get("cwd") or None,
+            "project": workspace.get("repository") or None,
+            "fileName": os.path.basename(path),
+            "messageCount": count,
+        },
+    )
+    return {"source": "copilot", "session": session, "messages": messages}
+
+
+_READERS = {"codex": read_codex_session, "claude": read_claude_session, "copilot": read_copilot_session}
+
+
+def session_project(session: Dict[str, Any], source: str) -> str:
+    if source == "codex":
+        return session.get("cwd") or session.get("project") or ""
+    return session.get("project") or session.get("cwd") or ""
+
+
+def session_files(source: str, before: Optional[float] = None) -> Iterable[str]:
+    """Session files for `source`; with `before`, Codex date directories that are too new are not listed."""
+    root = SOURCE_DIRS[source]
+    if source == "copilot":
+        return list_copilot_event_files(root)
+    if source == "codex" and before is not None:
+        return list_session_files(root, lambda path: codex_dir_after(root, path, before))
+    return list_session_files(root)
+
+
+def iter_sessions(
+    source: str = "codex",
+    include_archived: bool = False,
+    status: Optional[str] = None,
+    include_messages: bool = True,
+    project: Optional[str] = None,
+    state: Optional[SessionState] = None,
+    reuse: Optional[Callable[[str, str, os.stat_result], Optional[Dict[str, Any]]]] = None,
+    before: Optional[float] = None,
+    max_messages: Optional[int] = None,
+    count_messages: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """Lazily yield {"source", "session", "messages"} records, like `session-harbor session-export`.
+
+    `reuse(source, relPath, stat)` may return the file-derived record fields (id, timestamp, cwd, project,
+    fileName, messageCount) saved from an earlier read; the file is then not opened and "messages" is None.
+    With `reuse`, records also carry the "stat" it was given, taken before the file was read (if it was).
+    `before` (epoch seconds) and `max_messages` match session-export's `before` and `maxMessages`.
+
+    Without `count_messages`, messageCount is None and "messages" is a lazy iterator: a file is only
+    decoded as far as the caller consumes it. It cannot be combined with `max_messages`.
+    """
+    if source not in _READERS:
+        raise ValueError(f"unknown source: {source}")
+    if max_messages is not None and not count_messages:
+        raise ValueError("max_messages needs count_messages")
+    state = state or SessionState()
+    root = SOURCE_DIRS[source]
+    reader = _READERS[source]
+    for path in session_files(source, before):
+        # Status comes from the state files, so filtered-out sessions are never opened.
+        rel_path = os.path.relpath(path, root)
+        session_status = state.status(source, rel_path)
+        if status is not None and session_status != status:
+            continue
+        if status is None and not include_archived and session_status == "archived":
+            continue
+        try:
+            st = os.stat(path) if reuse is not None else None
+            fields = reuse(source, rel_path, st) if reuse is not None and st is not None else None
+            if fields is not None:
+                if not starts_before(fields.get("timestamp"), before):
+                    continue
+                record: Optional[Dict[str, Any]] = {
+                    "source": source,
+                    "session": state.record(source, rel_path, fields),
+                    "messages": None,
+                }
+            else:
+                record = reader(path, state, include_messages, before, count_messages)
+        except OSError:
+            continue
+        if record is None:
+            continue
+        if project and session_project(record["session"], source) != project:
+            continue
+        if max_messages is not None and record["session"]["messageCount"] > max_messages:
+            continue
+        if st is not None:
+            record["stat"] = st
+        yield record
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Print Session Harbor sessions as NDJSON, read directly from disk.")
+    parser.add_argument("--source", default="codex", choices=SOURCES)
+    parser.add_argument("--include-archived", action="store_true")
+    parser.add_argument("--no-messages", action="store_true", help="Records only")
+    parser.add_argument("--before", help="Only sessions that started before this ISO time")
+    parser.add_argument("--max-messages", type=int, help="Only sessions with at most this many messages")
+    cli_args = parser.parse_args()
+    before = parse_time(cli_args.before) if cli_args.before else None
+    if cli_args.before and before is None:
+        parser.error(f"invalid --before: {cli_args.before}")
+    for item in iter_sessions(
+        cli_args.source,
+        cli_args.include_archived,
+        include_messages=not cli_args.no_messages,
+        before=before,
+        max_messages=cli_args.max_messages,
+    ):
+        sys.stdout.write(_js_stringify(item) + "\n")
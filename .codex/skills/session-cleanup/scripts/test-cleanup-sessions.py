@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cleanup_sessions.py")
+
+# One low-signal session (only boilerplate and a ".") and one real exchange, both well past the cutoff.
+SESSIONS = {
+    "low": [{"role": "user", "text": "<environment_context>x</environment_context>"}, {"role": "user", "text": "."}],
+    "real": [{"role": "user", "text": "please refactor the parser"}, {"role": "assistant", "text": "Done, refactored."}],
+}
+
+
+def write_codex_home(codex_home: str) -> None:
+    day = os.path.join(codex_home, "sessions", "2025", "01", "01")
+    os.makedirs(day)
+    for session_id, messages in SESSIONS.items():
+        lines = [{"timestamp": "2025-01-01T00:00:00Z", "type": "session_meta", "payload": {"id": session_id}}]
+        for message in messages:
+            lines.append({
+                "type": "response_item",
+                "payload": {
+                    "type": "message",
+                    "role": message["role"],
+                    "content": [{"type": "input_text", "text": message["text"]}],
+                },
+            })
+        with open(os.path.join(day, f"rollout-{session_id}.jsonl"), "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(line) + "\n" for line in lines))
+
+
+def write_fake_cli(bin_dir: str, reply: str) -> None:
+    """A session-harbor whose session-status-bulk prints `reply` verbatim."""
+    path = os.path.join(bin_dir, "session-harbor")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"#!{sys.executable}\nimport sys\nsys.stdin.read()\nprint({reply!r})\n")
+    os.chmod(path, 0o755)
+
+
+def run_apply(reply: Optional[str]) -> Dict[str, Any]:
+    """Archive with --backend native; `reply` None means no session-harbor on PATH at all."""
+    with tempfile.TemporaryDirectory(prefix="cleanup-test-") as root:
+        home = os.path.join(root, "home")
+        # Outside HOME, so the sessions are only found through CODEX_HOME, as the TTS watcher finds them.
+        codex_home = os.path.join(root, "codex-home")
+        bin_dir = os.path.join(root, "bin")
+        os.makedirs(bin_dir)
+        write_codex_home(codex_home)
+        if reply is not None:
+            write_fake_cli(bin_dir, reply)
+        cache = os.path.join(root, "cache.json")
+        env = dict(
+            os.environ,
+            HOME=home,
+            CODEX_HOME=codex_home,
+            SESSION_HARBOR_DATA_DIR=os.path.join(root, "data"),
+            PATH=bin_dir,
+        )
+        proc = subprocess.run(
+            [sys.executable, SCRIPT, "--backend", "native", "--apply", "--cache", cache],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        summary = proc.stdout[: proc.stdout.rfind("}") + 1]
+        return {
+            "returncode": proc.returncode,
+            "stderr": proc.stderr,
+            "result": json.loads(summary) if summary else None,
+            "cache_saved": os.path.isfile(cache),
+        }
+
+
+def main() -> int:
+    failures: List[str] = []
+    cases = [
+        ("missing CLI", None),
+        ("null reply", "null"),
+        ("list reply", "[]"),
+        ("results not a list", '{"results": {"ok": true}}'),
+    ]
+    for name, reply in cases:
+        outcome = run_apply(reply)
+        result = outcome["result"]
+        if outcome["returncode"] != 0 or result is None:
+            failures.append(f"{name}: exited {outcome['returncode']}: {outcome['stderr'].strip()}")
+            continue
+        if result["candidates"] != 1 or result["archived"] != 0 or result["archive_errors"] != 1:
+            failures.append(f"{name}: unexpected result {result}")
+        if "archive error: " not in outcome["stderr"]:
+            failures.append(f"{name}: archive error not reported")
+        if not outcome["cache_saved"]:
+            failures.append(f"{name}: verdict cache not saved")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        return 1
+    print(f"PASS: {len(cases)} failed archive calls reported without aborting")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import codex_session_synth  # noqa: E402
+
+WATCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "codex-session-watch-tts.py")
+MARKER = "benchmsg"
+
+
+class NotifyTail(threading.Thread):
+    """Follows the dry-run notify log and records when each benchmark message shows up."""
+
+    def __init__(self, path: str, interval: float = 0.002) -> None:
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.seen: Dict[int, float] = {}
+        self.cond = threading.Condition()
+        self._stop = threading.Event()
+
+    def run(self) -> None:
+        offset = 0
+        buf = b""
+        while not self._stop.is_set():
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                data = b""
+            if data:
+                now = time.monotonic()
+                offset += len(data)
+                lines = (buf + data).split(b"\n")
+                buf = lines.pop()
+                with self.cond:
+                    for line in lines:
+                        ident = _message_id(line.decode("utf-8", errors="ignore"))
+                        if ident is not None and ident not in self.seen:
+                            self.seen[ident] = now
+                    self.cond.notify_all()
+            else:
+                time.sleep(self.interval)
+
+    def wait_for(self, ident: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while ident not in self.seen:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self.cond.wait(left)
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def _message_id(line: str) -> Optional[int]:
+    pos = line.find(MARKER + " ")
+    if pos < 0:
+        return None
+    token = line[pos + len(MARKER) + 1 :].split(" ", 1)[0]
+    try:
+        return int(token)
+    except ValueError:
+        return None
+
+
+def _message(ident: int, rng: random.Random) -> str:
+    return f"{MARKER} {ident} " + " ".join(rng.choice(codex_session_synth._WORDS) for _ in range(rng.randint(4, 30)))
+
+
+def _proc_cpu_seconds(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime and stime are fields 14 and 15 of the full line, i.e. 11 and 12 after the command name.
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return None
+
+
+def _proc_memory_kb(pid: int) -> Tuple[Optional[int], Optional[int]]:
+    rss = peak = None
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1])
+    except Exception:
+        pass
+    return rss, peak
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def build_home(root: str, history: int, active: int, seed: int) -> Tuple[str, List[str]]:
+    codex_home = os.path.join(root, "codex-home")
+    scripts = os.path.join(codex_home, "skills", "speech", "scripts")
+    os.makedirs(scripts, exist_ok=True)
+    # The notifier only checks that the generator exists; dry-run never executes it.
+    open(os.path.join(scripts, "text_to_speech.py"), "w").close()
+    codex_session_synth.write_history(codex_home, history, seed=seed)
+    rng = random.Random(seed + 1)
+    now = time.time()
+    paths = [codex_session_synth.write_session(codex_home, now - i, rng, turns=1) for i in range(active)]
+    return codex_home, paths
+
+
+def watcher_env(root: str, codex_home: str, args: argparse.Namespace) -> Dict[str, str]:
+    env = os.environ.copy()
+    env.update(
+        {
+            "CODEX_HOME": codex_home,
+            "CODEX_TTS_DRY_RUN": "1",
+            "CODEX_TTS_DEBUG": "1" if args.debug else "0",
+            "CODEX_TTS_LOG_FILE": os.path.join(root, "watch.log"),
+            "CODEX_TTS_NOTIFY_LOG_FILE": os.path.join(root, "notify.log"),
+            "CODEX_TTS_LOCK_FILE": os.path.join(root, "watch.lock"),
+            "CODEX_TTS_RATE_STATE_FILE": os.path.join(root, "rate.state"),
+            # Everything the watcher persists stays under root, so a running watcher's checkpoint, stats
+            # socket and metrics are never touched.
+            "CODEX_TTS_CHECKPOINT_FILE": os.path.join(root, "checkpoint.json"),
+            "CODEX_TTS_STATS_SOCKET": os.path.join(root, "stats.sock"),
+            "CODEX_TTS_METRICS_FILE": os.path.join(root, "metrics.prom"),
+            # The session index is opt-in; --env CODEX_TTS_SESSION_INDEX=PATH measures the watcher feeding one.
+            "CODEX_TTS_SESSION_INDEX": "",
+            # Only the synthetic Codex home; an inherited CODEX_TTS_SOURCES=all would watch the real ones.
+            "CODEX_TTS_SOURCES": "codex",
+            # Rate limiting would throttle the benchmark itself rather than measure the watcher. 4096 is the
+            # most the limiter can track; a run that dispatches more reports the rest as missed.
+            "CODEX_TTS_MAX_PER_HOUR": "4096",
+            "CODEX_TTS_MIN_SECONDS_BETWEEN": "0",
+        }
+    )
+    if args.mode:
+        env["CODEX_TTS_WATCH_MODE"] = args.mode
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def replay(
+    paths: List[str],
+    rate: float,
+    duration: float,
+    big_every: int,
+    seed: int,
+    next_id: int,
+) -> Tuple[Dict[int, float], int, int, float]:
+    """Append whole turns round-robin across `paths` at `rate` lines/s (0 = as fast as possible)."""
+    rng = random.Random(seed)
+    sent: Dict[int, float] = {}
+    lines_written = 0
+    bytes_written = 0
+    handles = [open(path, "a", encoding="utf-8") for path in paths]
+    start = time.monotonic()
+    try:
+        turn = 0
+        while time.monotonic() - start < duration:
+            f = handles[turn % len(handles)]
+            turn += 1
+            ident = next_id
+            next_id += 1
+            lines = codex_session_synth.turn_lines(
+                rng,
+                time.time(),
+                tool_calls=rng.randint(0, 3),
+                assistant_text=_message(ident, rng),
+                big_every=big_every,
+            )
+            for i, line in enumerate(lines):
+                if rate > 0:
+                    delay = start + lines_written / rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                f.write(line + "\n")
+                f.flush()
+                lines_written += 1
+                bytes_written += len(line) + 1
+                if i == len(lines) - 2:
+                    # The agent_message line is the one the watcher speaks from; latency is measured from here.
+                    sent[ident] = time.monotonic()
+    finally:
+        for f in handles:
+            f.close()
+    return sent, lines_written, bytes_written, time.monotonic() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="End-to-end benchmark: run the session watcher in dry-run against synthetic session traffic."
+    )
+    parser.add_argument("--history", type=int, default=2000, help="Historical session files spread over a year")
+    parser.add_argument("--active", type=int, default=4, help="Session files receiving appends")
+    parser.add_argument("--rate", type=float, default=200.0, help="Appended lines/s across all active sessions (0 = flood)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of replayed traffic")
+    parser.add_argument("--idle", type=float, default=5.0, help="Seconds of idle CPU sampling before the replay")
+    parser.add_argument("--big-every", type=int, default=0, help="One tool output in N is 0.5-2 MB (0 disables)")
+    parser.add_argument("--mode", choices=("auto", "poll"), default=None, help="Override CODEX_TTS_WATCH_MODE")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra watcher environment")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=15.0, help="Seconds to wait for the last message after replay")
+    parser.add_argument("--debug", action="store_true", help="Enable watcher debug logging (kept with --keep)")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary CODEX_HOME and logs")
+    parser.add_argument("--json", action="store_true", help="Print the results as one JSON object")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="codex-tts-bench-")
+    proc: Optional[subprocess.Popen] = None
+    tail: Optional[NotifyTail] = None
+    try:
+        t0 = time.monotonic()
+        codex_home, paths = build_home(root, args.history, max(args.active, 1), args.seed)
+        build_seconds = time.monotonic() - t0
+
+        env = watcher_env(root, codex_home, args)
+        tail = NotifyTail(env["CODEX_TTS_NOTIFY_LOG_FILE"])
+        tail.start()
+        started = time.monotonic()
+        proc = subprocess.Popen([sys.executable, WATCHER], env=env)
+
+        # Startup is ready once a probe appended to an active session has been dispatched.
+        rng = random.Random(args.seed + 2)
+        probe = 0
+        ready = False
+        while time.monotonic() - started < args.timeout and proc.poll() is None:
+            with open(paths[0], "a", encoding="utf-8") as f:
+                for line in codex_session_synth.assistant_lines(rng, time.time(), _message(probe, rng)):
+                    f.write(line + "\n")
+            if tail.wait_for(probe, 0.5):
+                ready = True
+                break
+            probe += 1
+        if not ready:
+            print("watcher did not dispatch a probe message; rerun with --debug --keep", file=sys.stderr)
+            return 1
+        startup_seconds = time.monotonic() - started
+        _, startup_peak_kb = _proc_memory_kb(proc.pid)
+
+        idle_cpu = None
+        if args.idle > 0:
+            cpu0 = _proc_cpu_seconds(proc.pid)
+            time.sleep(args.idle)
+            cpu1 = _proc_cpu_seconds(proc.pid)
+            if cpu0 is not None and cpu1 is not None:
+                idle_cpu = (cpu1 - cpu0) / args.idle
+        idle_rss_kb, _ = _proc_memory_kb(proc.pid)
+
+        cpu0 = _proc_cpu_seconds(proc.pid)
+        sent, lines_written, bytes_written, replay_seconds = replay(
+            paths, args.rate, args.duration, args.big_every, args.seed + 3, next_id=probe + 1
+        )
+        replay_end = time.monotonic()
+        last = max(sent) if sent else None
+        if last is not None:
+            tail.wait_for(last, args.timeout)
+        # Give stragglers from other sessions a moment once the newest one has arrived.
+        time.sleep(0.2)
+        drained = time.monotonic()
+        cpu1 = _proc_cpu_seconds(proc.pid)
+        rss_kb, peak_kb = _proc_memory_kb(proc.pid)
+
+        with tail.cond:
+            seen = dict(tail.seen)
+        latencies = [(seen[i] - t) * 1000.0 for i, t in sent.items() if i in seen]
+        if last is not None and last in seen:
+            process_seconds = max(seen[last], replay_end) - (replay_end - replay_seconds)
+        else:
+            process_seconds = drained - (replay_end - replay_seconds)
+
+        results = {
+            "history": args.history,
+            "active": len(paths),
+            "mode": args.mode or os.environ.get("CODEX_TTS_WATCH_MODE", "auto"),
+            "build_seconds": round(build_seconds, 3),
+            "startup_seconds": round(startup_seconds, 3),
+            "startup_peak_rss_kb": startup_peak_kb,
+            "idle_cpu_percent": None if idle_cpu is None else round(idle_cpu * 100.0, 3),
+            "idle_rss_kb": idle_rss_kb,
+            "offered_rate": args.rate,
+            "lines": lines_written,
+            "bytes": bytes_written,
+            "replay_seconds": round(replay_seconds, 3),
+            "lines_per_second": round(lines_written / process_seconds, 1) if process_seconds > 0 else None,
+            "mb_per_second": round(bytes_written / process_seconds / 1e6, 2) if process_seconds > 0 else None,
+            "load_cpu_percent": (
+                None if cpu0 is None or cpu1 is None else round((cpu1 - cpu0) / (drained - replay_end + replay_seconds) * 100.0, 1)
+            ),
+            "messages_sent": len(sent),
+            "messages_dispatched": len(latencies),
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50), 2),
+                "p95": round(_percentile(latencies, 95), 2),
+                "p99": round(_percentile(latencies, 99), 2),
+                "max": round(max(latencies), 2) if latencies else None,
+            },
+            "rss_kb": rss_kb,
+            "peak_rss_kb": peak_kb,
+        }
+    finally:
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except Exception:
+                proc.kill()
+        if tail is not None:
+            tail.stop()
+        if args.keep:
+            print(f"kept {root}", file=sys.stderr)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    # Exit 2 when the watcher missed messages, whichever way the results are printed.
+    status = 0 if results["messages_dispatched"] == results["messages_sent"] else 2
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return status
+
+    lat = results["latency_ms"]
+    print(
+        f"home: {results['history']} historical + {results['active']} active sessions "
+        f"(built in {results['build_seconds']:.1f}s), mode={results['mode']}"
+    )
+    print(f"startup: {results['startup_seconds'] * 1000:.0f} ms to first dispatch, peak RSS {results['startup_peak_rss_kb']} kB")
+    print(f"idle:    CPU {results['idle_cpu_percent']}%  RSS {results['idle_rss_kb']} kB")
+    print(
+        f"load:    {results['lines']} lines ({results['bytes'] / 1e6:.1f} MB) offered at "
+        f"{'flood' if not args.rate else f'{args.rate:.0f} lines/s'} -> {results['lines_per_second']} lines/s "
+        f"({results['mb_per_second']} MB/s), CPU {results['load_cpu_percent']}%"
+    )
+    print(
+        f"latency: p50 {lat['p50']:.1f} ms  p95 {lat['p95']:.1f} ms  p99 {lat['p99']:.1f} ms  max {lat['max']} ms  "
+        f"({results['messages_dispatched']}/{results['messages_sent']} dispatched)"
+    )
+    print(f"memory:  RSS {results['rss_kb']} kB, peak {results['peak_rss_kb']} kB")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
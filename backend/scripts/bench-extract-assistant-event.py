@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import codex_session_synth  # noqa: E402
+
+
+def load_watcher():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "codex-session-watch-tts.py")
+    spec = importlib.util.spec_from_file_location("codex_session_watch_tts", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(lines: List[bytes], handle: Callable[[bytes], Optional[str]], repeat: int) -> Tuple[float, int]:
+    best = float("inf")
+    accepted = 0
+    for _ in range(repeat):
+        accepted = 0
+        t0 = time.perf_counter()
+        for raw in lines:
+            if handle(raw):
+                accepted += 1
+        best = min(best, time.perf_counter() - t0)
+    return best, accepted
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark the watcher's per-line assistant-event extraction.")
+    parser.add_argument("--lines", type=int, default=20000, help="Lines in the synthetic session log")
+    parser.add_argument("--big-every", type=int, default=200, help="One tool output in N is 0.5-2 MB (0 disables)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N timing")
+    args = parser.parse_args()
+
+    watcher = load_watcher()
+    lines = codex_session_synth.mixed_log(args.lines, seed=args.seed, big_every=args.big_every)
+    total_bytes = sum(len(line) for line in lines)
+
+    fast_loads = watcher._json_loads
+
+    def baseline(raw: bytes) -> Optional[str]:
+        # The original hot path: decode every line, then a full stdlib json.loads.
+        watcher._json_loads = json.loads
+        return watcher.extract_assistant_event(raw.decode("utf-8", errors="ignore"))[0]
+
+    def prefilter_stdlib(raw: bytes) -> Optional[str]:
+        watcher._json_loads = json.loads
+        if not watcher.might_be_assistant_event(raw):
+            return None
+        return watcher.extract_assistant_event(raw)[0]
+
+    def prefilter_fast(raw: bytes) -> Optional[str]:
+        watcher._json_loads = fast_loads
+        if not watcher.might_be_assistant_event(raw):
+            return None
+        return watcher.extract_assistant_event(raw)[0]
+
+    variants = [("baseline (decode + json)", baseline), ("prefilter + json", prefilter_stdlib)]
+    if watcher.JSON_BACKEND != "json":
+        variants.append((f"prefilter + {watcher.JSON_BACKEND}", prefilter_fast))
+
+    passed = sum(1 for line in lines if watcher.might_be_assistant_event(line))
+    print(f"lines={len(lines)} bytes={total_bytes / 1e6:.1f}MB prefilter_pass={passed} ({100.0 * passed / len(lines):.1f}%)")
+
+    base_time = None
+    base_accepted = None
+    for label, handle in variants:
+        elapsed, accepted = run(lines, handle, args.repeat)
+        if base_time is None:
+            base_time, base_accepted = elapsed, accepted
+        status = "" if accepted == base_accepted else f"  MISMATCH (baseline accepted {base_accepted})"
+        print(
+            f"{label:<28} {elapsed * 1e3:9.1f} ms  {len(lines) / elapsed:11.0f} lines/s  "
+            f"{total_bytes / elapsed / 1e6:8.1f} MB/s  x{base_time / elapsed:5.1f}  accepted={accepted}{status}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,39 +1,681 @@
 #!/usr/bin/env python3
-import glob
+import abc
+import hashlib
+import heapq
 import json
 import os
+import queue
+import re
+import select
+import shutil
+import signal
+import socket
+import struct
 import subprocess
+import sys
+import threading
 import time
 import datetime
 import atexit
 import traceback
-from collections import deque
-from typing import Deque, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
 
 
-def session_files(codex_home: str) -> List[str]:
-    # Codex stores sessions nested by date, e.g. ~/.codex/sessions/YYYY/MM/DD/<id>.jsonl.
-    # Use a recursive glob so we don't depend on the exact depth.
-    pattern = os.path.join(codex_home, "sessions", "**", "*.jsonl")
-    files = glob.glob(pattern, recursive=True)
-
-    # Only a small number of session files are actively being appended to.
-    # Sorting by mtime and trimming keeps the watcher lightweight.
+def _max_files_from_env() -> int:
     try:
-        max_files = int(os.environ.get("CODEX_TTS_MAX_FILES", "0"))
+        return int(os.environ.get("CODEX_TTS_MAX_FILES", "0"))
     except Exception:
-        max_files = 0
-    if max_files > 0 and len(files) > max_files:
-        files_with_mtime = []
-        for p in files:
+        return 0
+
+
+def is_session_file(name: str, file_name: Optional[str] = None) -> bool:
+    """Whether a directory entry is a session log: `file_name` exactly if the source has one, else *.jsonl."""
+    return name == file_name if file_name else name.endswith(".jsonl")
+
+
+class FileStat(NamedTuple):
+    """What SessionIndex remembers of a file's stat, under os.stat_result's attribute names."""
+
+    st_ino: int
+    st_size: int
+    st_mtime: float
+
+
+class SessionIndex:
+    """Incremental view of a sessions tree, kept for the life of the watcher.
+
+    Codex stores sessions nested by date (sessions/YYYY/MM/DD/<id>.jsonl) and only the newest day
+    directories receive new files or appends; Claude (projects/<project>/) and Copilot
+    (session-state/<id>/) behave the same way per project or session. A directory's mtime only changes
+    when entries are added or removed, so unchanged directories are never re-listed. Each scan stats the
+    leaf directories holding the most recently modified files (plus their ancestors, so new directories
+    are noticed), the current top-N files and the `recent_files` most recently modified files wherever
+    they are, so a recently used session that is resumed is noticed on the next scan; the rest of history
+    is swept every `full_scan_seconds` to catch older resumed sessions and deletions. `file_name` restricts the index to one file name per directory
+    (Copilot's events.jsonl); otherwise every *.jsonl file is a session.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_files: int = 0,
+        hot_dirs: int = 2,
+        full_scan_seconds: float = 30.0,
+        file_name: Optional[str] = None,
+        recent_files: int = 64,
+    ) -> None:
+        self.root = root
+        self.max_files = max_files
+        self.hot_dirs = max(1, hot_dirs)
+        self.full_scan_seconds = full_scan_seconds
+        self.file_name = file_name
+        self.recent_files = recent_files
+        self._dir_mtimes: Dict[str, int] = {}
+        self._subdirs: Dict[str, Set[str]] = {}
+        self._dir_files: Dict[str, Set[str]] = {}
+        self._dir_newest: Dict[str, float] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._inodes: Dict[str, int] = {}
+        self._top: Dict[str, float] = {}
+        self._recent: Dict[str, float] = {}
+        self._changed: Dict[str, Optional[int]] = {}
+        self._removed: Set[str] = set()
+        self._last_full = 0.0
+        self.primed = False
+        self.full = False
+
+    def scan(self, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        self.primed = bool(self._dir_mtimes)
+        self._changed = {}
+        self._removed = set()
+        self.full = not self._dir_mtimes or now - self._last_full >= self.full_scan_seconds
+        if self.full:
+            self._visit(self.root, full=True)
+            self._last_full = now
+        else:
+            for d in self._hot_dirs():
+                self._visit(d, full=False)
+            for path in set(self._top) | set(self._recent):
+                if path in self._mtimes:
+                    self._stat_file(path)
+        return self._select()
+
+    def __len__(self) -> int:
+        return len(self._mtimes)
+
+    def directories(self) -> List[str]:
+        return list(self._dir_mtimes)
+
+    def changes(self) -> Dict[str, Optional[int]]:
+        """Files new or modified in the last scan, mapped to their previous size (None if new)."""
+        return self._changed
+
+    def removed(self) -> Set[str]:
+        """Files that disappeared in the last scan."""
+        return self._removed
+
+    def mtime_of(self, path: str) -> Optional[float]:
+        return self._mtimes.get(path)
+
+    def size_of(self, path: str) -> Optional[int]:
+        return self._sizes.get(path)
+
+    def stats(self, paths: Optional[Iterable[str]] = None) -> Dict[str, Optional[FileStat]]:
+        """Last seen stat of `paths` (default: every indexed file), None for files no longer indexed."""
+        if paths is None:
+            paths = self._mtimes
+        return {
+            path: FileStat(self._inodes[path], self._sizes[path], self._mtimes[path]) if path in self._mtimes else None
+            for path in paths
+        }
+
+    def matches(self, name: str) -> bool:
+        return is_session_file(name, self.file_name)
+
+    def _hot_dirs(self) -> List[str]:
+        leaves = heapq.nlargest(
+            self.hot_dirs,
+            (d for d, names in self._dir_files.items() if names),
+            key=lambda d: self._dir_newest.get(d, 0.0),
+        )
+        hot: List[str] = []
+        seen: Set[str] = set()
+        # Ancestors first so a new sibling directory is listed before its parent's leaves are stat'ed.
+        for leaf in leaves:
+            chain: List[str] = []
+            d = leaf
+            while True:
+                chain.append(d)
+                if d == self.root or len(d) <= len(self.root):
+                    break
+                d = os.path.dirname(d)
+            for d in reversed(chain):
+                if d not in seen:
+                    seen.add(d)
+                    hot.append(d)
+        if self.root not in seen:
+            hot.insert(0, self.root)
+        return hot
+
+    def _visit(self, d: str, full: bool) -> None:
+        try:
+            st = os.stat(d)
+        except OSError:
+            self._drop_dir(d)
+            return
+        if self._dir_mtimes.get(d) != st.st_mtime_ns:
+            self._list_dir(d)
+            self._dir_mtimes[d] = st.st_mtime_ns
+            full = True
+        else:
+            for path in self._dir_files.get(d, ()):
+                self._stat_file(path)
+        if full:
+            for sub in list(self._subdirs.get(d, ())):
+                self._visit(sub, full=True)
+
+    def _list_dir(self, d: str) -> None:
+        subdirs: Set[str] = set()
+        files: Set[str] = set()
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Mirror Session Harbor: archived sessions live under Archive/ and are never tailed.
+                            if entry.name.lower() != "archive":
+                                subdirs.add(entry.path)
+                        elif self.matches(entry.name) and entry.is_file():
+                            files.add(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            self._drop_dir(d)
+            return
+        for gone in self._subdirs.get(d, set()) - subdirs:
+            self._drop_dir(gone)
+        for gone in self._dir_files.get(d, set()) - files:
+            self._forget(gone)
+        self._subdirs[d] = subdirs
+        self._dir_files[d] = files
+        for path in files:
+            self._stat_file(path)
+
+    def _stat_file(self, path: str) -> None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._forget(path)
+            d = os.path.dirname(path)
+            if d in self._dir_files:
+                self._dir_files[d].discard(path)
+            return
+        if self._mtimes.get(path) != st.st_mtime:
+            self._changed.setdefault(path, self._sizes.get(path))
+            self._mtimes[path] = st.st_mtime
+            self._sizes[path] = st.st_size
+            self._inodes[path] = st.st_ino
+            d = os.path.dirname(path)
+            if st.st_mtime > self._dir_newest.get(d, 0.0):
+                self._dir_newest[d] = st.st_mtime
+
+    def _forget(self, path: str) -> None:
+        if self._mtimes.pop(path, None) is not None:
+            self._removed.add(path)
+        self._sizes.pop(path, None)
+        self._inodes.pop(path, None)
+        self._changed.pop(path, None)
+
+    def _drop_dir(self, d: str) -> None:
+        for sub in self._subdirs.pop(d, set()):
+            self._drop_dir(sub)
+        for path in self._dir_files.pop(d, set()):
+            self._forget(path)
+        self._dir_mtimes.pop(d, None)
+        self._dir_newest.pop(d, None)
+
+    def _newest(self, current: Dict[str, float], n: int) -> Dict[str, float]:
+        """The `n` most recently modified files, updated from `current` (the previous answer)."""
+        if len(self._mtimes) <= n:
+            return dict(self._mtimes)
+        if self._removed & current.keys() or len(current) < n:
+            # Lost a member (or never filled): only then does the whole history need to be consulted.
+            return dict(heapq.nlargest(n, self._mtimes.items(), key=lambda item: item[1]))
+        if self._changed:
+            # Everything outside `current` and unchanged is still older than its members, so merging the
+            # changed files into it is enough.
+            pool = {p: self._mtimes[p] for p in current}
+            for p in self._changed:
+                pool[p] = self._mtimes[p]
+            return dict(heapq.nlargest(n, pool.items(), key=lambda item: item[1]))
+        return current
+
+    def _select(self) -> List[str]:
+        self._recent = self._newest(self._recent, self.recent_files) if self.recent_files > 0 else {}
+        if self.max_files <= 0:
+            return list(self._mtimes)
+        self._top = self._newest(self._top, self.max_files)
+        return sorted(self._top, key=self._top.__getitem__, reverse=True)
+
+
+def session_files(codex_home: str, index: Optional[SessionIndex] = None) -> List[str]:
+    # Codex stores sessions nested by date, e.g. ~/.codex/sessions/YYYY/MM/DD/<id>.jsonl.
+    # Only a small number of session files are actively being appended to; CODEX_TTS_MAX_FILES keeps the
+    # most recently modified ones. Pass a long-lived index so repeated scans only touch what changed.
+    if index is None:
+        index = SessionIndex(os.path.join(codex_home, "sessions"), max_files=_max_files_from_env())
+    return index.scan()
+
+
+class BufferedLog:
+    """Debug log written by a background thread.
+
+    `write()` only enqueues; the writer batches lines and flushes once `flush_bytes` are pending or
+    `flush_interval` seconds have passed, and rotates the file to `<path>.1` past `max_bytes`. If the
+    writer falls behind by `max_pending` lines, new lines are counted and dropped instead of blocking.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 5 * 1024 * 1024,
+        flush_bytes: int = 64 * 1024,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Tuple[float, str]]]" = queue.Queue(maxsize=max_pending)
+        self._file: Optional[Any] = None
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name="debug-log", daemon=True)
+        self._thread.start()
+
+    def write(self, msg: str) -> None:
+        try:
+            self._queue.put_nowait((time.time(), msg))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 2.0) -> None:
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+        try:
+            self._size = os.fstat(self._file.fileno()).st_size
+        except OSError:
+            self._size = 0
+
+    def _emit(self, chunk: str) -> None:
+        try:
+            if self._file is None:
+                self._open()
+            if self.max_bytes > 0 and self._size > 0 and self._size + len(chunk) > self.max_bytes:
+                self._file.close()
+                os.replace(self.path, f"{self.path}.1")
+                self._open()
+            self._file.write(chunk)
+            self._file.flush()
+            self._size += len(chunk)
+        except Exception:
+            # Logging must never take the watcher down.
+            self._file = None
+
+    def _run(self) -> None:
+        pending: List[str] = []
+        pending_bytes = 0
+        last_flush = time.monotonic()
+        dropped_reported = 0
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush)) if pending else None
             try:
-                files_with_mtime.append((os.path.getmtime(p), p))
-            except Exception:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            if item:
+                ts, msg = item
+                line = f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}] {msg}\n"
+                pending.append(line)
+                pending_bytes += len(line)
+            if self.dropped != dropped_reported:
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+                pending.append(f"[{stamp}] log queue full; dropped {self.dropped - dropped_reported} lines\n")
+                dropped_reported = self.dropped
+            if pending and (
+                item is None or pending_bytes >= self.flush_bytes or time.monotonic() - last_flush >= self.flush_interval
+            ):
+                self._emit("".join(pending))
+                pending = []
+                pending_bytes = 0
+                last_flush = time.monotonic()
+            if item is None:
+                if self._file is not None:
+                    self._file.close()
+                return
+
+
+READ_CHUNK = 256 * 1024
+
+
+class LineTail:
+    """Splits appended bytes into complete lines with bounded memory.
+
+    Only the bytes of each new chunk are searched for newlines (the partial line is never re-scanned or
+    re-concatenated), and a partial line longer than `max_line` is dropped: the rest of it is skipped as
+    it streams in, up to the next newline, without being buffered.
+    """
+
+    __slots__ = ("max_line", "partial", "skipping", "skipped", "ends")
+
+    def __init__(self, max_line: int) -> None:
+        self.max_line = max_line
+        self.partial = bytearray()
+        self.skipping = False
+        self.skipped = 0
+        # For each line the last feed() returned, the index in its chunk just past the line's newline.
+        self.ends: List[int] = []
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        lines: List[bytes] = []
+        ends = self.ends
+        ends.clear()
+        start = 0
+        if self.skipping:
+            nl = chunk.find(b"\n")
+            if nl < 0:
+                return lines
+            self.skipping = False
+            start = nl + 1
+        view = memoryview(chunk)
+        max_line = self.max_line
+        while True:
+            nl = chunk.find(b"\n", start)
+            if nl < 0:
+                break
+            if self.partial:
+                if len(self.partial) + (nl - start) <= max_line:
+                    self.partial += view[start:nl]
+                    lines.append(bytes(self.partial))
+                    ends.append(nl + 1)
+                else:
+                    self.skipped += 1
+                self.partial.clear()
+            elif nl - start <= max_line:
+                if nl > start:
+                    lines.append(chunk[start:nl])
+                    ends.append(nl + 1)
+            else:
+                self.skipped += 1
+            start = nl + 1
+        if start < len(chunk):
+            if len(self.partial) + (len(chunk) - start) > max_line:
+                self.partial.clear()
+                self.skipping = True
+                self.skipped += 1
+            else:
+                self.partial += view[start:]
+        return lines
+
+
+class TrackedFile:
+    __slots__ = ("path", "source", "ino", "size", "mtime_ns", "offset", "tail", "since", "last_active", "next_check")
+
+    def __init__(
+        self,
+        path: str,
+        st: os.stat_result,
+        offset: int,
+        now: float,
+        max_line: int,
+        source: Optional["SessionSource"] = None,
+    ) -> None:
+        self.path = path
+        self.source = source
+        self.ino = st.st_ino
+        # Size as of the last read; starting from `offset` makes a backlog behind the offset look unread.
+        self.size = offset
+        self.mtime_ns = st.st_mtime_ns
+        self.offset = offset
+        self.tail = LineTail(max_line)
+        # Messages timestamped before this are not spoken; None when the offset is known to be exact.
+        self.since: Optional[float] = None
+        self.last_active = now
+        # 0.0 while hot (checked every tick); otherwise the time of the next cold-tier check.
+        self.next_check = 0.0
+
+    def resume_offset(self) -> int:
+        # Where to pick up after a restart: the start of the partial line still buffered.
+        return self.offset - len(self.tail.partial)
+
+
+class TrackedFiles:
+    """Tracked-file table with hot/cold tiers and LRU eviction.
+
+    Hot files (recent activity) are stat'ed every tick; files idle for `cold_after` seconds move to a cold
+    tier that is only checked every `cold_interval` seconds. Once more than `max_tracked` files are
+    tracked, the least recently active ones are dropped; they are picked up again if they change.
+    """
+
+    def __init__(
+        self,
+        cold_after: float = 120.0,
+        cold_interval: float = 10.0,
+        max_tracked: int = 256,
+        max_line: int = 4 * 1024 * 1024,
+    ) -> None:
+        self.cold_after = cold_after
+        self.cold_interval = cold_interval
+        self.max_tracked = max_tracked
+        self.max_line = max_line
+        # Ordered least -> most recently active.
+        self._files: "OrderedDict[str, TrackedFile]" = OrderedDict()
+        self._hot: Set[str] = set()
+        self._cold: List[Tuple[float, str]] = []
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._files
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def hot_count(self) -> int:
+        return len(self._hot)
+
+    def __iter__(self) -> Iterator[TrackedFile]:
+        return iter(list(self._files.values()))
+
+    def get(self, path: str) -> Optional[TrackedFile]:
+        return self._files.get(path)
+
+    def add(
+        self,
+        path: str,
+        st: os.stat_result,
+        offset: int,
+        now: float,
+        source: Optional["SessionSource"] = None,
+    ) -> TrackedFile:
+        tf = TrackedFile(path, st, offset, now, self.max_line, source)
+        self._files[path] = tf
+        self._files.move_to_end(path)
+        self._hot.add(path)
+        return tf
+
+    def remove(self, path: str) -> None:
+        # Stale cold-tier heap entries are skipped when popped.
+        self._files.pop(path, None)
+        self._hot.discard(path)
+
+    def mark_active(self, tf: TrackedFile, now: float) -> None:
+        tf.last_active = now
+        tf.next_check = 0.0
+        self._hot.add(tf.path)
+        self._files.move_to_end(tf.path)
+
+    def due(self, now: float) -> List[TrackedFile]:
+        due: List[TrackedFile] = []
+        for path in list(self._hot):
+            tf = self._files[path]
+            if now - tf.last_active >= self.cold_after:
+                self._hot.discard(path)
+                self._schedule(tf, now)
+            else:
+                due.append(tf)
+        while self._cold and self._cold[0][0] <= now:
+            when, path = heapq.heappop(self._cold)
+            tf = self._files.get(path)
+            if tf is None or tf.next_check != when:
                 continue
-        files_with_mtime.sort(reverse=True)
-        files = [p for _, p in files_with_mtime[:max_files]]
+            due.append(tf)
+            self._schedule(tf, now)
+        return due
+
+    def evict(self, max_per_source: int = 0) -> List[TrackedFile]:
+        """Drop the least recently active files beyond `max_tracked`, and beyond `max_per_source` (0: no
+        limit) for any one source; files with bytes still to read are never dropped for the latter."""
+        evicted: List[TrackedFile] = []
+        while len(self._files) > self.max_tracked > 0:
+            path, tf = self._files.popitem(last=False)
+            self._hot.discard(path)
+            evicted.append(tf)
+        if 0 < max_per_source < len(self._files):
+            kept: Dict[str, int] = {}
+            for tf in reversed(list(self._files.values())):
+                name = tf.source.name if tf.source is not None else ""
+                kept[name] = kept.get(name, 0) + 1
+                if kept[name] > max_per_source and tf.offset >= tf.size:
+                    self.remove(tf.path)
+                    evicted.append(tf)
+        return evicted
+
+    def _schedule(self, tf: TrackedFile, now: float) -> None:
+        tf.next_check = now + self.cold_interval
+        heapq.heappush(self._cold, (tf.next_check, tf.path))
+
+
+class Checkpoint:
+    """Crash-safe record of how far each tracked file has been read.
+
+    Stored as compact JSON, {"version": 1, "saved_at": epoch, "files": {path: [ino, size, offset]}}, and
+    replaced atomically (temp file, fsync, rename) so a crash leaves either the previous or the new
+    checkpoint, never a torn one. Saves are skipped while nothing has moved.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._last: Dict[str, Tuple[int, int, int]] = {}
+
+    def load(self) -> Tuple[Optional[float], Dict[str, Tuple[int, int, int]]]:
+        try:
+            with open(self.path, "rb") as f:
+                obj = json.loads(f.read())
+            if not isinstance(obj, dict) or obj.get("version") != self.VERSION:
+                return None, {}
+            saved_at = float(obj["saved_at"])
+            files: Dict[str, Tuple[int, int, int]] = {}
+            for path, entry in (obj.get("files") or {}).items():
+                ino, size, offset = (int(v) for v in entry)
+                files[path] = (ino, size, offset)
+        except Exception:
+            return None, {}
+        self._last = dict(files)
+        return saved_at, files
+
+    def save(self, files: Dict[str, Tuple[int, int, int]], now: float) -> bool:
+        if files == self._last:
+            return False
+        data = json.dumps(
+            {"version": self.VERSION, "saved_at": now, "files": {p: list(e) for p, e in files.items()}},
+            separators=(",", ":"),
+        )
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._last = dict(files)
+        return True
+
 
-    return files
+class IndexFeeder:
+    """Keeps the shared SQLite session index (session_index.py) current from the watcher's own scans.
+
+    The feeder is handed the paths and stats SessionIndex.scan() already collected, so keeping the index
+    current never walks or stats the session trees a second time. Refreshes run on a background thread
+    with its own connection; requests queued while a refresh runs are merged, and a full refresh (after
+    one of the index's full sweeps) supersedes pending per-file ones. The first refresh of a long history
+    still parses every file, competing with tailing for the GIL, which is why the index is opt-in.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        roots: Dict[str, str],
+        debug: Callable[[str], None],
+        metrics: Optional["Metrics"] = None,
+    ) -> None:
+        import session_index  # same directory; imported here so the watcher runs without it when disabled
+
+        self._module = session_index
+        self.path = path
+        self.roots = roots
+        self.debug = debug
+        self.metrics = metrics
+        self._pending: Dict[str, Tuple[bool, Dict[str, Optional[FileStat]]]] = {}
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._work, name="session-index", daemon=True)
+        self._thread.start()
+
+    def submit(self, source: str, stats: Dict[str, Optional[FileStat]], full: bool = False) -> None:
+        """Queue a refresh of the files in `stats` (None: gone); `full` when they are the whole source tree."""
+        with self._cond:
+            pending = self._pending.get(source)
+            if full or pending is None:
+                self._pending[source] = (full, dict(stats))
+            else:
+                pending[1].update(stats)
+            self._cond.notify()
+
+    def _work(self) -> None:
+        try:
+            db = self._module.SessionIndexDB(self.path, roots=self.roots)
+        except Exception as exc:
+            self.debug(f"session index disabled, cannot open {self.path}: {exc!r}")
+            return
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                jobs, self._pending = self._pending, {}
+            for source, (full, stats) in jobs.items():
+                started = time.monotonic()
+                try:
+                    parsed = db.refresh(source, None if full else list(stats), stats)
+                except Exception as exc:
+                    self.debug(f"error refreshing session index for {source}: {exc!r}")
+                    if self.metrics is not None:
+                        self.metrics.inc("index_errors_total")
+                    continue
+                if self.metrics is not None:
+                    self.metrics.inc("index_refreshes_total")
+                    self.metrics.inc("index_files_parsed_total", parsed)
+                    self.metrics.observe("index_refresh_seconds", time.monotonic() - started)
+                if parsed:
+                    self.debug(f"session index: parsed {parsed} {source} files")
 
 
 def _normalize_text(text: str) -> Optional[str]:
@@ -57,16 +699,68 @@ def _parse_timestamp_to_epoch(ts: object) -> Optional[float]:
     return dt.timestamp()
 
 
-def extract_assistant_event(line: str) -> Tuple[Optional[str], Optional[float]]:
+def _load_json_backend() -> Tuple[str, Callable[[Union[str, bytes]], Any]]:
+    # orjson parses bytes directly and is several times faster than the stdlib on large lines.
+    # CODEX_TTS_JSON=stdlib forces the stdlib decoder.
+    if os.environ.get("CODEX_TTS_JSON", "auto").strip().lower() != "stdlib":
+        try:
+            import orjson  # type: ignore
+
+            return "orjson", orjson.loads
+        except ImportError:
+            pass
+    return "json", json.loads
+
+
+JSON_BACKEND, _json_loads = _load_json_backend()
+
+# Every line extract_assistant_event() can accept carries one of these, so anything else (tool calls,
+# reasoning, function output, token counts) is rejected on raw bytes before it is decoded or parsed.
+_ASSISTANT_MARKERS = (b'"assistant"', b"agent_message", b"assistant_message")
+
+# Codex writes `type`/`payload.type`/`role` ahead of the (possibly huge) content, so only the head of each
+# line needs scanning. CODEX_TTS_PREFILTER_WINDOW=0 scans whole lines.
+try:
+    PREFILTER_WINDOW = int(os.environ.get("CODEX_TTS_PREFILTER_WINDOW", "1024"))
+except Exception:
+    PREFILTER_WINDOW = 1024
+
+
+def might_be_assistant_event(
+    raw: bytes, window: int = PREFILTER_WINDOW, markers: Tuple[bytes, ...] = _ASSISTANT_MARKERS
+) -> bool:
+    head = raw[:window] if window > 0 else raw
+    for marker in markers:
+        if marker in head:
+            return True
+    return False
+
+
+def _load_object(line: Union[str, bytes]) -> Optional[Dict[str, Any]]:
     try:
-        obj = json.loads(line)
+        obj = _json_loads(line)
     except Exception:
+        if not isinstance(line, bytes):
+            return None
+        # Both decoders reject invalid UTF-8; keep the old lenient behaviour for such lines.
+        try:
+            obj = _json_loads(line.decode("utf-8", errors="ignore"))
+        except Exception:
+            return None
+    return obj if isinstance(obj, dict) else None
+
+
+def extract_assistant_event(line: Union[str, bytes]) -> Tuple[Optional[str], Optional[float]]:
+    obj = _load_object(line)
+    if obj is None:
         return None, None
 
     ts_epoch = _parse_timestamp_to_epoch(obj.get("timestamp"))
 
     obj_type = obj.get("type")
     payload = obj.get("payload") or {}
+    if not isinstance(payload, dict):
+        return None, ts_epoch
 
     if obj_type == "event_msg":
         if payload.get("type") in ("agent_message", "assistant_message"):
@@ -98,6 +792,143 @@ def extract_assistant_event(line: str) -> Tuple[Optional[str], Optional[float]]:
     return (_normalize_text(msg) if msg else None), ts_epoch
 
 
+def _content_text(content: object) -> Optional[str]:
+    # Claude message content: a string or a list of blocks, of which only "text" blocks are spoken
+    # (tool_use, tool_result and thinking blocks are not).
+    if isinstance(content, str):
+        return _normalize_text(content)
+    if not isinstance(content, list):
+        return None
+    texts: List[str] = []
+    for item in content:
+        if isinstance(item, dict) and item.get("type") == "text" and isinstance(item.get("text"), str):
+            texts.append(item["text"])
+    return _normalize_text(" ".join(texts)) if texts else None
+
+
+def extract_claude_event(line: Union[str, bytes]) -> Tuple[Optional[str], Optional[float]]:
+    obj = _load_object(line)
+    if obj is None:
+        return None, None
+    ts_epoch = _parse_timestamp_to_epoch(obj.get("timestamp"))
+    # Sidechain entries are subagent transcripts, not replies to the user.
+    if obj.get("type") != "assistant" or obj.get("isSidechain"):
+        return None, ts_epoch
+    message = obj.get("message")
+    if not isinstance(message, dict):
+        return None, ts_epoch
+    return _content_text(message.get("content")), ts_epoch
+
+
+def extract_copilot_event(line: Union[str, bytes]) -> Tuple[Optional[str], Optional[float]]:
+    obj = _load_object(line)
+    if obj is None:
+        return None, None
+    ts_epoch = _parse_timestamp_to_epoch(obj.get("timestamp"))
+    if obj.get("type") != "assistant.message":
+        return None, ts_epoch
+    data = obj.get("data")
+    if not isinstance(data, dict):
+        return None, ts_epoch
+    # Mirrors Session Harbor's Copilot parser; turns that only request tools have empty content.
+    content = data.get("content") or data.get("transformedContent")
+    return (_normalize_text(content) if isinstance(content, str) else None), ts_epoch
+
+
+class SessionSource(abc.ABC):
+    """A tool whose session logs the watcher tails.
+
+    A source supplies its directory layout (root directory and session file name) and a fast path for
+    assistant messages: byte markers for the raw-line prefilter, the prefilter window, and the extractor
+    that turns a line into (message, timestamp epoch).
+    """
+
+    name = ""
+    markers: Tuple[bytes, ...] = ()
+    file_name: Optional[str] = None
+
+    def __init__(self, root: str, window: int = 0) -> None:
+        self.root = root
+        self.window = window
+
+    def matches(self, name: str) -> bool:
+        return is_session_file(name, self.file_name)
+
+    def might_be_assistant_event(self, raw: bytes) -> bool:
+        return might_be_assistant_event(raw, self.window, self.markers)
+
+    @abc.abstractmethod
+    def extract(self, line: Union[str, bytes]) -> Tuple[Optional[str], Optional[float]]:
+        """(message, timestamp epoch) of a line; message is None unless it is an assistant reply."""
+
+    def describe(self, path: str) -> str:
+        return f"{self.name}:{os.path.relpath(path, self.root)}"
+
+
+class CodexSource(SessionSource):
+    name = "codex"
+    markers = _ASSISTANT_MARKERS
+
+    def __init__(self, root: str, window: int = PREFILTER_WINDOW) -> None:
+        super().__init__(root, window)
+
+    def extract(self, line: Union[str, bytes]) -> Tuple[Optional[str], Optional[float]]:
+        return extract_assistant_event(line)
+
+
+class ClaudeSource(SessionSource):
+    # Claude Code writes compact JSON and puts the top-level "type" after the message body, so the
+    # marker is the message role and whole lines are scanned. Quotes inside string values are escaped,
+    # so the marker only matches the structural key.
+    name = "claude"
+    markers = (b'"role":"assistant"',)
+
+    def extract(self, line: Union[str, bytes]) -> Tuple[Optional[str], Optional[float]]:
+        return extract_claude_event(line)
+
+
+class CopilotSource(SessionSource):
+    name = "copilot"
+    markers = (b'"assistant.message"',)
+    file_name = "events.jsonl"
+
+    def extract(self, line: Union[str, bytes]) -> Tuple[Optional[str], Optional[float]]:
+        return extract_copilot_event(line)
+
+
+def _default_source_roots(codex_home: str) -> Dict[str, str]:
+    claude_home = os.environ.get("CLAUDE_CONFIG_DIR") or os.path.expanduser("~/.claude")
+    return {
+        "codex": os.path.join(codex_home, "sessions"),
+        "claude": os.environ.get("CODEX_TTS_CLAUDE_DIR") or os.path.join(claude_home, "projects"),
+        "copilot": os.environ.get("CODEX_TTS_COPILOT_DIR") or os.path.expanduser("~/.copilot/session-state"),
+    }
+
+
+SOURCE_TYPES: Dict[str, Callable[[str], SessionSource]] = {
+    "codex": CodexSource,
+    "claude": ClaudeSource,
+    "copilot": CopilotSource,
+}
+
+
+def load_sources(codex_home: str) -> Tuple[List[SessionSource], List[str]]:
+    # CODEX_TTS_SOURCES is a comma-separated list of source names, or "all"; defaults to Codex only.
+    # Returns the sources and any unknown names.
+    raw = os.environ.get("CODEX_TTS_SOURCES", "codex").strip().lower()
+    names = list(SOURCE_TYPES) if raw == "all" else [n.strip() for n in raw.split(",") if n.strip()]
+    roots = _default_source_roots(codex_home)
+    sources: List[SessionSource] = []
+    unknown: List[str] = []
+    for name in names:
+        factory = SOURCE_TYPES.get(name)
+        if factory is None:
+            unknown.append(name)
+        elif all(s.name != name for s in sources):
+            sources.append(factory(roots[name]))
+    return sources or [CodexSource(roots["codex"])], unknown
+
+
 def _parse_start_epoch() -> float:
     start_epoch_env = os.environ.get("CODEX_TTS_START_EPOCH")
     if start_epoch_env:
@@ -115,45 +946,702 @@ def _parse_start_epoch() -> float:
     return time.time()
 
 
-def _read_rate_state(path: str, now: float, window_seconds: int) -> List[float]:
-    try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            raw = [ln.strip() for ln in f.readlines() if ln.strip()]
-    except FileNotFoundError:
-        return []
-    except Exception:
-        return []
+class Inotify:
+    """Minimal ctypes binding for Linux inotify (no third-party dependency)."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    DIR_MASK = (
+        IN_MODIFY
+        | IN_CLOSE_WRITE
+        | IN_CREATE
+        | IN_MOVED_TO
+        | IN_MOVED_FROM
+        | IN_DELETE
+        | IN_DELETE_SELF
+        | IN_MOVE_SELF
+        | IN_ONLYDIR
+    )
+
+    _EVENT_HEADER = struct.Struct("iIII")
 
-    stamps: List[float] = []
-    for ln in raw[-2000:]:
+    def __init__(self) -> None:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._libc = libc
+        self._ctypes = ctypes
+        # IN_NONBLOCK | IN_CLOEXEC share values with O_NONBLOCK | O_CLOEXEC.
+        fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+        self.wd_to_dir: Dict[int, str] = {}
+        self.dir_to_wd: Dict[str, int] = {}
+
+    @staticmethod
+    def available() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
         try:
-            stamps.append(float(ln))
+            import ctypes
+            import ctypes.util
+
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or None)
+            return hasattr(libc, "inotify_init1")
         except Exception:
-            continue
-    cutoff = now - float(window_seconds)
-    return [t for t in stamps if t >= cutoff]
+            return False
 
+    def add_dir(self, path: str) -> bool:
+        if path in self.dir_to_wd:
+            return True
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.DIR_MASK)
+        if wd < 0:
+            return False
+        self.wd_to_dir[wd] = path
+        self.dir_to_wd[path] = wd
+        return True
 
-def _write_rate_state(path: str, stamps: List[float]) -> None:
-    tmp = f"{path}.tmp"
-    try:
+    def wait(self, timeout: float) -> bool:
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+        return bool(poller.poll(max(0, int(timeout * 1000))))
+
+    def read_events(self) -> List[Tuple[str, int, str]]:
+        """Drain pending events as (directory, mask, name) tuples."""
+        events: List[Tuple[str, int, str]] = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            pos = 0
+            header = self._EVENT_HEADER
+            while pos + header.size <= len(data):
+                wd, mask, _cookie, name_len = header.unpack_from(data, pos)
+                pos += header.size
+                name = data[pos : pos + name_len].rstrip(b"\0").decode("utf-8", errors="surrogateescape")
+                pos += name_len
+                if mask & self.IN_IGNORED:
+                    stale = self.wd_to_dir.pop(wd, None)
+                    if stale is not None and self.dir_to_wd.get(stale) == wd:
+                        del self.dir_to_wd[stale]
+                    continue
+                directory = self.wd_to_dir.get(wd, "")
+                events.append((directory, mask, name))
+        return events
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except Exception:
+            pass
+
+
+def _resolve_watch_mode() -> str:
+    # auto: inotify where the kernel supports it (Linux), otherwise the polling loop.
+    mode = os.environ.get("CODEX_TTS_WATCH_MODE", "auto").strip().lower()
+    if mode == "poll":
+        return "poll"
+    if Inotify.available():
+        return "inotify"
+    return "poll"
+
+
+class RateLimiter:
+    """Sliding-window cap on messages per hour, O(1) per check.
+
+    The last `RING` send timestamps live in a ring buffer: the budget is spent when the stamp written
+    `max_per_hour` sends ago is still inside the window, so `max_per_hour` cannot exceed `RING`. With
+    `state_path`, the ring is a small fixed-size mmap'd file guarded by flock, so several processes share one
+    budget and it survives restarts.
+    """
+
+    RING = 4096
+    MAGIC = b"CTTSRL01"
+    # magic, total stamps ever written (ring head), ring capacity
+    _HEADER = struct.Struct("<8sQQ")
+    _STAMP = struct.Struct("<d")
+
+    def __init__(self, max_per_hour: int, window_seconds: float = 3600.0, state_path: Optional[str] = None) -> None:
+        if max_per_hour > self.RING:
+            raise ValueError(f"max_per_hour={max_per_hour} exceeds the rate limiter's capacity of {self.RING}")
+        self.max_per_hour = max_per_hour
+        self.window_seconds = window_seconds
+        self._size = self._HEADER.size + self.RING * self._STAMP.size
+        self._fd: Optional[int] = None
+        self._buf: Any = None
+        if state_path:
+            try:
+                self._open_shared(state_path)
+            except Exception:
+                self._close_fd()
+        if self._buf is None:
+            self._buf = bytearray(self._size)
+            self._HEADER.pack_into(self._buf, 0, self.MAGIC, 0, self.RING)
+
+    @property
+    def shared(self) -> bool:
+        return self._fd is not None
+
+    def _open_shared(self, path: str) -> None:
+        import fcntl
+        import mmap
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            with os.fdopen(os.dup(self._fd), "rb") as f:
+                head = f.read(self._HEADER.size)
+                magic, _, capacity = self._HEADER.unpack(head) if len(head) == self._HEADER.size else (b"", 0, 0)
+                if magic != self.MAGIC or capacity != self.RING:
+                    # First run (or the old one-timestamp-per-line text format): rebuild in place.
+                    f.seek(0)
+                    legacy = f.read()
+                    self._initialize(legacy if magic != self.MAGIC else b"")
+            self._buf = mmap.mmap(self._fd, self._size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _initialize(self, legacy: bytes) -> None:
+        stamps: List[float] = []
+        for ln in legacy.decode("utf-8", errors="ignore").splitlines()[-self.RING :]:
+            try:
+                stamps.append(float(ln.strip()))
+            except ValueError:
+                continue
+        buf = bytearray(self._size)
+        self._HEADER.pack_into(buf, 0, self.MAGIC, len(stamps), self.RING)
+        for i, ts in enumerate(stamps):
+            self._STAMP.pack_into(buf, self._HEADER.size + i * self._STAMP.size, ts)
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, bytes(buf), 0)
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except Exception:
+                pass
+            self._fd = None
+
+    def _stamp_at(self, n: int) -> float:
+        return self._STAMP.unpack_from(self._buf, self._HEADER.size + (n % self.RING) * self._STAMP.size)[0]
+
+    def try_acquire(self, now: float) -> bool:
+        if self.max_per_hour <= 0:
+            return False
+        if self._fd is not None:
+            import fcntl
+
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            _, head, _ = self._HEADER.unpack_from(self._buf, 0)
+            if head >= self.max_per_hour and self._stamp_at(head - self.max_per_hour) >= now - self.window_seconds:
+                return False
+            self._STAMP.pack_into(self._buf, self._HEADER.size + (head % self.RING) * self._STAMP.size, now)
+            self._HEADER.pack_into(self._buf, 0, self.MAGIC, head + 1, self.RING)
+            return True
+        finally:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class DedupWindow:
+    """Recently spoken messages, as fixed-size digests with a time-to-live.
+
+    Each message is reduced to a 64-bit blake2b digest (optionally keyed by session, so identical short
+    replies in different sessions are not suppressed). Entries expire after `ttl` seconds and the oldest
+    are dropped beyond `capacity`, so memory stays constant and each check is O(1).
+    """
+
+    def __init__(self, ttl: float = 900.0, capacity: int = 1024, per_session: bool = False) -> None:
+        self.ttl = ttl
+        self.capacity = max(1, capacity)
+        self.per_session = per_session
+        # digest -> expiry; insertion order is expiry order because the TTL is fixed.
+        self._seen: "OrderedDict[int, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _digest(self, msg: str, session: str) -> int:
+        h = hashlib.blake2b(digest_size=8)
+        if self.per_session:
+            h.update(session.encode("utf-8", errors="surrogatepass"))
+            h.update(b"\0")
+        h.update(msg.encode("utf-8", errors="surrogatepass"))
+        return int.from_bytes(h.digest(), "big")
+
+    def check(self, msg: str, session: str, now: float) -> bool:
+        """Record `msg` and return True if it was not seen within the window."""
+        seen = self._seen
+        while seen:
+            digest, expires = next(iter(seen.items()))
+            if expires > now:
+                break
+            seen.popitem(last=False)
+        digest = self._digest(msg, session)
+        if digest in seen:
+            return False
+        seen[digest] = now + self.ttl
+        while len(seen) > self.capacity:
+            seen.popitem(last=False)
+        return True
+
+
+class Coalescer:
+    """Per-session debounce for streamed assistant messages.
+
+    A session's messages are held until it has been quiet for `window` seconds (or its first held message
+    is `max_wait` seconds old), then only the latest one (mode "latest") or all of them joined (mode
+    "merge") is emitted. Agents often stream several agent_message events per turn; this makes the final
+    one the one that is spoken and keeps the others from spending TTS calls and hourly budget.
+
+    Each key also keeps the file offset of its first held message, so checkpoints can treat held
+    messages as unread and a restart reads them again instead of losing them.
+    """
+
+    def __init__(self, window: float, max_wait: float = 10.0, mode: str = "latest") -> None:
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self.mode = mode if mode in ("latest", "merge") else "latest"
+        # key -> [message, first_seen, last_seen, held_count, offset of the first held message]
+        self._pending: Dict[str, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, key: str, msg: str, now: float, offset: Optional[int] = None) -> None:
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = [msg, now, now, 1, offset]
+            return
+        entry[0] = f"{entry[0]} {msg}" if self.mode == "merge" else msg
+        entry[2] = now
+        entry[3] += 1
+
+    def held_offset(self, key: str) -> Optional[int]:
+        entry = self._pending.get(key)
+        return entry[4] if entry is not None else None
+
+    def next_deadline(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return min(min(e[2] + self.window, e[1] + self.max_wait) for e in self._pending.values())
+
+    def due(self, now: float) -> List[Tuple[str, str, int]]:
+        ready: List[Tuple[str, str, int]] = []
+        for key, entry in list(self._pending.items()):
+            if now - entry[2] >= self.window or now - entry[1] >= self.max_wait:
+                del self._pending[key]
+                ready.append((key, entry[0], entry[3]))
+        return ready
+
+
+class Metrics:
+    """In-process counters, gauges and latency histograms for the watcher's hot path.
+
+    Counters and histograms are updated under one lock (workers record dispatch latency); gauges are
+    callables sampled when a snapshot is taken. Snapshots are served as JSON on a Unix socket and/or
+    rendered in the Prometheus text format for the node_exporter textfile collector.
+    """
+
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    PREFIX = "codex_tts_"
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        # name -> [per-bucket counts (last one is +Inf), sum, count]
+        self._histograms: Dict[str, List[Any]] = {}
+
+    def inc(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        self._gauges[name] = fn
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = [[0] * (len(self.BUCKETS) + 1), 0.0, 0]
+            i = 0
+            while i < len(self.BUCKETS) and seconds > self.BUCKETS[i]:
+                i += 1
+            hist[0][i] += 1
+            hist[1] += seconds
+            hist[2] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        gauges: Dict[str, float] = {"uptime_seconds": round(time.time() - self.started, 3)}
+        for name, fn in self._gauges.items():
+            try:
+                gauges[name] = fn()
+            except Exception:
+                continue
+        with self._lock:
+            counters = dict(self._counters)
+            histograms: Dict[str, Any] = {}
+            for name, (counts, total, count) in self._histograms.items():
+                cumulative = 0
+                buckets = []
+                for le, n in zip(self.BUCKETS + (float("inf"),), counts):
+                    cumulative += n
+                    buckets.append(["+Inf" if le == float("inf") else le, cumulative])
+                histograms[name] = {"buckets": buckets, "sum": total, "count": count}
+        return {"pid": os.getpid(), "counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def prometheus(self) -> str:
+        snap = self.snapshot()
+        out: List[str] = []
+        for name, value in sorted(snap["counters"].items()):
+            out.append(f"# TYPE {self.PREFIX}{name} counter")
+            out.append(f"{self.PREFIX}{name} {value}")
+        for name, value in sorted(snap["gauges"].items()):
+            out.append(f"# TYPE {self.PREFIX}{name} gauge")
+            out.append(f"{self.PREFIX}{name} {value}")
+        for name, hist in sorted(snap["histograms"].items()):
+            out.append(f"# TYPE {self.PREFIX}{name} histogram")
+            for le, n in hist["buckets"]:
+                out.append(f'{self.PREFIX}{name}_bucket{{le="{le}"}} {n}')
+            out.append(f"{self.PREFIX}{name}_sum {hist['sum']:.6f}")
+            out.append(f"{self.PREFIX}{name}_count {hist['count']}")
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        # The textfile collector may read at any moment, so replace the file atomically.
+        tmp = f"{path}.tmp"
         with open(tmp, "w", encoding="utf-8") as f:
-            for t in stamps[-2000:]:
-                f.write(f"{t}\n")
+            f.write(self.prometheus())
         os.replace(tmp, path)
+
+    def serve(self, path: str, debug: Callable[[str], None]) -> Optional[socket.socket]:
+        """Answer every connection on the Unix socket `path` with one JSON snapshot line."""
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(path)
+            os.chmod(path, 0o600)
+            sock.listen(8)
+        except Exception as exc:
+            debug(f"error opening stats socket {path}: {exc!r}")
+            return None
+
+        def run() -> None:
+            while True:
+                try:
+                    conn, _ = sock.accept()
+                except OSError:
+                    return
+                try:
+                    conn.settimeout(1.0)
+                    conn.sendall(json.dumps(self.snapshot(), separators=(",", ":")).encode("utf-8") + b"\n")
+                except Exception:
+                    pass
+                finally:
+                    conn.close()
+
+        threading.Thread(target=run, name="stats-socket", daemon=True).start()
+        return sock
+
+
+def _load_env_file(path: str) -> Dict[str, str]:
+    # Equivalent of `set -a; source .env` for the KEY=VALUE files Session Harbor writes.
+    values: Dict[str, str] = {}
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            lines = f.readlines()
     except Exception:
+        return values
+    for ln in lines:
+        ln = ln.strip()
+        if not ln or ln.startswith("#"):
+            continue
+        if ln.startswith("export "):
+            ln = ln[len("export ") :].strip()
+        key, sep, value = ln.partition("=")
+        key = key.strip()
+        if not sep or not key:
+            continue
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
+            value = value[1:-1]
+        values[key] = value
+    return values
+
+
+class Notifier:
+    """In-process port of codex-notify-tts.sh: payload handling, text cleanup, TTS generation and playback.
+
+    Doing this inside the watcher saves the three helper `python3` interpreters the shell script starts per
+    message; only the TTS generator itself (and the player) still run as child processes.
+    """
+
+    def __init__(
+        self,
+        codex_home: str,
+        log_file: str,
+        dry_run: bool,
+        debug: Callable[[str], None],
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.codex_home = codex_home
+        self.metrics = metrics
+        self.log_file = log_file
+        self.dry_run = dry_run
+        self.debug = debug
+        self.notify_log = os.environ.get("CODEX_TTS_NOTIFY_LOG_FILE", "/tmp/codex-notify-tts.log")
+        self.tts_gen = os.path.join(codex_home, "skills", "speech", "scripts", "text_to_speech.py")
+        self._env_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clean_text(msg: str) -> str:
+        msg = re.sub(r"```.*?```", "", msg, flags=re.S)
+        msg = " ".join(msg.split())
+        if len(msg) > 4000:
+            msg = msg[:3997] + "..."
+        return msg
+
+    def _notify_log(self, line: str) -> None:
+        with self._lock:
+            with open(self.notify_log, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _env(self, env_file: str) -> Dict[str, str]:
         try:
-            if os.path.exists(tmp):
-                os.remove(tmp)
-        except Exception:
-            pass
+            mtime = os.path.getmtime(env_file)
+        except OSError:
+            return dict(os.environ)
+        cached = self._env_cache.get(env_file)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, _load_env_file(env_file))
+            self._env_cache[env_file] = cached
+        env = dict(os.environ)
+        env.update(cached[1])
+        return env
+
+    def _out_file(self, out_dir: str) -> str:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        dt = datetime.datetime.now().astimezone()
+        stamp = dt.strftime("%Y%m%d_%H%M%S_") + f"{dt.microsecond // 1000:03d}"
+        return os.path.join(out_dir, f"codex_notify_{stamp}_{os.getpid()}_{seq}.mp3")
+
+    def speak(self, msg: str, cwd: Optional[str] = None) -> None:
+        # Base dir selection mirrors the shell script: explicit override, then the payload cwd, then our cwd.
+        base_dir = os.environ.get("CODEX_TTS_BASE_DIR") or (cwd.strip() if cwd and cwd.strip() else os.getcwd())
+        env_file = os.environ.get("CODEX_TTS_ENV_PATH") or os.path.join(base_dir, ".env")
+
+        if not os.path.isfile(self.tts_gen):
+            return
+        text = self.clean_text(msg)
+        if not text:
+            return
+
+        if self.dry_run:
+            self._notify_log(f"DRY RUN: {text}")
+            return
+
+        env = self._env(env_file)
+        if not env.get("OPENAI_API_KEY"):
+            err = (
+                f"ERROR: OPENAI_API_KEY is not set. Looked for env file: {env_file}. "
+                "Set OPENAI_API_KEY or set CODEX_TTS_ENV_PATH."
+            )
+            self._notify_log(err)
+            self.debug(err)
+            return
+
+        out_dir = env.get("CODEX_TTS_OUT_DIR") or os.path.join(base_dir, "output", "speech")
+        os.makedirs(out_dir, exist_ok=True)
+        out_file = self._out_file(out_dir)
+        cmd = [
+            "python3",
+            self.tts_gen,
+            "speak",
+            "--input",
+            text,
+            "--voice",
+            "cedar",
+            "--instructions",
+            "Voice Affect: Warm and composed. Tone: Neutral and clear. Pacing: Steady.",
+            "--response-format",
+            "mp3",
+            "--out",
+            out_file,
+        ]
+        spawned = time.monotonic()
+        with open(self.log_file, "a", encoding="utf-8") as lf:
+            result = subprocess.run(cmd, stdout=lf, stderr=lf, env=env)
+        if self.metrics is not None:
+            self.metrics.observe("tts_generate_seconds", time.monotonic() - spawned)
+        if result.returncode != 0:
+            self.debug(f"TTS generator exited with {result.returncode}")
+            return
+
+        player = env.get("CODEX_TTS_PLAYER") or "afplay"
+        # Leave a breadcrumb even when using afplay, so it's obvious what player mode is active.
+        self._notify_log(f"INFO: generated {out_file} (player={player})")
+        if player == "music":
+            self._play_music(out_file)
+        elif player == "afplay" and shutil.which("afplay"):
+            subprocess.Popen(["afplay", out_file], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _play_music(self, out_file: str) -> None:
+        # Requires Automation permission for whatever runs the watcher (System Settings -> Privacy & Security).
+        # Keep the user's focus: launch/play in Music, then re-activate the previously frontmost app.
+        self._notify_log(f"INFO: attempting Music playback: {out_file}")
+        posix_file = out_file.replace("\\", "\\\\").replace('"', '\\"')
+        script = f"""tell application "System Events"
+  set frontApp to name of first application process whose frontmost is true
+end tell
+
+tell application "Music"
+  if it is not running then
+    launch
+  end if
+  set t to add (POSIX file "{posix_file}")
+  play t
+end tell
+
+if frontApp is not "Music" then
+  tell application frontApp to activate
+end if
+"""
+        try:
+            result = subprocess.run(["/usr/bin/osascript"], input=script, capture_output=True, text=True)
+            music_err = (result.stdout + result.stderr).strip()
+        except Exception as exc:
+            music_err = repr(exc)
+        if music_err:
+            self._notify_log(f"ERROR: Music playback failed: {music_err}")
+
+
+class _Dispatch:
+    __slots__ = ("msg", "cwd", "source", "enqueued")
+
+    def __init__(self, msg: str, cwd: Optional[str], source: str) -> None:
+        self.msg = msg
+        self.cwd = cwd
+        self.source = source
+        self.enqueued = time.monotonic()
+
+
+class Dispatcher:
+    """Bounded queue feeding a fixed pool of long-lived notifier threads.
+
+    When the queue is full, `policy` decides what happens to a new message: drop-oldest (default) makes
+    room by discarding the oldest queued one, drop-newest discards the new one, merge appends it to the
+    last queued message and block applies backpressure to the tail loop until a worker frees a slot.
+    """
+
+    POLICIES = ("drop-oldest", "drop-newest", "merge", "block")
+
+    def __init__(
+        self,
+        handler: Callable[[str, Optional[str]], None],
+        debug: Callable[[str], None],
+        workers: int = 2,
+        max_queue: int = 8,
+        policy: str = "drop-oldest",
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.handler = handler
+        self.debug = debug
+        self.metrics = metrics
+        self.max_queue = max(1, max_queue)
+        self.policy = policy if policy in self.POLICIES else "drop-oldest"
+        self._queue: Deque[_Dispatch] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"tts-worker-{i}", daemon=True) for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def submit(self, msg: str, cwd: Optional[str], source: str) -> str:
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                if self.policy == "drop-newest":
+                    return "dropped"
+                if self.policy == "merge":
+                    last = self._queue[-1]
+                    last.msg = f"{last.msg} {msg}"
+                    return "merged"
+                if self.policy == "block":
+                    while len(self._queue) >= self.max_queue and not self._closed:
+                        self._cond.wait()
+                else:
+                    dropped = self._queue.popleft()
+                    self.debug(f"queue full; dropped oldest msg: {dropped.msg[:80]}")
+            self._queue.append(_Dispatch(msg, cwd, source))
+            self._cond.notify_all()
+            return "queued"
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queue:
+                    return
+                item = self._queue.popleft()
+                # Wake a producer blocked on a full queue.
+                self._cond.notify_all()
+            started = time.monotonic()
+            try:
+                self.handler(item.msg, item.cwd)
+            except Exception as exc:
+                if self.metrics is not None:
+                    self.metrics.inc("dispatch_errors_total")
+                self.debug(f"error notifying for {item.source}: {exc!r}")
+                self.debug(traceback.format_exc().rstrip())
+                continue
+            done = time.monotonic()
+            if self.metrics is not None:
+                self.metrics.observe("dispatch_queue_seconds", started - item.enqueued)
+                self.metrics.observe("dispatch_seconds", done - item.enqueued)
+            self.debug(
+                f"dispatched msg from {os.path.basename(item.source)}: "
+                f"queued {1000 * (started - item.enqueued):.1f}ms, total {1000 * (done - item.enqueued):.1f}ms"
+            )
 
 
 def main() -> int:
     codex_home = os.environ.get("CODEX_HOME", os.path.expanduser("~/.codex"))
-    tts_script = os.path.join(os.path.dirname(__file__), "codex-notify-tts.sh")
-    if not os.path.isfile(tts_script):
-        return 1
 
     log_file = os.environ.get("CODEX_TTS_LOG_FILE", "/tmp/codex-session-watch-tts.log")
     debug_enabled = os.environ.get("CODEX_TTS_DEBUG") == "1"
@@ -191,31 +1679,58 @@ def main() -> int:
             pass
 
     atexit.register(_cleanup_lock)
+    # Session Harbor stops the watcher with SIGTERM; exit normally so atexit handlers (lock cleanup,
+    # flushing the debug log) still run.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
     # Rate limiting: hard cap on messages generated per rolling hour.
     try:
         max_per_hour = int(os.environ.get("CODEX_TTS_MAX_PER_HOUR", "60"))
     except Exception:
         max_per_hour = 60
+    # The limiter remembers at most RateLimiter.RING sends, so larger caps are lowered (and reported) here.
+    max_per_hour_note = ""
+    if max_per_hour > RateLimiter.RING:
+        max_per_hour_note = f"CODEX_TTS_MAX_PER_HOUR={max_per_hour} exceeds {RateLimiter.RING}; capping at {RateLimiter.RING}"
+        sys.stderr.write(f"codex-session-watch-tts: {max_per_hour_note}\n")
+        max_per_hour = RateLimiter.RING
     try:
         min_seconds_between = int(os.environ.get("CODEX_TTS_MIN_SECONDS_BETWEEN", "5"))
     except Exception:
         min_seconds_between = 5
     rate_state_file = os.environ.get("CODEX_TTS_RATE_STATE_FILE", "/tmp/codex-tts-rate-state.txt")
+    # The hourly budget is shared through the state file unless CODEX_TTS_RATE_SHARED=0.
+    rate_shared = os.environ.get("CODEX_TTS_RATE_SHARED", "1") != "0"
+    limiter = RateLimiter(max_per_hour, state_path=rate_state_file if rate_shared else None)
     last_speak_ts = 0.0
 
+    logger: Optional[BufferedLog] = None
+    if debug_enabled:
+        try:
+            log_max_bytes = int(os.environ.get("CODEX_TTS_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+        except Exception:
+            log_max_bytes = 5 * 1024 * 1024
+        logger = BufferedLog(log_file, max_bytes=log_max_bytes)
+        atexit.register(logger.close)
+
     def debug(msg: str) -> None:
-        if not debug_enabled:
+        if logger is None:
             return
-        ts = time.strftime("%Y-%m-%d %H:%M:%S")
-        with open(log_file, "a", encoding="utf-8") as lf:
-            lf.write(f"[{ts}] {msg}\n")
+        logger.write(msg)
 
+    metrics = Metrics()
+
+    sources, unknown_sources = load_sources(codex_home)
     debug(
-        f"pid={os.getpid()} start_epoch={start_epoch} dry_run={int(dry_run)} "
+        f"pid={os.getpid()} start_epoch={start_epoch} dry_run={int(dry_run)} json={JSON_BACKEND} "
+        f"sources={','.join(s.name for s in sources)} "
         f"max_per_hour={max_per_hour} min_seconds_between={min_seconds_between} "
-        f"max_files={os.environ.get('CODEX_TTS_MAX_FILES','0')}"
+        f"max_files={os.environ.get('CODEX_TTS_MAX_FILES','0')} rate_shared={int(limiter.shared)}"
     )
+    if max_per_hour_note:
+        debug(max_per_hour_note)
+    if unknown_sources:
+        debug(f"ignoring unknown sources: {','.join(unknown_sources)} (known: {','.join(SOURCE_TYPES)})")
 
     def allow_speak() -> bool:
         nonlocal last_speak_ts
@@ -223,126 +1738,643 @@ def main() -> int:
             return False
         now = time.time()
         if min_seconds_between > 0 and (now - last_speak_ts) < float(min_seconds_between):
-            return False
-
-        stamps = _read_rate_state(rate_state_file, now=now, window_seconds=3600)
-        if len(stamps) >= max_per_hour:
-            debug(f"rate-limited: {len(stamps)}/{max_per_hour} in last hour")
+            metrics.inc("throttled_total")
             return False
 
         # Enforce the cap even in dry-run so tests can't spam.
-        stamps.append(now)
-        _write_rate_state(rate_state_file, stamps)
+        if not limiter.try_acquire(now):
+            metrics.inc("rate_limited_total")
+            debug(f"rate-limited: {max_per_hour}/{max_per_hour} in last hour")
+            return False
         last_speak_ts = now
         return True
 
-    offsets: Dict[str, int] = {}
-    buffers: Dict[str, bytes] = {}
-    files: List[str] = []
+    try:
+        hot_dirs = int(os.environ.get("CODEX_TTS_HOT_DIRS", "2"))
+    except Exception:
+        hot_dirs = 2
+    # Poll mode only sees appends to a session outside the hot directories (CODEX_TTS_HOT_DIRS) and the
+    # CODEX_TTS_RECENT_FILES most recently modified ones when the whole history is swept, every
+    # CODEX_TTS_FULL_SCAN_SECONDS; that is the latency for resuming an old session (inotify sees it at
+    # once). A sweep stats every session file: about 50 ms for 12k sessions.
+    try:
+        full_scan_seconds = float(os.environ.get("CODEX_TTS_FULL_SCAN_SECONDS", "30"))
+    except Exception:
+        full_scan_seconds = 30.0
+    try:
+        recent_files = int(os.environ.get("CODEX_TTS_RECENT_FILES", "64"))
+    except Exception:
+        recent_files = 64
+    # One index per source; everything downstream (tailing, rate limiting, dispatch) is shared.
+    indexes: Dict[str, SessionIndex] = {
+        source.name: SessionIndex(
+            source.root,
+            max_files=_max_files_from_env(),
+            hot_dirs=hot_dirs,
+            full_scan_seconds=full_scan_seconds,
+            file_name=source.file_name,
+            recent_files=recent_files,
+        )
+        for source in sources
+    }
+    # CODEX_TTS_SESSION_INDEX names a SQLite session index (session_index.py) that the watcher keeps up to date
+    # from its scans, so other tools (the session-cleanup skill) can query sessions without walking the trees.
+    # Off unless set: the watcher itself never reads the index.
+    index_feeder: Optional[IndexFeeder] = None
+    session_index_path = os.environ.get("CODEX_TTS_SESSION_INDEX") or None
+    if session_index_path:
+        try:
+            index_feeder = IndexFeeder(
+                session_index_path,
+                {source.name: source.root for source in sources},
+                debug,
+                metrics=metrics,
+            )
+        except ImportError as exc:
+            debug(f"session index disabled: {exc!r}")
+
+    # Longest root first so nested roots resolve to the most specific source.
+    by_root = sorted(sources, key=lambda s: len(s.root), reverse=True)
+
+    def source_for(path: str) -> Optional[SessionSource]:
+        for source in by_root:
+            if path == source.root or path.startswith(source.root + os.sep):
+                return source
+        return None
+
+    # Include cwd so the notifier can resolve .env and output paths even when the watcher is run
+    # from some other directory. Allow an explicit override.
+    base_dir = os.environ.get("CODEX_TTS_BASE_DIR") or os.getcwd()
+    try:
+        workers = int(os.environ.get("CODEX_TTS_WORKERS", "2"))
+    except Exception:
+        workers = 2
+    try:
+        max_queue = int(os.environ.get("CODEX_TTS_QUEUE_SIZE", "8"))
+    except Exception:
+        max_queue = 8
+    notifier = Notifier(codex_home, log_file, dry_run, debug, metrics=metrics)
+    dispatcher = Dispatcher(
+        notifier.speak,
+        debug,
+        workers=workers,
+        max_queue=max_queue,
+        policy=os.environ.get("CODEX_TTS_QUEUE_POLICY", "drop-oldest").strip().lower(),
+        metrics=metrics,
+    )
+    atexit.register(dispatcher.close)
+
+    # Debounce per session file: hold streamed messages until the session has been quiet for this long.
+    # 0 (default) speaks every message as soon as it is read.
+    try:
+        coalesce_seconds = float(os.environ.get("CODEX_TTS_COALESCE_SECONDS", "0"))
+    except Exception:
+        coalesce_seconds = 0.0
+    try:
+        coalesce_max_wait = float(os.environ.get("CODEX_TTS_COALESCE_MAX_WAIT_SECONDS", "10"))
+    except Exception:
+        coalesce_max_wait = 10.0
+    coalescer: Optional[Coalescer] = None
+    if coalesce_seconds > 0:
+        coalescer = Coalescer(
+            coalesce_seconds,
+            max_wait=coalesce_max_wait,
+            mode=os.environ.get("CODEX_TTS_COALESCE_MODE", "latest").strip().lower(),
+        )
+
+    try:
+        cold_after = float(os.environ.get("CODEX_TTS_COLD_AFTER_SECONDS", "120"))
+    except Exception:
+        cold_after = 120.0
+    try:
+        cold_interval = float(os.environ.get("CODEX_TTS_COLD_CHECK_SECONDS", "10"))
+    except Exception:
+        cold_interval = 10.0
+    try:
+        max_tracked = int(os.environ.get("CODEX_TTS_MAX_TRACKED", "256"))
+    except Exception:
+        max_tracked = 256
+    try:
+        max_line = int(os.environ.get("CODEX_TTS_MAX_LINE_BYTES", str(4 * 1024 * 1024)))
+    except Exception:
+        max_line = 4 * 1024 * 1024
+    tracked = TrackedFiles(
+        cold_after=cold_after,
+        cold_interval=cold_interval,
+        max_tracked=max_tracked,
+        max_line=max_line,
+    )
+    # Where untracked files have been read up to (inode, offset): files evicted, and files that changed
+    # while outside the CODEX_TTS_MAX_FILES newest. One that changes again resumes there instead of at the
+    # index's last-seen size, which can be a scan (or more) past it. Bounded like the tracked table.
+    unread_from: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
     last_scan = 0.0
 
-    recent: Deque[str] = deque()
-    recent_set: Set[str] = set()
-    max_recent = 50
+    # Offsets are checkpointed every CODEX_TTS_CHECKPOINT_SECONDS (0 disables) so a restart resumes exactly
+    # where the previous run stopped instead of at EOF. A checkpoint older than
+    # CODEX_TTS_CHECKPOINT_MAX_AGE_SECONDS is ignored rather than replaying a long downtime.
+    try:
+        checkpoint_seconds = float(os.environ.get("CODEX_TTS_CHECKPOINT_SECONDS", "5"))
+    except Exception:
+        checkpoint_seconds = 5.0
+    try:
+        checkpoint_max_age = float(os.environ.get("CODEX_TTS_CHECKPOINT_MAX_AGE_SECONDS", "600"))
+    except Exception:
+        checkpoint_max_age = 600.0
+    checkpoint: Optional[Checkpoint] = None
+    resume_at: Optional[float] = None
+    resume: Dict[str, Tuple[int, int, int]] = {}
+    last_checkpoint = time.time()
+    if checkpoint_seconds > 0:
+        checkpoint = Checkpoint(
+            os.environ.get("CODEX_TTS_CHECKPOINT_FILE", "/tmp/codex-session-watch-tts.checkpoint.json")
+        )
+        saved_at, saved = checkpoint.load()
+        if saved_at is not None and 0 <= time.time() - saved_at <= checkpoint_max_age:
+            resume_at, resume = saved_at, saved
+            debug(f"resuming {len(resume)} files from checkpoint saved at {saved_at:.3f}")
+        elif saved_at is not None:
+            debug(f"ignoring stale checkpoint saved at {saved_at:.3f}")
 
-    def remember(msg: str) -> bool:
-        if msg in recent_set:
+    # Suppress repeats (Codex logs each reply as both agent_message and response_item) for
+    # CODEX_TTS_DEDUP_SECONDS, remembering at most CODEX_TTS_DEDUP_SIZE digests. With
+    # CODEX_TTS_DEDUP_PER_SESSION=1 the same text in different sessions is spoken in each.
+    try:
+        dedup_seconds = float(os.environ.get("CODEX_TTS_DEDUP_SECONDS", "900"))
+    except Exception:
+        dedup_seconds = 900.0
+    try:
+        dedup_size = int(os.environ.get("CODEX_TTS_DEDUP_SIZE", "1024"))
+    except Exception:
+        dedup_size = 1024
+    dedup = DedupWindow(
+        ttl=dedup_seconds,
+        capacity=dedup_size,
+        per_session=os.environ.get("CODEX_TTS_DEDUP_PER_SESSION") == "1",
+    )
+
+    def track(
+        path: str,
+        offset: Optional[int] = None,
+        since: Optional[float] = start_epoch,
+        st: Optional[os.stat_result] = None,
+    ) -> Optional[TrackedFile]:
+        source = source_for(path)
+        if source is None:
+            return None
+        try:
+            if st is None:
+                st = os.stat(path)
+        except Exception as exc:
+            debug(f"error tracking {path}: {exc!r}")
+            if debug_enabled:
+                debug(traceback.format_exc().rstrip())
+            return None
+        # Default behavior: do not replay history on discovery.
+        # Start at EOF unless we know where the file ended when we last saw it (or saw it being created).
+        start = st.st_size if offset is None else min(offset, st.st_size)
+        tf = tracked.add(path, st, start, time.time(), source)
+        tf.since = since
+        debug(f"tracking {path}")
+        return tf
+
+    def track_from_checkpoint(path: str, mtime: Optional[float]) -> bool:
+        # Startup with a checkpoint: returns True if the file was tracked from checkpointed state.
+        assert resume_at is not None
+        entry = resume.pop(path, None)
+        if entry is None:
+            if mtime is not None and mtime > resume_at:
+                # Modified while the watcher was down but not tracked then (new, or idle and evicted):
+                # read it all, speaking only what was written after the checkpoint.
+                track(path, offset=0, since=resume_at)
+                return True
             return False
-        recent.append(msg)
-        recent_set.add(msg)
-        if len(recent) > max_recent:
-            old = recent.popleft()
-            if old in recent_set:
-                recent_set.remove(old)
+        ino, _, offset = entry
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_ino == ino and st.st_size >= offset:
+            # Same file, not truncated: resume exactly, no timestamp filtering needed.
+            track(path, offset=offset, since=None, st=st)
+        else:
+            debug(f"checkpointed file replaced or truncated: {path}")
+            track(path, offset=0, since=resume_at, st=st)
         return True
 
-    while True:
-        now = time.time()
-        if now - last_scan > 2:
-            files = session_files(codex_home)
-            last_scan = now
-            debug(f"scanned {len(files)} session files")
+    def track_moved_in(path: str, source: SessionSource) -> Optional[TrackedFile]:
+        # A file renamed into the tree (e.g. restored from Archive/) holds history, not new output: resume
+        # where the checkpoint or the index last saw this same file end, else start at EOF.
+        try:
+            st = os.stat(path)
+        except OSError as exc:
+            debug(f"error tracking {path}: {exc!r}")
+            return None
+        entry = resume.pop(path, None)
+        if entry is not None and entry[0] == st.st_ino:
+            return track(path, offset=entry[2], st=st)
+        known = indexes[source.name].stats([path])[path]
+        if known is not None and known.st_ino == st.st_ino:
+            return track(path, offset=known.st_size, st=st)
+        return track(path, st=st)
 
-        if not files:
-            time.sleep(0.5)
-            continue
+    def checkpoint_offset(tf: TrackedFile) -> int:
+        # Messages still held by the coalescer have not been spoken: resume before the first of them.
+        offset = tf.resume_offset()
+        if coalescer is not None:
+            held = coalescer.held_offset(tf.path)
+            if held is not None and held < offset:
+                offset = held
+        return offset
 
-        for path in files:
-            if path not in offsets:
+    def save_checkpoint(now: float) -> None:
+        nonlocal last_checkpoint
+        if checkpoint is None:
+            return
+        last_checkpoint = now
+        files = {tf.path: (tf.ino, tf.size, checkpoint_offset(tf)) for tf in tracked}
+        try:
+            if checkpoint.save(files, now):
+                metrics.inc("checkpoint_writes_total")
+                debug(f"checkpointed {len(files)} files")
+        except Exception as exc:
+            debug(f"error writing checkpoint {checkpoint.path}: {exc!r}")
+
+    if checkpoint is not None:
+        # Runs before the lock is removed and the debug log is closed (atexit is last-in, first-out).
+        atexit.register(lambda: save_checkpoint(time.time()))
+
+    # Health: CODEX_TTS_STATS_SOCKET answers each connection with a JSON snapshot, and
+    # CODEX_TTS_METRICS_FILE is rewritten in the Prometheus text format every CODEX_TTS_METRICS_SECONDS.
+    metrics.gauge("files_indexed", lambda: sum(len(index) for index in indexes.values()))
+    metrics.gauge("files_tracked", lambda: len(tracked))
+    metrics.gauge("files_hot", tracked.hot_count)
+    metrics.gauge("dispatch_queue_depth", dispatcher.depth)
+    metrics.gauge("dedup_entries", lambda: len(dedup))
+    if coalescer is not None:
+        metrics.gauge("coalesce_pending", lambda: len(coalescer))
+    metrics_file = os.environ.get("CODEX_TTS_METRICS_FILE") or None
+    try:
+        metrics_seconds = float(os.environ.get("CODEX_TTS_METRICS_SECONDS", "15"))
+    except Exception:
+        metrics_seconds = 15.0
+    last_metrics = 0.0
+    stats_socket_path = os.environ.get("CODEX_TTS_STATS_SOCKET") or None
+    if stats_socket_path:
+        stats_socket = metrics.serve(stats_socket_path, debug)
+        if stats_socket is not None:
+
+            def _close_stats_socket() -> None:
                 try:
-                    with open(path, "rb") as f:
-                        f.seek(0, os.SEEK_END)
-                        size = f.tell()
-                        # Default behavior: do not replay history on discovery.
-                        # Set offset to EOF; we'll only process new lines appended after startup.
-                        data = b""
-                        offsets[path] = size
-                    buffers[path] = b""
-                    debug(f"tracking {path}")
-                except Exception as exc:
-                    debug(f"error tracking {path}: {exc!r}")
-                    if debug_enabled:
-                        debug(traceback.format_exc().rstrip())
-                    continue
-                continue
+                    stats_socket.close()
+                    os.remove(stats_socket_path)
+                except Exception:
+                    pass
+
+            atexit.register(_close_stats_socket)
+
+    def periodic(now: float) -> None:
+        # Housekeeping run from the main loop: offset checkpoint and the metrics textfile.
+        nonlocal last_metrics
+        if checkpoint is not None and now - last_checkpoint >= checkpoint_seconds:
+            save_checkpoint(now)
+        if metrics_file and now - last_metrics >= metrics_seconds:
+            last_metrics = now
+            try:
+                metrics.write_textfile(metrics_file)
+            except Exception as exc:
+                debug(f"error writing metrics {metrics_file}: {exc!r}")
+
+    def next_periodic() -> Optional[float]:
+        deadlines = []
+        if checkpoint is not None:
+            deadlines.append(last_checkpoint + checkpoint_seconds)
+        if metrics_file:
+            deadlines.append(last_metrics + metrics_seconds)
+        return min(deadlines) if deadlines else None
 
+    def track_changed(path: str, offset: Optional[int]) -> Optional[TrackedFile]:
+        # An untracked file that changed: resume where it was last read up to if it is still the same file,
+        # else at `offset`.
+        entry = unread_from.pop(path, None)
+        if entry is not None:
             try:
-                with open(path, "rb") as f:
-                    f.seek(offsets[path])
-                    data = f.read()
+                st = os.stat(path)
+            except OSError as exc:
+                debug(f"error tracking {path}: {exc!r}")
+                return None
+            if st.st_ino == entry[0] and st.st_size >= entry[1]:
+                return track(path, offset=entry[1], st=st)
+        return track(path, offset=offset)
+
+    def leave_unread(path: str, ino: int, offset: int) -> None:
+        unread_from[path] = (ino, offset)
+        unread_from.move_to_end(path)
+        while len(unread_from) > max(tracked.max_tracked, 1):
+            unread_from.popitem(last=False)
+
+    def evict(max_per_source: int = 0) -> None:
+        for tf in tracked.evict(max_per_source):
+            leave_unread(tf.path, tf.ino, tf.resume_offset())
+            debug(f"evicted idle {tf.path}")
+
+    def untrack(path: str, reason: str) -> None:
+        if path in tracked:
+            tracked.remove(path)
+            debug(f"untracking {path} ({reason})")
+
+    def poll_file(tf: TrackedFile, now: float) -> None:
+        # One stat decides whether there is anything to read; unchanged files are never opened.
+        try:
+            st = os.stat(tf.path)
+        except FileNotFoundError:
+            untrack(tf.path, "deleted or moved")
+            return
+        except Exception as exc:
+            debug(f"error reading {tf.path}: {exc!r}")
+            return
+        if st.st_ino == tf.ino and st.st_size == tf.size and st.st_mtime_ns == tf.mtime_ns:
+            return
+        if st.st_ino != tf.ino or st.st_size < tf.offset:
+            # Rotated, replaced or truncated: the old offset means nothing for the new contents.
+            metrics.inc("files_replaced_total")
+            untrack(tf.path, "replaced")
+            track(tf.path)
+            return
+        tf.size = st.st_size
+        tf.mtime_ns = st.st_mtime_ns
+        if st.st_size == tf.offset:
+            return
+
+        tail = tf.tail
+        skipped = tail.skipped
+        try:
+            with open(tf.path, "rb") as f:
+                f.seek(tf.offset)
+                # Fixed-size reads keep memory bounded however much was appended since the last check.
+                while True:
+                    data = f.read(READ_CHUNK)
                     if not data:
+                        break
+                    # Start of the first complete line in this chunk, then of each one after it.
+                    line_start = tf.offset - len(tail.partial)
+                    chunk_start = tf.offset
+                    tf.offset += len(data)
+                    lines = tail.feed(data)
+                    metrics.inc("bytes_read_total", len(data))
+                    metrics.inc("lines_read_total", len(lines))
+                    for raw, end in zip(lines, tail.ends):
+                        handle_line(tf, raw, line_start)
+                        line_start = chunk_start + end
+        except Exception as exc:
+            debug(f"error reading {tf.path}: {exc!r}")
+            if debug_enabled:
+                debug(traceback.format_exc().rstrip())
+            return
+        tracked.mark_active(tf, now)
+        if tail.skipped != skipped:
+            metrics.inc("lines_oversized_total", tail.skipped - skipped)
+            debug(f"skipped {tail.skipped - skipped} lines over {tail.max_line} bytes in {tf.path}")
+
+    def handle_line(tf: TrackedFile, raw: bytes, offset: int) -> None:
+        source = tf.source
+        if source is None or not source.might_be_assistant_event(raw):
+            metrics.inc("lines_prefiltered_total")
+            return
+        msg, msg_ts = source.extract(raw)
+        if not msg:
+            metrics.inc("lines_rejected_total")
+            return
+        metrics.inc("messages_total")
+        # Prevent backlog replays: only speak messages at/after watcher start (or after the checkpoint for
+        # files read from the start). Files resumed at an exact checkpointed offset skip this.
+        if msg_ts is not None and tf.since is not None and msg_ts < tf.since:
+            metrics.inc("messages_pre_start_total")
+            debug(f"skipping pre-start msg: {msg[:80]}")
+            return
+        if not dedup.check(msg, tf.path, time.time()):
+            metrics.inc("duplicates_total")
+            debug(f"skipping duplicate msg: {msg[:80]}")
+            return
+        if coalescer is not None:
+            coalescer.add(tf.path, msg, time.time(), offset)
+            return
+        speak(tf.path, msg)
+
+    def speak(path: str, msg: str) -> None:
+        if not allow_speak():
+            return
+
+        source = source_for(path)
+        debug(f"assistant msg from {source.describe(path) if source else path}: {msg[:80]}")
+        outcome = dispatcher.submit(msg, base_dir, path)
+        metrics.inc(f"dispatch_{outcome}_total")
+        if outcome != "queued":
+            debug(f"dispatch queue full ({dispatcher.policy}): {outcome} msg: {msg[:80]}")
+
+    def flush_coalesced(now: float) -> None:
+        if coalescer is None:
+            return
+        for path, msg, held in coalescer.due(now):
+            if held > 1:
+                metrics.inc("coalesced_total", held - 1)
+                debug(f"coalesced {held} msgs from {path}")
+            speak(path, msg)
+
+    def refresh(now: float) -> None:
+        nonlocal last_scan
+        last_scan = now
+        total = 0
+        started = time.monotonic()
+        for name, index in indexes.items():
+            files = index.scan(now)
+            total += len(files)
+            if index_feeder is not None:
+                if index.full:
+                    index_feeder.submit(name, index.stats(), full=True)
+                elif index.changes() or index.removed():
+                    index_feeder.submit(name, index.stats(list(index.changes()) + list(index.removed())))
+            if not index.primed:
+                # Startup: tail what is currently active; idle history is only tracked once it changes.
+                for path in files:
+                    if path in tracked:
                         continue
-                    offsets[path] += len(data)
-            except Exception as exc:
-                debug(f"error reading {path}: {exc!r}")
-                if debug_enabled:
-                    debug(traceback.format_exc().rstrip())
+                    mtime = index.mtime_of(path)
+                    if resume_at is not None and track_from_checkpoint(path, mtime):
+                        continue
+                    if mtime is not None and now - mtime < cold_after:
+                        track(path)
+            else:
+                wanted = set(files) if index.max_files > 0 else None
+                for path, prev_size in index.changes().items():
+                    if path in tracked:
+                        continue
+                    # Files created since the last scan are read from the start; known files resume where
+                    # they were last read, else where the index last saw them end.
+                    offset = 0 if prev_size is None else prev_size
+                    if wanted is not None and path not in wanted:
+                        known = index.stats([path])[path]
+                        if known is not None and path not in unread_from:
+                            leave_unread(path, known.st_ino, offset)
+                        continue
+                    track_changed(path, offset)
+        metrics.inc("scans_total")
+        metrics.observe("scan_seconds", time.monotonic() - started)
+        debug(f"scanned {total} session files ({len(tracked)} tracked)")
+
+    def run_poll_loop() -> int:
+        while True:
+            now = time.time()
+            if now - last_scan > 2:
+                refresh(now)
+
+            for tf in tracked.due(now):
+                poll_file(tf, now)
+            evict()
+            flush_coalesced(time.time())
+            periodic(now)
+
+            time.sleep(0.2)
+
+    def run_inotify_loop(inotify: Inotify) -> int:
+        # Safety net: inotify can drop events (queue overflow) and directories can appear before
+        # their watch is installed, so reconcile with a full scan every so often.
+        try:
+            rescan_seconds = float(os.environ.get("CODEX_TTS_RESCAN_SECONDS", "30"))
+        except Exception:
+            rescan_seconds = 30.0
+        # Scans only start tracking the CODEX_TTS_MAX_FILES newest files of a source, but any file can raise
+        # an event. Keep the same number per source tracked here, dropping the least recently active: one
+        # that is written to again raises another event and is picked up where it was left. Evicting after
+        # the reads means newly tracked files are never dropped before their backlog is read.
+        max_per_source = _max_files_from_env()
+
+        def watch_tree(root: str, source: SessionSource, moved: bool = False) -> None:
+            # Sessions are nested (Codex: sessions/YYYY/MM/DD, Claude: projects/<project>, Copilot:
+            # session-state/<id>); watch every new directory level so new directories (and the files
+            # created in them) are picked up immediately. A directory moved in brings existing files,
+            # which are tracked like files moved in.
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if d.lower() != "archive"]
+                if not inotify.add_dir(dirpath):
+                    debug(f"error watching {dirpath}")
+                    continue
+                # A freshly created directory may already hold files written before the watch existed.
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    if source.matches(name) and path not in tracked:
+                        tf = track_moved_in(path, source) if moved else track(path, offset=0)
+                        if tf is not None:
+                            poll_file(tf, time.time())
+
+        def rescan() -> None:
+            now = time.time()
+            refresh(now)
+            for index in indexes.values():
+                for d in index.directories():
+                    if not inotify.add_dir(d):
+                        debug(f"error watching {d}")
+            for tf in tracked.due(now):
+                poll_file(tf, now)
+            evict(max_per_source)
+
+        rescan()
+        while True:
+            if not inotify.dir_to_wd:
+                # Nothing to watch yet (e.g. ~/.codex/sessions does not exist); wait for a root to appear.
+                time.sleep(2)
+                rescan()
                 continue
 
-            buf = buffers.get(path, b"")
-            data = buf + data
-            lines = data.split(b"\n")
-            if data and not data.endswith(b"\n"):
-                buffers[path] = lines.pop()
-            else:
-                buffers[path] = b""
+            rescan_at = last_scan + rescan_seconds
+            wake_at = rescan_at
+            periodic_at = next_periodic()
+            if periodic_at is not None:
+                wake_at = min(wake_at, periodic_at)
+            if coalescer is not None:
+                pending_at = coalescer.next_deadline()
+                if pending_at is not None:
+                    wake_at = min(wake_at, pending_at)
+            ready = inotify.wait(max(0.0, wake_at - time.time()))
+            flush_coalesced(time.time())
+            periodic(time.time())
+            if not ready:
+                if time.time() >= rescan_at:
+                    rescan()
+                continue
 
-            for raw in lines:
-                if not raw:
+            dirty: List[str] = []
+            overflow = False
+            events = inotify.read_events()
+            metrics.inc("inotify_events_total", len(events))
+            for directory, mask, name in events:
+                if mask & Inotify.IN_Q_OVERFLOW:
+                    overflow = True
                     continue
-                try:
-                    line = raw.decode("utf-8", errors="ignore")
-                except Exception:
+                if not directory or not name:
                     continue
-                msg, msg_ts = extract_assistant_event(line)
-                if not msg:
+                source = source_for(directory)
+                if source is None:
                     continue
-                # Prevent backlog replays: only speak messages at/after watcher start.
-                if msg_ts is not None and msg_ts < start_epoch:
-                    debug(f"skipping pre-start msg: {msg[:80]}")
+                path = os.path.join(directory, name)
+                if mask & Inotify.IN_ISDIR:
+                    if mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO) and name.lower() != "archive":
+                        watch_tree(path, source, moved=bool(mask & Inotify.IN_MOVED_TO))
                     continue
-                if not remember(msg):
-                    debug(f"skipping duplicate msg: {msg[:80]}")
+                if not source.matches(name):
                     continue
-                if not allow_speak():
+                if mask & (Inotify.IN_DELETE | Inotify.IN_MOVED_FROM):
+                    untrack(path, "deleted or moved")
                     continue
+                if mask & Inotify.IN_CREATE:
+                    if path not in tracked:
+                        track(path, offset=0)
+                    dirty.append(path)
+                    continue
+                if mask & Inotify.IN_MOVED_TO:
+                    if path not in tracked:
+                        track_moved_in(path, source)
+                    dirty.append(path)
+                    continue
+                if mask & (Inotify.IN_MODIFY | Inotify.IN_CLOSE_WRITE):
+                    if path not in tracked:
+                        # Resume where it was evicted, else from the size the index last recorded, so the
+                        # first append isn't lost.
+                        track_changed(path, indexes[source.name].size_of(path))
+                    dirty.append(path)
 
-                debug(f"assistant msg from {os.path.basename(path)}: {msg[:80]}")
-                # Include cwd so the TTS script can resolve .env and output paths even when the watcher is run
-                # from some other directory. Allow an explicit override.
-                base_dir = os.environ.get("CODEX_TTS_BASE_DIR") or os.getcwd()
-                payload = json.dumps({"type": "agent-turn-complete", "last_assistant_message": msg, "cwd": base_dir})
-                try:
-                    with open(log_file, "a", encoding="utf-8") as lf:
-                        proc = subprocess.Popen([tts_script, payload], stdout=lf, stderr=lf)
-                        _ = proc
-                except Exception as exc:
-                    debug(f"error spawning notifier for {path}: {exc!r}")
-                    if debug_enabled:
-                        debug(traceback.format_exc().rstrip())
+            if overflow:
+                metrics.inc("inotify_overflows_total")
+                debug("inotify queue overflow; rescanning")
+                rescan()
+                continue
+
+            now = time.time()
+            seen: Set[str] = set()
+            for path in dirty:
+                if path in seen:
                     continue
+                seen.add(path)
+                tf = tracked.get(path)
+                if tf is not None:
+                    poll_file(tf, now)
+            evict(max_per_source)
+
+    watch_mode = _resolve_watch_mode()
+    if watch_mode == "inotify":
+        try:
+            inotify = Inotify()
+        except Exception as exc:
+            debug(f"inotify unavailable ({exc!r}); falling back to polling")
+        else:
+            debug("watch mode: inotify")
+            try:
+                return run_inotify_loop(inotify)
+            finally:
+                inotify.close()
 
-        time.sleep(0.2)
+    debug("watch mode: poll")
+    return run_poll_loop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Synthetic Codex session logs for benchmarking the session watcher.
+
+Lines follow the shape of real ~/.codex/sessions rollouts: a session_meta header, then turns made of user
+messages, reasoning, shell tool calls with (occasionally very large) outputs, token counts and finally the
+assistant's agent_message/response_item pair. Only the assistant lines are interesting to the watcher,
+which is what makes the mix realistic: most bytes are tool output.
+"""
+import datetime
+import json
+import os
+import random
+import uuid
+from typing import List, Optional
+
+_WORDS = (
+    "the session watcher reads appended lines from codex logs and speaks the final assistant message "
+    "after checking rate limits dedup state and the configured player while tool output dominates volume"
+).split()
+
+
+def iso(ts: float) -> str:
+    dt = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def _dump(obj: dict) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _tool_output_size(rng: random.Random, big_every: int) -> int:
+    # Mostly small outputs (ls, rg, sed -n), a tail of medium ones and the odd multi-megabyte dump.
+    if big_every > 0 and rng.randrange(big_every) == 0:
+        return rng.randint(512 * 1024, 2 * 1024 * 1024)
+    if rng.random() < 0.15:
+        return rng.randint(8 * 1024, 64 * 1024)
+    return rng.randint(80, 4 * 1024)
+
+
+def session_meta_line(session_id: str, ts: float, cwd: str = "/tmp/project") -> str:
+    return _dump(
+        {
+            "timestamp": iso(ts),
+            "type": "session_meta",
+            "payload": {
+                "id": session_id,
+                "timestamp": iso(ts),
+                "cwd": cwd,
+                "originator": "codex_cli_rs",
+                "cli_version": "0.46.0",
+            },
+        }
+    )
+
+
+def user_lines(rng: random.Random, ts: float, text: Optional[str] = None) -> List[str]:
+    text = text or _text(rng, rng.randint(5, 40))
+    return [
+        _dump(
+            {
+                "timestamp": iso(ts),
+                "type": "response_item",
+                "payload": {"type": "message", "role": "user", "content": [{"type": "input_text", "text": text}]},
+            }
+        ),
+        _dump({"timestamp": iso(ts), "type": "event_msg", "payload": {"type": "user_message", "message": text}}),
+    ]
+
+
+def tool_call_lines(rng: random.Random, ts: float, big_every: int = 200) -> List[str]:
+    call_id = f"call_{uuid.UUID(int=rng.getrandbits(128)).hex[:24]}"
+    reasoning = _text(rng, rng.randint(10, 60))
+    output = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz \n") for _ in range(256))
+    size = _tool_output_size(rng, big_every)
+    output = (output * (size // len(output) + 1))[:size]
+    return [
+        _dump(
+            {
+                "timestamp": iso(ts),
+                "type": "response_item",
+                "payload": {
+                    "type": "reasoning",
+                    "summary": [{"type": "summary_text", "text": reasoning}],
+                    "content": None,
+                    "encrypted_content": "gAAAAB" + "x" * rng.randint(500, 3000),
+                },
+            }
+        ),
+        _dump({"timestamp": iso(ts), "type": "event_msg", "payload": {"type": "agent_reasoning", "text": reasoning}}),
+        _dump(
+            {
+                "timestamp": iso(ts),
+                "type": "response_item",
+                "payload": {
+                    "type": "function_call",
+                    "name": "shell",
+                    "arguments": json.dumps({"command": ["bash", "-lc", "rg -n watcher"], "workdir": "/tmp/project"}),
+                    "call_id": call_id,
+                },
+            }
+        ),
+        _dump(
+            {
+                "timestamp": iso(ts),
+                "type": "response_item",
+                "payload": {
+                    "type": "function_call_output",
+                    "call_id": call_id,
+                    "output": json.dumps({"output": output, "metadata": {"exit_code": 0, "duration_seconds": 0.1}}),
+                },
+            }
+        ),
+        _dump(
+            {
+                "timestamp": iso(ts),
+                "type": "event_msg",
+                "payload": {
+                    "type": "token_count",
+                    "info": {"total_token_usage": {"input_tokens": rng.randint(1000, 90000), "output_tokens": 300}},
+                },
+            }
+        ),
+    ]
+
+
+def assistant_lines(rng: random.Random, ts: float, text: Optional[str] = None) -> List[str]:
+    text = text or _text(rng, rng.randint(8, 120))
+    return [
+        _dump({"timestamp": iso(ts), "type": "event_msg", "payload": {"type": "agent_message", "message": text}}),
+        _dump(
+            {
+                "timestamp": iso(ts),
+                "type": "response_item",
+                "payload": {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": text}]},
+            }
+        ),
+    ]
+
+
+def turn_lines(
+    rng: random.Random,
+    ts: float,
+    tool_calls: Optional[int] = None,
+    assistant_text: Optional[str] = None,
+    big_every: int = 200,
+) -> List[str]:
+    lines = user_lines(rng, ts)
+    for _ in range(rng.randint(1, 8) if tool_calls is None else tool_calls):
+        lines.extend(tool_call_lines(rng, ts, big_every=big_every))
+    lines.extend(assistant_lines(rng, ts, assistant_text))
+    return lines
+
+
+def mixed_log(n_lines: int, seed: int = 0, big_every: int = 200) -> List[bytes]:
+    """A single realistic session of roughly `n_lines` lines, as raw bytes without newlines."""
+    rng = random.Random(seed)
+    ts = 1_760_000_000.0
+    lines = [session_meta_line(str(uuid.UUID(int=rng.getrandbits(128))), ts)]
+    while len(lines) < n_lines:
+        ts += rng.uniform(1, 30)
+        lines.extend(turn_lines(rng, ts, big_every=big_every))
+    return [line.encode("utf-8") for line in lines[:n_lines]]
+
+
+def session_path(codex_home: str, ts: float, session_id: str) -> str:
+    day = datetime.datetime.fromtimestamp(ts)
+    name = f"rollout-{day.strftime('%Y-%m-%dT%H-%M-%S')}-{session_id}.jsonl"
+    return os.path.join(codex_home, "sessions", day.strftime("%Y"), day.strftime("%m"), day.strftime("%d"), name)
+
+
+def write_session(codex_home: str, ts: float, rng: random.Random, turns: int = 0, big_every: int = 0) -> str:
+    session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    path = session_path(codex_home, ts, session_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(session_meta_line(session_id, ts) + "\n")
+        for _ in range(turns):
+            for line in turn_lines(rng, ts, tool_calls=rng.randint(0, 2), big_every=big_every):
+                f.write(line + "\n")
+    os.utime(path, (ts, ts))
+    return path
+
+
+def write_history(codex_home: str, count: int, days: int = 365, seed: int = 0, turns: int = 1) -> List[str]:
+    """Spread `count` small historical sessions over the `days` before now (mtimes included)."""
+    rng = random.Random(seed)
+    now = datetime.datetime.now().timestamp()
+    paths = []
+    for i in range(count):
+        ts = now - 86400 * (1 + (i * days) // max(count, 1)) - rng.uniform(0, 3600)
+        paths.append(write_session(codex_home, ts, rng, turns=turns))
+    return paths
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""Persistent SQLite index of Codex, Claude and Copilot session logs.
+
+One row per session file: identity (inode, size, mtime), how far it has been parsed, the session_meta fields
+and message counts. Refreshing stats each file and parses only the bytes appended since the last refresh,
+so keeping the index current costs about as much as the new activity. The database runs in WAL mode: the
+TTS watcher keeps it updated while the cleanup script (or anything else) reads it concurrently.
+
+Counts follow Session Harbor's message parsing (clis/session-harbor/src/services/sessions.ts). Besides the
+plain totals, each row splits its user/assistant messages by the cleanup heuristics: `signal_messages` are
+non-boilerplate messages of at least MEANINGFUL_CHARS characters, `short_user_messages` are non-boilerplate
+user messages shorter than that. The boilerplate markers are stored with the index; opening it with a
+different set resets the counts and re-parses every file once.
+"""
+import datetime
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import orjson  # type: ignore
+
+    _decode: Callable[[bytes], Any] = orjson.loads
+except ImportError:  # pragma: no cover - optional speedup
+    _decode = json.loads
+
+SCHEMA_VERSION = 1
+MEANINGFUL_CHARS = 5
+
+DEFAULT_BOILERPLATE_MARKERS = (
+    "<environment_context>",
+    "</environment_context>",
+    "# AGENTS.md instructions",
+    "<INSTRUCTIONS>",
+    "Global Agent Instructions",
+    "project-doc",
+    "Skills",
+    "How to use skills",
+)
+
+
+
+def default_roots() -> Dict[str, str]:
+    """Session roots per source, resolved like codex-session-watch-tts.py does (CODEX_HOME, CLAUDE_CONFIG_DIR,
+    CODEX_TTS_CLAUDE_DIR, CODEX_TTS_COPILOT_DIR)."""
+    codex_home = os.environ.get("CODEX_HOME", os.path.join(os.path.expanduser("~"), ".codex"))
+    claude_home = os.environ.get("CLAUDE_CONFIG_DIR") or os.path.join(os.path.expanduser("~"), ".claude")
+    return {
+        "codex": os.path.join(codex_home, "sessions"),
+        "claude": os.environ.get("CODEX_TTS_CLAUDE_DIR") or os.path.join(claude_home, "projects"),
+        "copilot": os.environ.get("CODEX_TTS_COPILOT_DIR")
+        or os.path.join(os.path.expanduser("~"), ".copilot", "session-state"),
+    }
+
+
+DEFAULT_ROOTS = default_roots()
+
+# Lines without one of these cannot be a message, so they are skipped without being decoded.
+_MESSAGE_MARKERS = {
+    "codex": (b'"message"', b"user_message", b"assistant_message"),
+    "claude": (b'"user"', b'"assistant"', b'"summary"'),
+    "copilot": (b"user.message", b"assistant.message"),
+}
+
+# Session Harbor looks for a Claude session's cwd in this many leading lines.
+_CLAUDE_META_LINES = 120
+
+# Rows are committed in batches so a first build of a large history does not hold the write lock throughout.
+_COMMIT_EVERY = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    rel_path TEXT NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    offset INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    valid INTEGER NOT NULL,
+    session_id TEXT,
+    timestamp TEXT,
+    ts REAL,
+    cwd TEXT,
+    project TEXT,
+    message_count INTEGER NOT NULL,
+    user_messages INTEGER NOT NULL,
+    short_user_messages INTEGER NOT NULL,
+    signal_messages INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_source_mtime ON sessions (source, mtime);
+CREATE INDEX IF NOT EXISTS sessions_source_ts ON sessions (source, ts);
+"""
+
+_COUNTERS = ("message_count", "user_messages", "short_user_messages", "signal_messages")
+
+_WORKSPACE_LINE = re.compile(r"^\s*([a-z_]+)\s*:\s*(.+)\s*$", re.I)
+
+
+def iso(ts: float) -> str:
+    dt = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def parse_ts(value: Any) -> Optional[float]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+
+def _loads(line: bytes) -> Any:
+    try:
+        return _decode(line)
+    except Exception:
+        return None
+
+
+def _js_falsy(value: Any) -> bool:
+    # Session Harbor's checks are JavaScript truthiness: {} and [] count as present.
+    if value is None or value is False:
+        return True
+    if isinstance(value, (str, int, float)):
+        return not value
+    return False
+
+
+def _content_text(content: Any) -> str:
+    # sessions.ts normalizeMessageContent(): strings as-is, arrays joined by line (text parts or their JSON).
+    if _js_falsy(content):
+        return ""
+    if isinstance(content, str):
+        return content
+    if not isinstance(content, list):
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+    parts = []
+    for item in content:
+        if _js_falsy(item):
+            continue
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, dict) and isinstance(item.get("text"), str):
+            parts.append(item["text"])
+        else:
+            parts.append(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(parts)
+
+
+def entry_message(source: str, entry: Any) -> Tuple[bool, Optional[str], str]:
+    """(counts towards messageCount, role, stripped text) for one JSONL entry, as Session Harbor parses it."""
+    if not isinstance(entry, dict):
+        return False, None, ""
+    kind = entry.get("type")
+    if source == "codex":
+        payload = entry.get("payload")
+        payload = payload if isinstance(payload, dict) else {}
+        if kind == "event_msg" and payload.get("type") in ("user_message", "assistant_message"):
+            role = "assistant" if payload["type"] == "assistant_message" else "user"
+            return True, role, str(payload.get("message") or "").strip()
+        if kind == "response_item" and payload.get("type") == "message":
+            return True, payload.get("role") or "unknown", _content_text(payload.get("content")).strip()
+        return False, None, ""
+    if source == "claude":
+        if kind not in ("user", "assistant"):
+            return False, None, ""
+        message = entry.get("message")
+        message = message if isinstance(message, dict) else {}
+        return True, message.get("role") or kind, _content_text(message.get("content")).strip()
+    if kind in ("user.message", "assistant.message"):
+        data = entry.get("data")
+        data = data if isinstance(data, dict) else {}
+        text = str(data.get("content") or data.get("transformedContent") or "").strip()
+        return True, "user" if kind == "user.message" else "assistant", text
+    return False, None, ""
+
+
+def read_copilot_workspace(path: str) -> Dict[str, str]:
+    meta: Dict[str, str] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f.read().splitlines():
+                match = _WORKSPACE_LINE.match(line)
+                if match:
+                    meta[match.group(1)] = match.group(2)
+    except OSError:
+        return {}
+    return meta
+
+
+def list_session_files(source: str, root: str) -> List[str]:
+    """Session files of one source, skipping Archive/ directories like Session Harbor does."""
+    files: List[str] = []
+    if source == "copilot":
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.name.lower() != "archive" and entry.is_dir():
+                        events = os.path.join(entry.path, "events.jsonl")
+                        if os.path.isfile(events):
+                            files.append(events)
+        except OSError:
+            pass
+        return files
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d.lower() != "archive"]
+        files.extend(os.path.join(dirpath, name) for name in filenames if name.endswith(".jsonl"))
+    return files
+
+
+class SessionIndexDB:
+    """SQLite session index. Use one instance per thread; concurrent processes are fine (WAL)."""
+
+    def __init__(
+        self,
+        path: str,
+        markers: Optional[Sequence[str]] = None,
+        roots: Optional[Dict[str, str]] = None,
+        timeout: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.roots = dict(DEFAULT_ROOTS)
+        self.roots.update(roots or {})
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        stored = self.get_meta("schema")
+        if stored is not None and stored != str(SCHEMA_VERSION):
+            self.conn.execute("DELETE FROM sessions")
+        self.set_meta("schema", str(SCHEMA_VERSION))
+        self.markers = self._resolve_markers(markers)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _resolve_markers(self, markers: Optional[Sequence[str]]) -> Tuple[str, ...]:
+        # Without explicit markers (the watcher), keep whatever the index was built with.
+        stored = self.get_meta("boilerplate_markers")
+        if markers is None:
+            return tuple(json.loads(stored)) if stored else DEFAULT_BOILERPLATE_MARKERS
+        markers = tuple(markers)
+        encoded = json.dumps(list(markers))
+        if stored != encoded:
+            if stored is not None:
+                # Counts depend on the markers: parse everything again on the next refresh.
+                self.conn.execute("DELETE FROM sessions")
+            self.set_meta("boilerplate_markers", encoded)
+        return markers
+
+    def is_boilerplate(self, text: str) -> bool:
+        t = text.strip()
+        return t == "" or t == "." or any(marker in t for marker in self.markers)
+
+    # -- updates -------------------------------------------------------------------------------------
+
+    def refresh(
+        self,
+        source: str,
+        paths: Optional[Iterable[str]] = None,
+        stats: Optional[Mapping[str, Any]] = None,
+    ) -> int:
+        """Bring rows up to date; returns how many files were (re)parsed.
+
+        With `paths` only those files are checked (missing ones are dropped); without, the whole source
+        tree is listed and rows for files that disappeared are removed. `stats` holds stat results the
+        caller already has (anything with st_ino, st_size and st_mtime; None for a file known to be gone),
+        which are used instead of stat'ing again; without `paths` its keys are the listing, so the tree is
+        not walked either.
+        """
+        root = self.roots[source]
+        full = paths is None
+        if full:
+            targets = list(stats) if stats is not None else list_session_files(source, root)
+        else:
+            targets = list(dict.fromkeys(paths))
+        known: Dict[str, sqlite3.Row] = {}
+        if full:
+            for row in self.conn.execute("SELECT * FROM sessions WHERE source = ?", (source,)):
+                known[row["path"]] = row
+        updated = 0
+        pending = 0
+        self.conn.execute("BEGIN")
+        try:
+            for path in targets:
+                row = known.pop(path, None) if full else self._row(path)
+                if stats is not None and path in stats:
+                    st = stats[path]
+                else:
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        st = None
+                if st is None:
+                    if row is not None:
+                        self.conn.execute("DELETE FROM sessions WHERE path = ?", (path,))
+                    continue
+                if row is not None and row["inode"] == st.st_ino and row["size"] == st.st_size and row["mtime"] == st.st_mtime:
+                    continue
+                try:
+                    self._index_file(source, root, path, st, row)
+                except OSError:
+                    # Gone since it was stat'ed.
+                    if row is not None:
+                        self.conn.execute("DELETE FROM sessions WHERE path = ?", (path,))
+                    continue
+                updated += 1
+                pending += 1
+                if pending >= _COMMIT_EVERY:
+                    self.conn.execute("COMMIT")
+                    self.conn.execute("BEGIN")
+                    pending = 0
+            for path in known:
+                self.conn.execute("DELETE FROM sessions WHERE path = ?", (path,))
+            if full:
+                self.set_meta(f"refreshed:{source}", repr(time.time()))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return updated
+
+    def last_full_refresh(self, source: str) -> Optional[float]:
+        value = self.get_meta(f"refreshed:{source}")
+        return float(value) if value else None
+
+    def _row(self, path: str) -> Optional[sqlite3.Row]:
+        return self.conn.execute("SELECT * FROM sessions WHERE path = ?", (path,)).fetchone()
+
+    def _index_file(self, source: str, root: str, path: str, st: os.stat_result, row: Optional[sqlite3.Row]) -> None:
+        fresh = row is None or row["inode"] != st.st_ino or st.st_size < row["offset"]
+        if fresh:
+            # New, replaced or truncated: start over.
+            values: Dict[str, Any] = {name: 0 for name in _COUNTERS}
+            values.update(offset=0, lines=0, valid=0, session_id=None, timestamp=None, ts=None, cwd=None, project=None)
+        else:
+            values = {key: row[key] for key in row.keys()}
+        markers = _MESSAGE_MARKERS[source]
+        offset = values["offset"]
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                # Partial lines are still being written, and bytes past the stat (which may be the caller's,
+                # a little old) belong to the next refresh; stopping at st_size keeps offset <= size.
+                if not raw.endswith(b"\n") or offset + len(raw) > st.st_size:
+                    break
+                offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                values["lines"] += 1
+                if source == "codex" and values["lines"] == 1:
+                    self._codex_header(values, line)
+                    continue
+                if source == "claude" and values["cwd"] is None and values["lines"] <= _CLAUDE_META_LINES:
+                    entry = _loads(line)
+                    if isinstance(entry, dict) and entry.get("cwd"):
+                        values["cwd"] = entry["cwd"]
+                elif not any(marker in line for marker in markers):
+                    continue
+                else:
+                    entry = _loads(line)
+                self._count(source, values, entry)
+        values["offset"] = offset
+
+        rel_path = os.path.relpath(path, root)
+        if source == "claude":
+            values.update(
+                valid=1,
+                session_id=os.path.basename(path)[: -len(".jsonl")],
+                timestamp=iso(st.st_mtime),
+                ts=st.st_mtime,
+                project=values["cwd"] or rel_path.split(os.sep)[0] or "Unknown",
+            )
+        elif source == "copilot":
+            workspace = read_copilot_workspace(os.path.join(os.path.dirname(path), "workspace.yaml"))
+            timestamp = workspace.get("updated_at") or workspace.get("created_at") or iso(st.st_mtime)
+            values.update(
+                valid=1,
+                session_id=workspace.get("id") or os.path.basename(os.path.dirname(path)),
+                timestamp=timestamp,
+                ts=parse_ts(timestamp) or st.st_mtime,
+                cwd=workspace.get("cwd"),
+                project=workspace.get("repository"),
+            )
+        values.update(
+            path=path,
+            source=source,
+            rel_path=rel_path,
+            inode=st.st_ino,
+            size=st.st_size,
+            mtime=st.st_mtime,
+            indexed_at=time.time(),
+        )
+        columns = list(values)
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO sessions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [values[c] for c in columns],
+        )
+
+    @staticmethod
+    def _codex_header(values: Dict[str, Any], line: bytes) -> None:
+        header = _loads(line)
+        payload = header.get("payload") if isinstance(header, dict) else None
+        if not isinstance(header, dict) or header.get("type") != "session_meta" or not isinstance(payload, dict):
+            return  # not a Codex session log; Session Harbor skips these too
+        timestamp = payload.get("timestamp") or header.get("timestamp")
+        values.update(
+            valid=1,
+            session_id=payload.get("id"),
+            timestamp=timestamp,
+            ts=parse_ts(timestamp),
+            cwd=payload.get("cwd"),
+        )
+
+    def _count(self, source: str, values: Dict[str, Any], entry: Any) -> None:
+        counted, role, text = entry_message(source, entry)
+        if counted:
+            values["message_count"] += 1
+        if role not in ("user", "assistant") or not text:
+            return
+        if role == "user":
+            values["user_messages"] += 1
+        if self.is_boilerplate(text):
+            return
+        if len(text) >= MEANINGFUL_CHARS:
+            values["signal_messages"] += 1
+        elif role == "user":
+            values["short_user_messages"] += 1
+
+    # -- queries -------------------------------------------------------------------------------------
+
+    def active_since(self, source: str, since: float, limit: Optional[int] = None) -> List[str]:
+        """Session files modified at or after `since` (epoch seconds), newest first."""
+        sql = "SELECT path FROM sessions WHERE source = ? AND mtime >= ? ORDER BY mtime DESC"
+        params: List[Any] = [source, since]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def low_signal(
+        self,
+        source: str,
+        before: float,
+        max_user_messages: int,
+        max_total_messages: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Sessions older than `before` with no meaningful message and at most `max_user_messages` short ones."""
+        sql = (
+            "SELECT * FROM sessions WHERE source = ? AND valid = 1 AND ts < ? "
+            "AND signal_messages = 0 AND short_user_messages <= ?"
+        )
+        params: List[Any] = [source, before, max_user_messages]
+        if max_total_messages is not None:
+            sql += " AND message_count <= ?"
+            params.append(max_total_messages)
+        return [dict(row) for row in self.conn.execute(sql + " ORDER BY ts", params)]
+
+    def count(self, source: Optional[str] = None) -> int:
+        if source is None:
+            return self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM sessions WHERE source = ?", (source,)).fetchone()[0]
+
+
+def record_fields(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The file-derived part of a Session Harbor session record for an index row."""
+    fields: Dict[str, Any] = {
+        "id": row["session_id"],
+        "timestamp": row["timestamp"],
+        "fileName": os.path.basename(row["path"]),
+        "messageCount": row["message_count"],
+    }
+    if row["source"] != "claude":
+        fields["cwd"] = row["cwd"]
+    if row["source"] != "codex":
+        fields["project"] = row["project"]
+    return fields
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Refresh or query the Session Harbor session index.")
+    parser.add_argument("db", help="Index database path")
+    parser.add_argument("--source", default="codex", choices=sorted(DEFAULT_ROOTS))
+    parser.add_argument("--no-refresh", action="store_true", help="Query without refreshing first")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("refresh", help="Refresh and print row counts")
+    active = sub.add_parser("active", help="Files modified in the last N minutes")
+    active.add_argument("--minutes", type=float, default=10.0)
+    low = sub.add_parser("low-signal", help="Old sessions with few user messages and no meaningful text")
+    low.add_argument("--days", type=float, default=1.0)
+    low.add_argument("--max-user-messages", type=int, default=1)
+    cli_args = parser.parse_args()
+
+    db = SessionIndexDB(cli_args.db)
+    started = time.monotonic()
+    updated = 0 if cli_args.no_refresh else db.refresh(cli_args.source)
+    refreshed = time.monotonic()
+    if cli_args.command == "refresh":
+        result: Any = {"updated": updated, "rows": db.count(cli_args.source)}
+    elif cli_args.command == "active":
+        result = db.active_since(cli_args.source, time.time() - cli_args.minutes * 60)
+    else:
+        rows = db.low_signal(cli_args.source, time.time() - cli_args.days * 86400, cli_args.max_user_messages)
+        result = [row["path"] for row in rows]
+    queried = time.monotonic()
+    print(json.dumps(result, indent=2))
+    print(
+        f"refresh {refreshed - started:.3f}s ({updated} parsed), query {queried - refreshed:.4f}s",
+        file=sys.stderr,
+    )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+WATCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "codex-session-watch-tts.py")
+
+# Loads the watcher in a child process and prints how many of `attempts` sends the shared limiter allowed.
+CHILD = """
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("codex_session_watch_tts", sys.argv[1])
+watcher = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(watcher)
+limiter = watcher.RateLimiter(int(sys.argv[3]), state_path=sys.argv[2])
+assert limiter.shared
+now = float(sys.argv[4])
+print(sum(limiter.try_acquire(now) for _ in range(int(sys.argv[5]))))
+"""
+
+
+def load_watcher():
+    spec = importlib.util.spec_from_file_location("codex_session_watch_tts", WATCHER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def check_ring(watcher, failures: List[str]) -> None:
+    limiter = watcher.RateLimiter(3, window_seconds=10.0)
+    got = [limiter.try_acquire(t) for t in (0.0, 1.0, 2.0, 3.0, 9.9, 10.5, 10.7, 11.5, 11.7)]
+    want = [True, True, True, False, False, True, False, True, False]
+    if got != want:
+        failures.append(f"ring: sliding window gave {got}, want {want}")
+
+    class Small(watcher.RateLimiter):
+        RING = 4
+
+    # The budget equals the ring, so every slot is reused many times over; compare with a plain list.
+    small = Small(4, window_seconds=1.0)
+    sent: List[float] = []
+    for i in range(100):
+        now = i * 0.15
+        want_ok = len([t for t in sent if t >= now - 1.0]) < 4
+        if want_ok:
+            sent.append(now)
+        if small.try_acquire(now) != want_ok:
+            failures.append(f"ring: wrapped ring disagreed with the reference at send {i}")
+            break
+
+    if watcher.RateLimiter(0).try_acquire(0.0):
+        failures.append("ring: max_per_hour=0 allowed a send")
+    try:
+        watcher.RateLimiter(watcher.RateLimiter.RING + 1)
+        failures.append("ring: max_per_hour above RING was accepted")
+    except ValueError:
+        pass
+
+
+def check_shared(watcher, root: str, failures: List[str]) -> None:
+    path = os.path.join(root, "shared.bin")
+    first = watcher.RateLimiter(10, state_path=path)
+    if not first.shared:
+        failures.append("shared: state file was not opened")
+        return
+    spent = sum(first.try_acquire(100.0) for _ in range(4))
+    if spent != 4:
+        failures.append(f"shared: first process got {spent} of 4")
+
+    # Two processes racing for the rest of the budget must get exactly what is left between them.
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", CHILD, WATCHER, path, "10", "101.0", "20"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(2)
+    ]
+    granted = [int(proc.communicate()[0].strip() or -1) for proc in procs]
+    if sum(granted) != 6:
+        failures.append(f"shared: concurrent processes got {granted}, want 6 in total")
+    if first.try_acquire(102.0):
+        failures.append("shared: budget spent elsewhere was not seen")
+
+    # A restart picks up the same budget, and it frees up once the window has passed.
+    restarted = watcher.RateLimiter(10, state_path=path)
+    if restarted.try_acquire(102.0):
+        failures.append("shared: restarted limiter forgot the spent budget")
+    if not restarted.try_acquire(100.5 + 3600.0):
+        failures.append("shared: budget did not free up after the window")
+
+
+def check_legacy(watcher, root: str, failures: List[str]) -> None:
+    path = os.path.join(root, "legacy.txt")
+    # The old format: one send timestamp per line, possibly with junk.
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("1000.0\n1001.5\nnot-a-stamp\n1002.0\n")
+    limiter = watcher.RateLimiter(4, state_path=path)
+    if not limiter.shared:
+        failures.append("legacy: state file was not opened")
+        return
+    with open(path, "rb") as f:
+        if f.read(len(watcher.RateLimiter.MAGIC)) != watcher.RateLimiter.MAGIC:
+            failures.append("legacy: state file was not rebuilt in the ring format")
+    if not limiter.try_acquire(1003.0):
+        failures.append("legacy: the one send left in the budget was refused")
+    if limiter.try_acquire(1003.5):
+        failures.append("legacy: migrated stamps were not counted")
+    if not watcher.RateLimiter(4, state_path=path).try_acquire(1000.5 + 3600.0):
+        failures.append("legacy: migrated stamps did not expire")
+
+    # An unusable path falls back to a private budget instead of failing.
+    private = watcher.RateLimiter(1, state_path=os.path.join(root, "missing", "state.bin"))
+    if private.shared or not private.try_acquire(0.0) or private.try_acquire(1.0):
+        failures.append("legacy: unusable state path did not fall back to a private limiter")
+
+
+def main() -> int:
+    watcher = load_watcher()
+    failures: List[str] = []
+    with tempfile.TemporaryDirectory(prefix="rate-limiter-test-") as root:
+        check_ring(watcher, failures)
+        check_shared(watcher, root, failures)
+        check_legacy(watcher, root, failures)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        return 1
+    print("PASS: rate limiter ring, shared state and legacy migration")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
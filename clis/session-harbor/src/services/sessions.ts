@@ -11,6 +11,8 @@ const DATA_DIR = process.env.SESSION_HARBOR_DATA_DIR || path.join(resolveAppRoot
 const NAMES_FILE = path.join(DATA_DIR, 'session-names.json');
 const STATUS_FILE = path.join(DATA_DIR, 'session-status.json');
 const META_FILE = path.join(DATA_DIR, 'session-meta.json');
+// Furthest a local date can run ahead of UTC (UTC+14); used when pruning Codex date directories.
+const MAX_UTC_OFFSET_MS = 14 * 60 * 60 * 1000;
 
 export type SessionSource = 'codex' | 'claude' | 'copilot';
 export type SessionStatus = 'active' | 'complete' | 'archived';
@@ -31,6 +33,33 @@ export type SessionRecord = {
 
 export type SessionMatch = SessionRecord & { matchCount: number; matchPreview: string | null };
 
+export type StatusUpdate = { source: SessionSource; relPath: string; status: SessionStatus };
+
+export type StatusUpdateResult = { relPath: string; status: SessionStatus; previous: SessionStatus; changed: boolean };
+
+export type SessionExport = { source: SessionSource; session: SessionRecord; messages: any[] };
+
+/** Emitted instead of a SessionExport for a `known` session whose file is unchanged; it is not read. */
+export type SessionExportUnchanged = { source: SessionSource; relPath: string; unchanged: true };
+
+export type ExportOptions = {
+  status?: SessionStatus;
+  includeArchived?: boolean;
+  project?: string;
+  includeMessages?: boolean;
+  /** Only sessions that started before this ISO time; Codex date directories after it are never listed. */
+  before?: string;
+  maxMessages?: number;
+  /** relPath -> "<size>:<mtime in ns>" the caller already has results for; matching files are not read. */
+  known?: Record<string, string>;
+};
+
+type SessionMetaContext = {
+  names: Record<string, string>;
+  meta: Record<string, { tags?: string[]; notes?: string; updatedAt?: string }>;
+  statuses: Record<string, { status: string; updatedAt?: string }>;
+};
+
 export async function listSessions(source: SessionSource): Promise<SessionRecord[]> {
   if (source === 'claude') {
     return loadClaudeSessions();
@@ -104,6 +133,70 @@ export async function searchSessionsByMessages(source: SessionSource, query: str
   return results;
 }
 
+/**
+ * Stream every session of a source together with its parsed messages, reading each session file once.
+ * Records match `listSessions`; sessions are yielded in directory order rather than sorted by time.
+ */
+export async function* exportSessions(
+  source: SessionSource,
+  options: ExportOptions = {},
+): AsyncGenerator<SessionExport | SessionExportUnchanged> {
+  const context: SessionMetaContext = {
+    names: await loadSessionNames(),
+    meta: await loadSessionMeta(),
+    statuses: await loadSessionStatuses(),
+  };
+  const includeMessages = options.includeMessages !== false;
+  const before = options.before ? Date.parse(options.before) : NaN;
+  const hasBefore = Number.isFinite(before);
+  let files: string[];
+  if (source === 'copilot') {
+    files = await listCopilotEventFiles();
+  } else if (source === 'claude') {
+    files = await listSessionFiles(CLAUDE_DIR);
+  } else {
+    files = await listSessionFiles(SESSIONS_DIR, hasBefore ? (dir) => isCodexDirAfter(dir, before) : undefined);
+  }
+
+  for (const filePath of files) {
+    // Status lives in the metadata files, so filtered-out sessions are skipped before being read.
+    const relPath = path.relative(getSourceDir(source), filePath);
+    const status = normalizeStatus(context.statuses[buildNameKey(source, relPath)]?.status);
+    if (options.status ? status !== options.status : !options.includeArchived && status === 'archived') {
+      continue;
+    }
+    const known = options.known?.[relPath];
+    if (known !== undefined) {
+      try {
+        const stat = await fs.promises.stat(filePath, { bigint: true });
+        if (`${stat.size}:${stat.mtimeNs}` === known) {
+          yield { source, relPath, unchanged: true };
+          continue;
+        }
+      } catch (err) {
+        continue;
+      }
+    }
+
+    let exported: SessionExport | null = null;
+    try {
+      if (source === 'claude') {
+        exported = await exportClaudeSession(filePath, context, includeMessages, before);
+      } else if (source === 'copilot') {
+        exported = await exportCopilotSession(filePath, context, includeMessages, before);
+      } else {
+        exported = await exportCodexSession(filePath, context, includeMessages, before);
+      }
+    } catch (err) {
+      continue;
+    }
+    if (!exported) continue;
+    if (options.project && getSessionProject(exported.session, source) !== options.project) continue;
+    if (options.maxMessages !== undefined && exported.session.messageCount > options.maxMessages) continue;
+    yield exported;
+  }
+}
+
 export async function getSessionContent(source: SessionSource, relPath: string): Promise<{ relPath: string; content: string; messages: any[]; messageCount: number; meta?: any }> {
   const fullPath = resolveSessionPath(source, relPath);
   if (!fullPath) {
@@ -147,6 +240,35 @@ export async function setSessionStatus(source: SessionSource, relPath: string, s
   await saveSessionStatuses(statuses);
 }
 
+export async function setSessionStatuses(updates: StatusUpdate[], chunkSize?: number): Promise<StatusUpdateResult[]> {
+  // One load and one save per chunk, instead of a full read-modify-write of the status file per session.
+  const size = chunkSize && chunkSize > 0 ? Math.floor(chunkSize) : Math.max(updates.length, 1);
+  const results: StatusUpdateResult[] = [];
+  for (let start = 0; start < updates.length; start += size) {
+    const statuses = await loadSessionStatuses();
+    const updatedAt = new Date().toISOString();
+    let dirty = false;
+    for (const update of updates.slice(start, start + size)) {
+      const key = buildNameKey(update.source, update.relPath);
+      const previous = normalizeStatus(statuses[key]?.status);
+      const changed = previous !== update.status;
+      if (changed) {
+        if (update.status === 'active') {
+          delete statuses[key];
+        } else {
+          statuses[key] = { status: update.status, updatedAt };
+        }
+        dirty = true;
+      }
+      results.push({ relPath: update.relPath, status: update.status, previous, changed });
+    }
+    if (dirty) {
+      await saveSessionStatuses(statuses);
+    }
+  }
+  return results;
+}
+
 export async function updateSessionMeta(source: SessionSource, relPath: string, tags: unknown, notes: unknown): Promise<void> {
   const meta = await loadSessionMeta();
   const key = buildNameKey(source, relPath);
@@ -212,6 +334,17 @@ export function filterByProject(sessions: SessionRecord[], source: SessionSource
   return sessions.filter((session) => getSessionProject(session, source) === project);
 }
 
+export function filterBefore(sessions: SessionRecord[], before?: string): SessionRecord[] {
+  const cutoff = before ? Date.parse(before) : NaN;
+  if (!Number.isFinite(cutoff)) return sessions;
+  return sessions.filter((session) => startsBefore(session.timestamp, cutoff));
+}
+
+export function filterByMessageCount(sessions: SessionRecord[], maxMessages?: number): SessionRecord[] {
+  if (maxMessages === undefined) return sessions;
+  return sessions.filter((session) => session.messageCount <= maxMessages);
+}
+
 export function sliceSessions(sessions: SessionRecord[], limit?: number, offset?: number): SessionRecord[] {
   const start = Math.max(offset || 0, 0);
   if (!limit || limit <= 0) return sessions.slice(start);
@@ -245,7 +378,24 @@ function resolveAppRoot() {
   return cwd;
 }
 
-async function listSessionFiles(dir: string): Promise<string[]> {
+function startsBefore(timestamp: string | null | undefined, before: number) {
+  // With a cutoff, NaN means "not before": sessions without a usable timestamp are never old enough.
+  if (!Number.isFinite(before)) return true;
+  const time = timestamp ? Date.parse(timestamp) : NaN;
+  return Number.isFinite(time) && time < before;
+}
+
+function isCodexDirAfter(dir: string, before: number) {
+  // Codex nests sessions as YYYY/MM/DD by local start date. A directory can be skipped when even its
+  // earliest possible session, local midnight on its first day in the furthest-ahead time zone, is not
+  // before the cutoff.
+  const parts = path.relative(SESSIONS_DIR, dir).split(path.sep);
+  if (!parts.length || parts.length > 3 || !parts.every((part) => /^\d+$/.test(part))) return false;
+  const [year, month = '1', day = '1'] = parts;
+  return Date.UTC(Number(year), Number(month) - 1, Number(day)) - MAX_UTC_OFFSET_MS >= before;
+}
+
+async function listSessionFiles(dir: string, skipDir?: (dir: string) => boolean): Promise<string[]> {
   let entries: fs.Dirent[] = [];
   try {
     entries = await fs.promises.readdir(dir, { withFileTypes: true });
@@ -257,10 +407,10 @@ async function listSessionFiles(dir: string): Promise<string[]> {
   for (const entry of entries) {
     const fullPath = path.join(dir, entry.name);
     if (entry.isDirectory()) {
-      if (entry.name.toLowerCase() === 'archive') {
+      if (entry.name.toLowerCase() === 'archive' || skipDir?.(fullPath)) {
         continue;
       }
-      files.push(...(await listSessionFiles(fullPath)));
+      files.push(...(await listSessionFiles(fullPath, skipDir)));
     } else if (entry.isFile() && entry.name.endsWith(SESSION_EXT)) {
       files.push(fullPath);
     }
@@ -403,6 +553,181 @@ async function searchJsonlMessages(filePath: string, matcher: (entry: any) => st
   });
 }
 
+async function forEachJsonlEntry(filePath: string, onEntry: (entry: any) => boolean | void): Promise<void> {
+  // Calls onEntry for every non-empty line (null when it is not valid JSON); returning false stops reading.
+  const stream = fs.createReadStream(filePath, { encoding: 'utf8' });
+  const rl = readline.createInterface({ input: stream, crlfDelay: Infinity });
+  try {
+    for await (const line of rl) {
+      if (!line) continue;
+      let parsed = null;
+      try {
+        parsed = JSON.parse(line);
+      } catch (err) {
+        parsed = null;
+      }
+      if (onEntry(parsed) === false) break;
+    }
+  } finally {
+    rl.close();
+    stream.destroy();
+  }
+}
+
+function getSourceDir(source: SessionSource) {
+  if (source === 'claude') return CLAUDE_DIR;
+  if (source === 'copilot') return COPILOT_DIR;
+  return SESSIONS_DIR;
+}
+
+function decorateRecord(
+  source: SessionSource,
+  relPath: string,
+  record: Omit<SessionRecord, 'relPath' | 'name' | 'status' | 'tags' | 'notes'>,
+  context: SessionMetaContext
+): SessionRecord {
+  const key = buildNameKey(source, relPath);
+  const metaEntry = context.meta[key] || {};
+  return {
+    ...record,
+    relPath,
+    name: context.names[key] || '',
+    status: normalizeStatus(context.statuses[key]?.status),
+    tags: Array.isArray(metaEntry.tags) ? metaEntry.tags : [],
+    notes: typeof metaEntry.notes === 'string' ? metaEntry.notes : '',
+  };
+}
+
+async function exportCodexSession(filePath: string, context: SessionMetaContext, includeMessages: boolean, before = NaN): Promise<SessionExport | null> {
+  let header: any = null;
+  let tooNew = false;
+  let messageCount = 0;
+  const messages: any[] = [];
+  await forEachJsonlEntry(filePath, (entry) => {
+    if (!header) {
+      if (!entry || entry.type !== 'session_meta' || !entry.payload) return false;
+      header = entry;
+      // The header alone decides the cutoff, so newer sessions stop after their first line.
+      tooNew = !startsBefore(entry.payload.timestamp || entry.timestamp, before);
+      return tooNew ? false : undefined;
+    }
+    if (isCodexMessageEntry(entry)) messageCount += 1;
+    if (includeMessages) {
+      const message = codexEntryToMessage(entry);
+      if (message) messages.push(message);
+    }
+  });
+  if (!header || tooNew) return null;
+
+  const relPath = path.relative(SESSIONS_DIR, filePath);
+  const session = decorateRecord('codex', relPath, {
+    id: header.payload.id || null,
+    timestamp: header.payload.timestamp || header.timestamp || null,
+    cwd: header.payload.cwd || null,
+    fileName: path.basename(filePath),
+    messageCount,
+  }, context);
+  return { source: 'codex', session, messages };
+}
+
+async function exportClaudeSession(filePath: string, context: SessionMetaContext, includeMessages: boolean, before = NaN): Promise<SessionExport | null> {
+  const stat = await fs.promises.stat(filePath);
+  if (!startsBefore(new Date(stat.mtime).toISOString(), before)) return null;
+  const relPath = path.relative(CLAUDE_DIR, filePath);
+  const fallbackProject = relPath.split(path.sep)[0] || 'Unknown';
+  let cwd: string | null = null;
+  let lineNo = 0;
+  let messageCount = 0;
+  const messages: any[] = [];
+  await forEachJsonlEntry(filePath, (entry) => {
+    lineNo += 1;
+    // Same window getClaudeProjectInfo() reads for the project.
+    if (!cwd && lineNo <= 120 && entry?.cwd) cwd = entry.cwd;
+    if (isClaudeMessageEntry(entry)) messageCount += 1;
+    if (includeMessages) {
+      const message = claudeEntryToMessage(entry);
+      if (message) messages.push(message);
+    }
+  });
+
+  const session = decorateRecord('claude', relPath, {
+    id: path.basename(filePath, SESSION_EXT),
+    timestamp: stat.mtime ? new Date(stat.mtime).toISOString() : null,
+    project: cwd || fallbackProject,
+    fileName: path.basename(filePath),
+    messageCount,
+  }, context);
+  return { source: 'claude', session, messages };
+}
+
+async function exportCopilotSession(eventsPath: string, context: SessionMetaContext, includeMessages: boolean, before = NaN): Promise<SessionExport | null> {
+  const stat = await fs.promises.stat(eventsPath);
+  const sessionDir = path.dirname(eventsPath);
+  const workspace = await readCopilotWorkspace(path.join(sessionDir, 'workspace.yaml'));
+  const timestamp = workspace.updated_at || workspace.created_at || (stat.mtime ? new Date(stat.mtime).toISOString() : null);
+  if (!startsBefore(timestamp, before)) return null;
+  let messageCount = 0;
+  const messages: any[] = [];
+  await forEachJsonlEntry(eventsPath, (entry) => {
+    if (isCopilotMessageEntry(entry)) messageCount += 1;
+    if (includeMessages) {
+      const message = copilotEntryToMessage(entry);
+      if (message) messages.push(message);
+    }
+  });
+
+  const relPath = path.relative(COPILOT_DIR, eventsPath);
+  const session = decorateRecord('copilot', relPath, {
+    id: (workspace.id as string) || path.basename(sessionDir),
+    timestamp: timestamp || null,
+    cwd: (workspace.cwd as string) || null,
+    project: (workspace.repository as string) || null,
+    fileName: path.basename(eventsPath),
+    messageCount,
+  }, context);
+  return { source: 'copilot', session, messages };
+}
+
+async function listCopilotEventFiles(): Promise<string[]> {
+  let entries: fs.Dirent[] = [];
+  try {
+    entries = await fs.promises.readdir(COPILOT_DIR, { withFileTypes: true });
+  } catch (err) {
+    return [];
+  }
+  const files: string[] = [];
+  for (const entry of entries) {
+    if (!entry.isDirectory()) continue;
+    if (entry.name.toLowerCase() === 'archive') continue;
+    const eventsPath = path.join(COPILOT_DIR, entry.name, 'events.jsonl');
+    try {
+      await fs.promises.access(eventsPath);
+    } catch (err) {
+      continue;
+    }
+    files.push(eventsPath);
+  }
+  return files;
+}
+
+function isCodexMessageEntry(entry: any) {
+  if (entry?.type === 'response_item' && entry?.payload?.type === 'message') {
+    return true;
+  }
+  return (
+    entry?.type === 'event_msg' &&
+    (entry?.payload?.type === 'user_message' || entry?.payload?.type === 'assistant_message')
+  );
+}
+
+function isClaudeMessageEntry(entry: any) {
+  return entry?.type === 'user' || entry?.type === 'assistant';
+}
+
+function isCopilotMessageEntry(entry: any) {
+  return entry?.type === 'user.message' || entry?.type === 'assistant.message';
+}
+
 function normalizeMessageContent(content: any) {
   if (!content) return '';
   if (typeof content === 'string') return content;
@@ -424,7 +749,7 @@ function normalizeMessageContent(content: any) {
   return parts.join('\n');
 }
 
-function parseCodexMessages(rawContent: string) {
+function parseJsonlMessages(rawContent: string, toMessage: (entry: any) => any | null) {
   const messages: any[] = [];
   if (!rawContent) return messages;
 
@@ -436,111 +761,94 @@ function parseCodexMessages(rawContent: string) {
     } catch (err) {
       continue;
     }
+    const message = toMessage(parsed);
+    if (message) messages.push(message);
+  }
 
-    if (!parsed) continue;
-
-    if (parsed.type === 'event_msg') {
-      const payload = parsed.payload || {};
-      if (payload.type === 'user_message' || payload.type === 'assistant_message') {
-        const role = payload.type === 'assistant_message' ? 'assistant' : 'user';
-        const text = String(payload.message || '').trim();
-        if (!text) continue;
-        messages.push({
-          role,
-          timestamp: parsed.timestamp || null,
-          text,
-        });
-      }
-      continue;
-    }
+  return messages;
+}
 
-    if (parsed.type !== 'response_item') continue;
-    const payload = parsed.payload;
-    if (!payload || payload.type !== 'message') continue;
+function parseCodexMessages(rawContent: string) {
+  return parseJsonlMessages(rawContent, codexEntryToMessage);
+}
 
-    const role = payload.role || 'unknown';
-    const text = normalizeMessageContent(payload.content).trim();
-    if (!text) continue;
+function codexEntryToMessage(parsed: any) {
+  if (!parsed) return null;
 
-    messages.push({
+  if (parsed.type === 'event_msg') {
+    const payload = parsed.payload || {};
+    if (payload.type !== 'user_message' && payload.type !== 'assistant_message') return null;
+    const role = payload.type === 'assistant_message' ? 'assistant' : 'user';
+    const text = String(payload.message || '').trim();
+    if (!text) return null;
+    return {
       role,
       timestamp: parsed.timestamp || null,
       text,
-    });
+    };
   }
 
-  return messages;
-}
-
-function parseClaudeMessages(rawContent: string) {
-  const messages: any[] = [];
-  if (!rawContent) return messages;
+  if (parsed.type !== 'response_item') return null;
+  const payload = parsed.payload;
+  if (!payload || payload.type !== 'message') return null;
 
-  const lines = rawContent.split(/\r?\n/).filter(Boolean);
-  for (const line of lines) {
-    let parsed;
-    try {
-      parsed = JSON.parse(line);
-    } catch (err) {
-      continue;
-    }
+  const role = payload.role || 'unknown';
+  const text = normalizeMessageContent(payload.content).trim();
+  if (!text) return null;
 
-    if (!parsed || !parsed.type) continue;
+  return {
+    role,
+    timestamp: parsed.timestamp || null,
+    text,
+  };
+}
 
-    if (parsed.type === 'summary' && parsed.summary) {
-      messages.push({
-        role: 'summary',
-        timestamp: parsed.timestamp || null,
-        text: String(parsed.summary),
-      });
-      continue;
-    }
+function parseClaudeMessages(rawContent: string) {
+  return parseJsonlMessages(rawContent, claudeEntryToMessage);
+}
 
-    if (parsed.type !== 'user' && parsed.type !== 'assistant') continue;
-    const message = parsed.message || {};
-    const role = message.role || parsed.type || 'unknown';
-    const text = normalizeMessageContent(message.content).trim();
-    if (!text) continue;
+function claudeEntryToMessage(parsed: any) {
+  if (!parsed || !parsed.type) return null;
 
-    messages.push({
-      role,
+  if (parsed.type === 'summary' && parsed.summary) {
+    return {
+      role: 'summary',
       timestamp: parsed.timestamp || null,
-      text,
-    });
+      text: String(parsed.summary),
+    };
   }
 
-  return messages;
+  if (parsed.type !== 'user' && parsed.type !== 'assistant') return null;
+  const message = parsed.message || {};
+  const role = message.role || parsed.type || 'unknown';
+  const text = normalizeMessageContent(message.content).trim();
+  if (!text) return null;
+
+  return {
+    role,
+    timestamp: parsed.timestamp || null,
+    text,
+  };
 }
 
 function parseCopilotMessages(rawContent: string) {
-  const messages: any[] = [];
-  if (!rawContent) return messages;
-
-  const lines = rawContent.split(/\r?\n/).filter(Boolean);
-  for (const line of lines) {
-    let parsed;
-    try {
-      parsed = JSON.parse(line);
-    } catch (err) {
-      continue;
-    }
+  return parseJsonlMessages(rawContent, copilotEntryToMessage);
+}
 
-    if (!parsed || !parsed.type) continue;
-    if (parsed.type !== 'user.message' && parsed.type !== 'assistant.message') continue;
+function copilotEntryToMessage(parsed: any) {
+  if (!parsed || !parsed.type) return null;
+  if (parsed.type !== 'user.message' && parsed.type !== 'assistant.message') return null;
 
-    const data = parsed.data || {};
-    const role = parsed.type === 'user.message' ? 'user' : 'assistant';
-    const text = String(data.content || data.transformedContent || '').trim();
-    if (!text) continue;
+  const data = parsed.data || {};
+  const role = parsed.type === 'user.message' ? 'user' : 'assistant';
+  const text = String(data.content || data.transformedContent || '').trim();
+  if (!text) return null;
 
-    messages.push({
-      role,
-      timestamp: parsed.timestamp || null,
-      text,
-    });
-  }
-
-  return messages;
+  return {
+    role,
+    timestamp: parsed.timestamp || null,
+    text,
+  };
 }
 
 function extractClaudeMeta(rawContent: string, fallbackId: string) {
@@ -628,18 +936,7 @@ async function loadCodexSessions() {
 
     if (!parsed || parsed.type !== 'session_meta' || !parsed.payload) continue;
 
-    const messageCount = await countJsonlMessages(filePath, (entry) => {
-      if (entry?.type === 'response_item' && entry?.payload?.type === 'message') {
-        return true;
-      }
-      if (
-        entry?.type === 'event_msg' &&
-        (entry?.payload?.type === 'user_message' || entry?.payload?.type === 'assistant_message')
-      ) {
-        return true;
-      }
-      return false;
-    });
+    const messageCount = await countJsonlMessages(filePath, isCodexMessageEntry);
 
     const relPath = path.relative(SESSIONS_DIR, filePath);
     const statusKey = buildNameKey('codex', relPath);
@@ -689,9 +986,7 @@ async function loadClaudeSessions() {
     const fileName = path.basename(filePath);
     const id = path.basename(filePath, SESSION_EXT);
 
-    const messageCount = await countJsonlMessages(filePath, (entry) => {
-      return entry?.type === 'user' || entry?.type === 'assistant';
-    });
+    const messageCount = await countJsonlMessages(filePath, isClaudeMessageEntry);
 
     const statusKey = buildNameKey('claude', relPath);
     const statusEntry = statuses[statusKey];
@@ -747,9 +1042,7 @@ async function loadCopilotSessions() {
 
     const workspace = await readCopilotWorkspace(workspacePath);
     const timestamp = workspace.updated_at || workspace.created_at || (stat.mtime ? new Date(stat.mtime).toISOString() : null);
-    const messageCount = await countJsonlMessages(eventsPath, (entry) => {
-      return entry?.type === 'user.message' || entry?.type === 'assistant.message';
-    });
+    const messageCount = await countJsonlMessages(eventsPath, isCopilotMessageEntry);
 
     const relPath = path.relative(COPILOT_DIR, eventsPath);
     const statusKey = buildNameKey('copilot', relPath);
@@ -806,7 +1099,10 @@ async function loadSessionStatuses(): Promise<Record<string, { status: string; u
 
 async function saveSessionStatuses(statuses: Record<string, { status: string; updatedAt?: string }>): Promise<void> {
   await fs.promises.mkdir(path.dirname(STATUS_FILE), { recursive: true });
-  await fs.promises.writeFile(STATUS_FILE, JSON.stringify(statuses, null, 2));
+  // Write then rename, so readers never see a half-written file and an interrupted write keeps the old one.
+  const tmpFile = `${STATUS_FILE}.${process.pid}.tmp`;
+  await fs.promises.writeFile(tmpFile, JSON.stringify(statuses, null, 2));
+  await fs.promises.rename(tmpFile, STATUS_FILE);
 }
 
 async function loadSessionMeta(): Promise<Record<string, { tags?: string[]; notes?: string; updatedAt?: string }>> {
@@ -1,5 +1,8 @@
 import { defineToolset } from '../../../tooling/tool-spec/index.js';
 import {
+  exportSessions,
+  filterBefore,
+  filterByMessageCount,
   filterByProject,
   filterByStatus,
   findSessionById,
@@ -10,6 +13,7 @@ import {
   searchSessionsByMetadata,
   setSessionName,
   setSessionStatus,
+  setSessionStatuses,
   sliceSessions,
   updateSessionMeta,
   type SessionSource,
@@ -39,6 +43,8 @@ export function createSessionHarborToolset() {
             includeArchived: { type: 'boolean' },
             project: { type: 'string' },
             search: { type: 'string' },
+            before: { type: 'string' },
+            maxMessages: { type: 'number' },
             debug: { type: 'boolean' },
           }
         },
@@ -50,15 +56,14 @@ export function createSessionHarborToolset() {
           const status = normalizeStatusValue((input as any)?.status);
           const project = toStringOrUndefined((input as any)?.project);
           const search = toStringOrUndefined((input as any)?.search);
+          const before = toStringOrUndefined((input as any)?.before);
+          const maxMessages = toNumber((input as any)?.maxMessages);
 
-          let sessions = await listSessions(source);
+          let sessions = search ? await searchSessionsByMetadata(source, search) : await listSessions(source);
           sessions = filterByStatus(sessions, status, includeArchived);
           sessions = filterByProject(sessions, source, project);
-          if (search) {
-            sessions = await searchSessionsByMetadata(source, search);
-            sessions = filterByStatus(sessions, status, includeArchived);
-            sessions = filterByProject(sessions, source, project);
-          }
+          sessions = filterBefore(sessions, before);
+          sessions = filterByMessageCount(sessions, maxMessages);
 
           const total = sessions.length;
           const sliced = sliceSessions(sessions, limit, offset);
@@ -100,6 +105,40 @@ export function createSessionHarborToolset() {
           return { source, total: sessions.length, sessions };
         }
       },
+      {
+        name: 'session-export',
+        title: 'Export Sessions',
+        description: 'Stream sessions with parsed messages as NDJSON, one session per line.',
+        inputSchema: {
+          type: 'object',
+          properties: {
+            source: { type: 'string', enum: ['codex', 'claude', 'copilot'] },
+            status: { type: 'string', enum: ['active', 'complete', 'archived'] },
+            includeArchived: { type: 'boolean' },
+            includeMessages: { type: 'boolean' },
+            project: { type: 'string' },
+            before: { type: 'string' },
+            maxMessages: { type: 'number' },
+            known: { type: 'object' },
+            debug: { type: 'boolean' },
+          }
+        },
+        run: async (input) => {
+          const source = normalizeSource((input as any)?.source);
+          const rawIncludeMessages = (input as any)?.includeMessages;
+          const rawKnown = (input as any)?.known;
+          return exportSessions(source, {
+            status: normalizeStatusValue((input as any)?.status),
+            includeArchived: toBoolean((input as any)?.includeArchived),
+            project: toStringOrUndefined((input as any)?.project),
+            before: toStringOrUndefined((input as any)?.before),
+            maxMessages: toNumber((input as any)?.maxMessages),
+            known: rawKnown && typeof rawKnown === 'object' && !Array.isArray(rawKnown) ? rawKnown : undefined,
+            // Messages are the point of an export, so they are on unless explicitly disabled.
+            includeMessages: rawIncludeMessages === undefined || toBoolean(rawIncludeMessages),
+          });
+        }
+      },
       {
         name: 'session-show',
         title: 'Show Session',
@@ -209,6 +248,72 @@ export function createSessionHarborToolset() {
           return { ok: true, source, relPath: session.relPath, status };
         }
       },
+      {
+        name: 'session-status-bulk',
+        title: 'Set Session Status (Bulk)',
+        description: 'Set the status of many sessions with one update of the status file, reporting each outcome.',
+        inputSchema: {
+          type: 'object',
+          required: ['status'],
+          properties: {
+            source: { type: 'string', enum: ['codex', 'claude', 'copilot'] },
+            sessionIds: { type: 'array', items: { type: 'string' } },
+            relPaths: { type: 'array', items: { type: 'string' } },
+            status: { type: 'string', enum: ['active', 'complete', 'archived'] },
+            chunkSize: { type: 'number' },
+            debug: { type: 'boolean' },
+          }
+        },
+        run: async (input) => {
+          const source = normalizeSource((input as any)?.source);
+          const sessionIds = toStringList((input as any)?.sessionIds);
+          const relPaths = toStringList((input as any)?.relPaths);
+          const status = requireStatus((input as any)?.status);
+          const chunkSize = toNumber((input as any)?.chunkSize);
+
+          // Sessions are listed once for all IDs rather than once per ID.
+          const byId = new Map<string, SessionRecord>();
+          if (sessionIds.length) {
+            for (const session of await listSessions(source)) {
+              if (session.id && !byId.has(session.id)) byId.set(session.id, session);
+            }
+          }
+          const outcomes: Array<{ sessionId?: string; relPath?: string; ok: boolean; previous?: SessionStatus; changed?: boolean; error?: string }> = [
+            ...sessionIds.map((sessionId) => {
+              const session = byId.get(sessionId);
+              return session
+                ? { sessionId, relPath: session.relPath, ok: true }
+                : { sessionId, ok: false, error: 'Session not found.' };
+            }),
+            ...relPaths.map((relPath) => (resolveSessionPath(source, relPath)
+              ? { relPath, ok: true }
+              : { relPath, ok: false, error: 'Invalid relPath.' })),
+          ];
+
+          const pending = outcomes.filter((outcome) => outcome.ok);
+          const results = await setSessionStatuses(
+            pending.map((outcome) => ({ source, relPath: outcome.relPath as string, status })),
+            chunkSize
+          );
+          results.forEach((result, index) => {
+            pending[index].previous = result.previous;
+            pending[index].changed = result.changed;
+          });
+
+          const failed = outcomes.length - pending.length;
+          const updated = results.filter((result) => result.changed).length;
+          return {
+            ok: failed === 0,
+            source,
+            status,
+            requested: outcomes.length,
+            updated,
+            unchanged: results.length - updated,
+            failed,
+            results: outcomes,
+          };
+        }
+      },
       {
         name: 'session-archive',
         title: 'Archive Session',
@@ -343,6 +448,12 @@ function toStringOrUndefined(input: unknown): string | undefined {
   return String(input);
 }
 
+function toStringList(input: unknown): string[] {
+  if (input === undefined || input === null || input === '') return [];
+  const values = Array.isArray(input) ? input : String(input).split(',');
+  return values.map((value) => toStringOrUndefined(value)).filter((value): value is string => Boolean(value));
+}
+
 function requireString(input: unknown, label: string): string {
   const value = toStringOrUndefined(input);
   if (!value) {
@@ -6,6 +6,7 @@ import os from 'os';
 import { spawn } from 'child_process';
 import readline from 'readline';
 import https from 'https';
+import net from 'net';
 
 const PORT = Number(process.env.PORT) || 3434;
 const HOST = process.env.HOST || '127.0.0.1';
@@ -74,6 +75,9 @@ const TTS_WATCHER_SCRIPT = resolveBundledPath('backend', 'scripts', 'codex-sessi
 const TTS_WATCHER_LOCK_FILE = path.join(DATA_DIR, 'codex-session-watch-tts.lock');
 const TTS_WATCHER_LOG_FILE = path.join(DATA_DIR, 'codex-session-watch-tts.log');
 const TTS_WATCHER_RATE_STATE_FILE = path.join(DATA_DIR, 'codex-tts-rate-state.txt');
+const TTS_WATCHER_CHECKPOINT_FILE = path.join(DATA_DIR, 'codex-session-watch-tts.checkpoint.json');
+// Unix socket paths are limited to ~104 bytes on macOS, so keep the name short.
+const TTS_WATCHER_STATS_SOCKET = path.join(DATA_DIR, 'tts-watcher.sock');
 
 let ttsWatcherProc: ReturnType<typeof spawn> | null = null;
 let ttsWatcherEnabled = false;
@@ -122,6 +126,9 @@ async function startTtsWatcher(): Promise<void> {
     CODEX_TTS_LOCK_FILE: process.env.CODEX_TTS_LOCK_FILE || TTS_WATCHER_LOCK_FILE,
     CODEX_TTS_LOG_FILE: process.env.CODEX_TTS_LOG_FILE || TTS_WATCHER_LOG_FILE,
     CODEX_TTS_RATE_STATE_FILE: process.env.CODEX_TTS_RATE_STATE_FILE || TTS_WATCHER_RATE_STATE_FILE,
+    CODEX_TTS_CHECKPOINT_FILE: process.env.CODEX_TTS_CHECKPOINT_FILE || TTS_WATCHER_CHECKPOINT_FILE,
+    // The watcher serves a JSON stats snapshot here; surfaced through GET /api/tts-watcher.
+    CODEX_TTS_STATS_SOCKET: process.env.CODEX_TTS_STATS_SOCKET || TTS_WATCHER_STATS_SOCKET,
     // App-managed env file (Electron menu writes this) so users don't need to export secrets in shells.
     CODEX_TTS_ENV_PATH: process.env.CODEX_TTS_ENV_PATH || TTS_ENV_FILE,
     // So notify script can resolve `.env` and write output to a writable location by default.
@@ -173,6 +180,32 @@ async function stopTtsWatcher(): Promise<void> {
   ttsWatcherProc = null;
 }
 
+function readTtsWatcherStats(timeoutMs = 500): Promise<any | null> {
+  // The watcher writes one JSON line per connection and closes; any failure just means no stats.
+  const socketPath = process.env.CODEX_TTS_STATS_SOCKET || TTS_WATCHER_STATS_SOCKET;
+  return new Promise((resolve) => {
+    const chunks: Buffer[] = [];
+    let settled = false;
+    const finish = (value: any | null) => {
+      if (settled) return;
+      settled = true;
+      socket.destroy();
+      resolve(value);
+    };
+    const socket = net.createConnection(socketPath);
+    socket.setTimeout(timeoutMs, () => finish(null));
+    socket.on('data', (chunk) => chunks.push(chunk));
+    socket.on('error', () => finish(null));
+    socket.on('end', () => {
+      try {
+        finish(JSON.parse(Buffer.concat(chunks).toString('utf8')));
+      } catch (err) {
+        finish(null);
+      }
+    });
+  });
+}
+
 async function setTtsWatcherEnabled(enabled: boolean): Promise<void> {
   if (enabled) {
     const hasKey = await hasOpenAiApiKeyConfigured();
@@ -2228,13 +2261,15 @@ const server = http.createServer(async (req, res) => {
 
   if (pathname === '/api/tts-watcher') {
     if (req.method === 'GET') {
+      const running = isProcRunning(ttsWatcherProc);
       sendJson(res, 200, {
         enabled: ttsWatcherEnabled,
-        running: isProcRunning(ttsWatcherProc),
+        running,
         pid: isProcRunning(ttsWatcherProc) ? ttsWatcherProc.pid : null,
         startedAt: ttsWatcherStartedAt,
         lastError: ttsWatcherLastError,
         logFile: TTS_WATCHER_LOG_FILE,
+        stats: running ? await readTtsWatcherStats() : null,
       });
       return;
     }
@@ -70,7 +70,12 @@ export async function runToolsetCli<TContext>(toolset: ToolsetSpec<TContext>, op
       errorOutput.write(`[debug] ${command} input: ${JSON.stringify(validated)}\n`);
     }
     const result = await runWithOptionalRetry(tool, validated, context, options, { command, rawArgs, input: validated });
-    output.write(`${JSON.stringify(result, null, 2)}\n`);
+    if (isAsyncIterable(result)) {
+      // Streaming tools return an async iterable; emit one compact JSON document per line (NDJSON).
+      await writeNdjson(output, result);
+    } else {
+      output.write(`${JSON.stringify(result, null, 2)}\n`);
+    }
   } catch (error) {
     const message = error instanceof Error ? error.message : String(error);
     errorOutput.write(`${message}\n`);
@@ -91,6 +96,19 @@ async function runWithOptionalRetry<TContext>(tool: { run: (input: unknown, cont
   }
 }
 
+function isAsyncIterable(value: unknown): value is AsyncIterable<unknown> {
+  return Boolean(value) && typeof (value as any)[Symbol.asyncIterator] === 'function';
+}
+
+async function writeNdjson(output: NodeJS.WritableStream, items: AsyncIterable<unknown>) {
+  for await (const item of items) {
+    if (!output.write(`${JSON.stringify(item)}\n`)) {
+      // Respect backpressure so a slow consumer doesn't make us buffer the whole export.
+      await new Promise<void>((resolve) => output.once('drain', () => resolve()));
+    }
+  }
+}
+
 function isUnauthorizedError(error: unknown) {
   const message = error instanceof Error ? error.message : String(error);
   return message.includes('401') || message.toLowerCase().includes('unauthorized');